@@ -0,0 +1,99 @@
+"""
+AllowanceCache: ERC20-Allowances pro (owner, token, spender), damit der Executor nur
+noch approved, wenn die Rest-Allowance für den Trade nicht reicht
+
+- Befüllen gebündelt per Multicall3 (allowance()-Reads für alle Token × Router einer Wallet)
+- Fortschreiben aus eigenen Approves, verbrauchten Beträgen und Approval-Logs (z.B. aus Receipts)
+"""
+
+import threading
+from web3 import Web3
+from metrics import cache_lookup
+
+# --- Approval(address indexed owner, address indexed spender, uint256 value) ---
+APPROVAL_TOPIC = Web3.to_hex(Web3.keccak(text="Approval(address,address,uint256)"))
+MAX_UINT256 = 2 ** 256 - 1  # "unendliche" Allowance wird beim transferFrom nicht verringert
+
+def _to_hex(value):
+    return Web3.to_hex(value) if isinstance(value, (bytes, bytearray)) else value
+
+def _topic_address(topic):
+    return "0x" + _to_hex(topic)[-40:].lower()
+
+class AllowanceCache:
+    def __init__(self, quoter):
+        """
+        :param quoter: MulticallQuoter mit blockierendem call_fn (Executor-Threads)
+        """
+        self.quoter = quoter
+        self.allowances = {}  # (owner, token, spender) -> int
+        self.prefetched = set()  # Owner, deren Token × Router bereits geladen wurden
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(owner, token, spender):
+        return owner.lower(), token.lower(), spender.lower()
+
+    def prefetch(self, triples):
+        """
+        :param triples: Iterable aus (owner, token, spender), ein Multicall pro Batch
+        """
+        triples = {self.key(*t): tuple(Web3.to_checksum_address(a) for a in t) for t in triples}
+        results = self.quoter.allowances(triples.values())
+        with self._lock:
+            for key, call in triples.items():
+                if results.get(call) is not None:
+                    self.allowances[key] = results[call]
+
+    def prefetch_owner(self, owner, tokens, spenders):
+        # Einmal pro Wallet: alle Token × Router in einem Rutsch
+        if owner.lower() in self.prefetched:
+            return
+        self.prefetch([(owner, t, s) for t in tokens for s in spenders])
+        self.prefetched.add(owner.lower())
+
+    def get(self, owner, token, spender):
+        key = self.key(owner, token, spender)
+        hit = key in self.allowances
+        cache_lookup("allowance", hit)
+        if not hit:
+            self.prefetch([key])
+        return self.allowances.get(key, 0)
+
+    def needs_approve(self, owner, token, spender, amount):
+        return self.get(owner, token, spender) < amount
+
+    # --- Fortschreiben ---
+    def record_approve(self, owner, token, spender, value):
+        # Eigener Approve gesendet: optimistisch übernehmen, bei Revert invalidate()
+        with self._lock:
+            self.allowances[self.key(owner, token, spender)] = value
+
+    def spend(self, owner, token, spender, amount):
+        key = self.key(owner, token, spender)
+        with self._lock:
+            current = self.allowances.get(key)
+            if current is not None and current != MAX_UINT256:
+                self.allowances[key] = max(0, current - amount)
+
+    def invalidate(self, owner, token, spender):
+        with self._lock:
+            self.allowances.pop(self.key(owner, token, spender), None)
+
+    def apply_logs(self, logs):
+        """
+        Übernimmt Approval-Logs (web3-AttributeDicts oder rohe JSON-RPC-Logs) für bekannte Keys
+        :returns: Anzahl aktualisierter Allowances
+        """
+        updated = 0
+        with self._lock:
+            for log in logs:
+                topics = log["topics"]
+                if len(topics) < 3 or _to_hex(topics[0]) != APPROVAL_TOPIC:
+                    continue
+                key = (_topic_address(topics[1]), log["address"].lower(), _topic_address(topics[2]))
+                if key not in self.allowances:
+                    continue
+                self.allowances[key] = int(_to_hex(log["data"]), 16)
+                updated += 1
+        return updated
@@ -0,0 +1,208 @@
+"""
+Benchmark: Quote-Calldata kodieren/dekodieren – web3-Contract vs. eth_abi vs. Roh-Codec (quote_engine)
+
+Vor dem Messen prüft der Lauf die Bit-Gleichheit des Roh-Codecs gegen eth_abi mit zufälligen
+und Rand-Eingaben (0, 2**256-1, leere/ungerade returnData, fehlgeschlagene Sub-Calls, abgeschnittene
+Antworten). Bei einer Abweichung bricht er mit Exit-Code 1 ab, ohne Zahlen zu liefern.
+
+    python benchmarks/bench_codec.py --iterations 20000 --batch 100
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from eth_abi import decode, encode
+from web3 import Web3
+from scanner.quote_engine import (
+    AGGREGATE3_SELECTOR, GET_AMOUNTS_OUT_SELECTOR, GET_PAIR_SELECTOR, ALLOWANCE_SELECTOR,
+    encode_get_amounts_out, decode_get_amounts_out, decode_get_reserves, encode_get_pair, decode_get_pair,
+    decode_decimals, encode_allowance, decode_allowance, encode_aggregate3, decode_aggregate3,
+)
+
+ROUTER_ABI = [{
+    "name": "getAmountsOut", "type": "function", "stateMutability": "view",
+    "inputs": [{"name": "amountIn", "type": "uint256"}, {"name": "path", "type": "address[]"}],
+    "outputs": [{"name": "amounts", "type": "uint256[]"}],
+}]
+MAX_UINT256 = 2**256 - 1
+
+# --- Referenz: eth_abi, wie quote_engine vor dem Roh-Codec ---
+REFERENCE = {
+    "encode_get_amounts_out": lambda amount, path: GET_AMOUNTS_OUT_SELECTOR + encode(["uint256", "address[]"], [amount, path]),
+    "decode_get_amounts_out": lambda data: decode(["uint256[]"], data)[0],
+    "decode_get_reserves": lambda data: decode(["uint112", "uint112", "uint32"], data),
+    "encode_get_pair": lambda a, b: GET_PAIR_SELECTOR + encode(["address", "address"], [a, b]),
+    "decode_get_pair": lambda data: Web3.to_checksum_address(decode(["address"], data)[0]),
+    "decode_decimals": lambda data: decode(["uint8"], data)[0],
+    "encode_allowance": lambda owner, spender: ALLOWANCE_SELECTOR + encode(["address", "address"], [owner, spender]),
+    "decode_allowance": lambda data: decode(["uint256"], data)[0],
+    "encode_aggregate3": lambda calls: AGGREGATE3_SELECTOR + encode(
+        ["(address,bool,bytes)[]"], [[(Web3.to_checksum_address(t), True, d) for t, d in calls]]
+    ),
+    "decode_aggregate3": lambda data: decode(["(bool,bytes)[]"], data)[0],
+}
+
+RAW = {
+    "encode_get_amounts_out": encode_get_amounts_out,
+    "decode_get_amounts_out": decode_get_amounts_out,
+    "decode_get_reserves": decode_get_reserves,
+    "encode_get_pair": encode_get_pair,
+    "decode_get_pair": decode_get_pair,
+    "decode_decimals": decode_decimals,
+    "encode_allowance": encode_allowance,
+    "decode_allowance": decode_allowance,
+    "encode_aggregate3": encode_aggregate3,
+    "decode_aggregate3": decode_aggregate3,
+}
+
+# --- Zufällige Eingaben ---
+def address(rng, checksummed=None):
+    raw = "0x" + rng.randbytes(20).hex()
+    if checksummed is None:
+        checksummed = rng.random() < 0.5
+    return Web3.to_checksum_address(raw) if checksummed else raw
+
+def uint(rng, bits=256):
+    # Ränder häufiger als gleichverteilt
+    pick = rng.random()
+    if pick < 0.1:
+        return 0
+    if pick < 0.2:
+        return 2**bits - 1
+    return rng.getrandbits(rng.randint(1, bits))
+
+def calldata(rng):
+    return rng.randbytes(rng.choice([0, 1, 4, 31, 32, 33, 68, 100, 132, 200]))
+
+def cases(rng):
+    """
+    :returns: Liste aus (Funktion, args) für die Gleichheitsprüfung
+    """
+    path = [address(rng) for _ in range(rng.randint(1, 4))]
+    amounts = [uint(rng) for _ in range(rng.randint(0, 5))]
+    calls = [(address(rng), calldata(rng)) for _ in range(rng.randint(0, 6))]
+    results = [(rng.random() < 0.8, calldata(rng)) for _ in range(rng.randint(0, 6))]
+    return [
+        ("encode_get_amounts_out", (uint(rng), path)),
+        ("decode_get_amounts_out", (encode(["uint256[]"], [amounts]),)),
+        ("decode_get_reserves", (encode(["uint112", "uint112", "uint32"], [uint(rng, 112), uint(rng, 112), uint(rng, 32)]),)),
+        ("encode_get_pair", (address(rng), address(rng))),
+        ("decode_get_pair", (encode(["address"], [address(rng)]),)),
+        ("decode_decimals", (encode(["uint8"], [uint(rng, 8)]),)),
+        ("encode_allowance", (address(rng), address(rng))),
+        ("decode_allowance", (encode(["uint256"], [uint(rng)]),)),
+        ("encode_aggregate3", (calls,)),
+        ("decode_aggregate3", (encode(["(bool,bytes)[]"], [results]),)),
+    ]
+
+def normalize(value):
+    # eth_abi liefert Tupel, der Roh-Codec teils Listen; verglichen wird der Inhalt
+    if isinstance(value, (list, tuple)):
+        return tuple(normalize(v) for v in value)
+    return value
+
+def check_equivalence(rng, n):
+    """
+    :returns: Anzahl geprüfter Fälle; SystemExit(1) bei der ersten Abweichung
+    """
+    checked = 0
+    for _ in range(n):
+        for name, args in cases(rng):
+            expected, actual = normalize(REFERENCE[name](*args)), normalize(RAW[name](*args))
+            if expected != actual:
+                print(json.dumps({"mismatch": name, "args": repr(args), "expected": repr(expected), "actual": repr(actual)}, indent=2))
+                raise SystemExit(1)
+            checked += 1
+
+    # Abgeschnittene Antworten: beide Seiten müssen ablehnen, nicht still falsch dekodieren
+    for name, data in [
+        ("decode_get_amounts_out", encode(["uint256[]"], [[1, 2, 3]])[:-1]),
+        ("decode_get_reserves", bytes(64)),
+        ("decode_aggregate3", encode(["(bool,bytes)[]"], [[(True, b"x" * 40)]])[:-20]),
+        ("decode_allowance", b""),
+    ]:
+        for label, fn in (("eth_abi", REFERENCE[name]), ("raw", RAW[name])):
+            try:
+                fn(data)
+            except Exception:
+                continue
+            print(json.dumps({"mismatch": name, "path": label, "error": "abgeschnittene Daten akzeptiert"}))
+            raise SystemExit(1)
+        checked += 1
+    return checked
+
+# --- Messung ---
+def per_call_ns(fn, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e9
+
+def measure(rng, iterations, batch):
+    router = Web3().eth.contract(abi=ROUTER_ABI)
+    codec = router.w3.codec
+    amount, path = 10**18, [address(rng, True), address(rng, True)]
+    amounts_data = encode(["uint256[]"], [[amount, 123456789 * 10**12]])
+    reserves_data = encode(["uint112", "uint112", "uint32"], [10**24, 3 * 10**21, 1_700_000_000])
+    calls = [(address(rng), encode_get_amounts_out(amount, path)) for _ in range(batch)]
+    results_data = encode(["(bool,bytes)[]"], [[(True, amounts_data)] * batch])
+
+    ops = {
+        "encode_get_amounts_out": {
+            "web3_contract": lambda: router.encode_abi("getAmountsOut", [amount, path]),
+            "eth_abi": lambda: REFERENCE["encode_get_amounts_out"](amount, path),
+            "raw": lambda: encode_get_amounts_out(amount, path),
+        },
+        "decode_get_amounts_out": {
+            "web3_contract": lambda: codec.decode(["uint256[]"], amounts_data)[0],
+            "eth_abi": lambda: REFERENCE["decode_get_amounts_out"](amounts_data),
+            "raw": lambda: decode_get_amounts_out(amounts_data),
+        },
+        "decode_get_reserves": {
+            "eth_abi": lambda: REFERENCE["decode_get_reserves"](reserves_data),
+            "raw": lambda: decode_get_reserves(reserves_data),
+        },
+        f"encode_aggregate3_x{batch}": {
+            "eth_abi": lambda: REFERENCE["encode_aggregate3"](calls),
+            "raw": lambda: encode_aggregate3(calls),
+        },
+        f"decode_aggregate3_x{batch}": {
+            "eth_abi": lambda: [REFERENCE["decode_get_amounts_out"](r) for _, r in REFERENCE["decode_aggregate3"](results_data)],
+            "raw": lambda: [decode_get_amounts_out(r) for _, r in decode_aggregate3(results_data)],
+        },
+    }
+
+    results = []
+    for op, paths in ops.items():
+        # Batch-Operationen sind ~batch-mal teurer: weniger Wiederholungen
+        n = max(10, iterations // batch) if op.endswith(f"_x{batch}") else iterations
+        timings = {label: per_call_ns(fn, n) for label, fn in paths.items()}
+        results.append({
+            "op": op,
+            "iterations": n,
+            "ns_per_call": timings,
+            "speedup_vs_eth_abi": timings["eth_abi"] / timings["raw"],
+        })
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20_000)
+    parser.add_argument("--batch", type=int, default=100, help="Sub-Calls pro aggregate3")
+    parser.add_argument("--cases", type=int, default=500, help="Zufallsrunden der Gleichheitsprüfung")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    checked = check_equivalence(rng, args.cases)
+    results = measure(rng, args.iterations, args.batch)
+    print(json.dumps({"benchmark": "codec", "equivalence_cases": checked, "results": results}, indent=2))
+
+if __name__ == "__main__":
+    main()
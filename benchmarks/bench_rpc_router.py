@@ -0,0 +1,168 @@
+"""
+Benchmark: ein Endpoint (AsyncRpcClient) vs. RpcRouter über mehrere lokale Stub-Server
+
+Szenarien (alle Endpoints sind echte HTTP-Server im Prozess, siehe MockEndpoint):
+- tail: zwei Endpoints mit Latenz-Ausreißern; Router mit und ohne Hedging
+- throttled: ein Endpoint antwortet anteilig mit HTTP 429; Router weicht aus
+Danach Funktionsprüfungen (Exit-Code 1 bei Fehlschlag): Broadcast erreicht alle Endpoints
+(async & sync), Ausfall eines Endpoints ohne Fehler beim Aufrufer, Node-Fehler ohne Failover.
+
+    python benchmarks/bench_rpc_router.py --requests 400 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from web3 import Web3
+from benchmarks.mock_rpc import MockNode, MockEndpoint
+from rpc_client import AsyncRpcClient, RpcError
+from rpc_router import RpcRouter, RouterHTTPProvider, RPC_FAILOVERS
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else None
+
+async def load(rpc, requests, concurrency):
+    latencies, errors = [], 0
+    queue = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in queue:
+            start = time.perf_counter()
+            try:
+                await rpc.block_number()
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    total = time.perf_counter() - start
+    return {
+        "requests": requests,
+        "errors": errors,
+        "req_per_s": requests / total,
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+def endpoints(specs, seed):
+    return [MockEndpoint(MockNode(seed=seed + i), seed=seed + i, **spec).start() for i, spec in enumerate(specs)]
+
+async def scenario(name, specs, args):
+    stubs = endpoints(specs, args.seed)
+    urls = [s.url for s in stubs]
+    results = []
+    try:
+        variants = [
+            ("single", lambda: AsyncRpcClient(urls[0])),
+            ("router_no_hedge", lambda: RpcRouter(urls, hedge=False)),
+            ("router", lambda: RpcRouter(urls, hedge_min=args.hedge_min_ms / 1000)),
+        ]
+        for label, make in variants:
+            for stub in stubs:
+                stub.node.reset_stats()
+            async with make() as rpc:
+                result = await load(rpc, args.requests, args.concurrency)
+            result["share"] = [sum(s.calls.values()) for s in stubs]
+            results.append({"client": label, **result})
+    finally:
+        for stub in stubs:
+            stub.stop()
+    return {"scenario": name, "endpoints": specs, "results": results}
+
+# --- Funktionsprüfungen ---
+async def check_async(args):
+    checks = {}
+    stubs = endpoints([{"latency": 0.002}, {"latency": 0.004}, {"latency": 0.006}], args.seed)
+    try:
+        async with RpcRouter([s.url for s in stubs]) as rpc:
+            await rpc.send_raw_transaction(b"\x02\x01")
+            await asyncio.sleep(0.1)  # übrige Broadcasts laufen nach der ersten Antwort weiter
+            checks["async_broadcast_all"] = all(s.calls.get("eth_sendRawTransaction") == 1 for s in stubs)
+
+            stubs[0].down = stubs[1].down = True
+            errors = 0
+            for _ in range(20):
+                try:
+                    await rpc.block_number()
+                except Exception:
+                    errors += 1
+            checks["async_failover_no_errors"] = errors == 0
+            stubs[0].down = stubs[1].down = False
+
+            # Node-Fehler ist an jedem Endpoint gleich: sofort zurück, kein Failover
+            failovers = sum(c.value for c in RPC_FAILOVERS._children.values())
+            before = sum(s.calls.get("eth_unknown", 0) for s in stubs)
+            try:
+                await rpc.request("eth_unknown")
+                checks["async_node_error_no_failover"] = False
+            except RpcError:
+                after = sum(s.calls.get("eth_unknown", 0) for s in stubs)
+                checks["async_node_error_no_failover"] = (
+                    after - before == 1 and sum(c.value for c in RPC_FAILOVERS._children.values()) == failovers
+                )
+    finally:
+        for stub in stubs:
+            stub.stop()
+    return checks
+
+def check_sync(args):
+    checks = {}
+    stubs = endpoints([{"latency": 0.002}, {"latency": 0.004}], args.seed)
+    try:
+        web3 = Web3(RouterHTTPProvider([s.url for s in stubs]))
+        web3.eth.send_raw_transaction(b"\x02\x01\x03")
+        time.sleep(0.1)
+        checks["sync_broadcast_all"] = all(s.calls.get("eth_sendRawTransaction") == 1 for s in stubs)
+
+        stubs[0].down = True
+        errors = 0
+        for _ in range(20):
+            try:
+                web3.eth.block_number
+            except Exception:
+                errors += 1
+        checks["sync_failover_no_errors"] = errors == 0
+    finally:
+        for stub in stubs:
+            stub.stop()
+    return checks
+
+async def run(args):
+    tail = {"tail_share": args.tail_share, "tail_latency": args.tail_ms / 1000}
+    scenarios = [
+        await scenario("tail", [{"latency": 0.005, **tail}, {"latency": 0.008, **tail}], args),
+        await scenario("throttled", [{"latency": 0.005, "throttle_share": 0.3}, {"latency": 0.008}], args),
+    ]
+    checks = {**await check_async(args), **check_sync(args)}
+    return scenarios, checks
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--tail-share", type=float, default=0.05, help="Anteil langsamer Antworten je Endpoint")
+    parser.add_argument("--tail-ms", type=float, default=300.0)
+    parser.add_argument("--hedge-min-ms", type=float, default=20.0)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    scenarios, checks = asyncio.run(run(args))
+    print(json.dumps({"benchmark": "rpc_router", "scenarios": scenarios, "checks": checks}, indent=2))
+    if not all(checks.values()):
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
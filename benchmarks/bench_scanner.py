@@ -0,0 +1,324 @@
+"""
+Benchmark: Scanner-Hot-Path (scan_tick) gegen eine deterministische Mock-Chain
+
+Pro Szenario (User × Paare × DEXe) werden synthetische Pools auf einer MockChain
+angelegt und die Globals von scanner.async_scanner auf einen MockNode umgebogen
+(RPC, Quoter, Pair-Index, Reserve-Cache, Spread-Matrix, StateStore/Watch-Set, Trade-Queue).
+Jeder Tick mined einen Block, verschiebt die Reserves eines Teils der Pools (Sync-Logs)
+und ruft scan_tick() auf – derselbe Code wie im Live-Betrieb. Mit --churn ändert ein Teil
+der User pro Tick seine Einstellungen (StateStore.put -> inkrementelles Neuplanen).
+
+Gemessen wird:
+- Quotes/s und Tick-Latenz (p50/p95/max)
+- RPC-Roundtrips und Calls pro Tick (nach Methode)
+- Speicher pro User (tracemalloc: State-Snapshot + Watch-Set)
+- Submission-Latenz des Executors: TradeQueue -> SignerRegistry -> eth_sendRawTransaction
+- Einzel-Calls get_price() und calculate_spread()
+
+Alle Zufallswerte kommen aus einem Seed; die Ausgabe ist JSON (stdout oder --out).
+
+    python benchmarks/bench_scanner.py --users 10,100,1000 --pairs 5,20 --dexes 2,4 --ticks 50
+    python benchmarks/bench_scanner.py --mode router --latency-ms 5 --error-rate 0.01 --out bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from decimal import Decimal
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+os.chdir(ROOT)  # async_scanner liest config.yaml aus dem Arbeitsverzeichnis
+
+from eth_account import Account
+from web3 import Web3
+import scanner.async_scanner as scanner
+from benchmarks.mock_rpc import MockNode, MockAsyncRpc, MockProvider
+from config_index import ConfigIndex
+from gas_oracle import GasOracle
+from nonce_manager import NonceManager
+from signer_registry import SignerRegistry
+from state_store import StateStore
+from trade_queue import TradeQueue
+from scanner.mock_chain import MockChain
+from scanner.pair_index import PairIndex
+from scanner.quote_engine import MulticallQuoter
+from scanner.reserve_cache import ReserveCache
+from scanner.watch_set import WatchSet
+
+MODES = ("reserves", "router")
+BASE_RESERVE = 10**24
+
+def address(kind, n):
+    # Deterministische, gut unterscheidbare Adressen: kind im obersten Byte
+    return Web3.to_checksum_address(f"0x{kind:02x}{n:038x}")
+
+def percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))]
+
+# --- Synthetische Welt: Tokens, DEXe, Pools, User ---
+def build_chain(rng, n_pairs, n_dexes, mode):
+    chain = MockChain()
+    pairs = []
+    for i in range(n_pairs):
+        token0, token1 = address(0x10, 2 * i + 1), address(0x10, 2 * i + 2)
+        chain.add_token(token0, 18)
+        chain.add_token(token1, 18)
+        pairs.append({"token0": token0, "token1": token1, "name": f"T{2 * i + 1}/T{2 * i + 2}"})
+
+    dexes, pools = [], []
+    for d in range(n_dexes):
+        dex = {"name": f"Dex{d}", "router": address(0x20, d + 1)}
+        if mode == "reserves":
+            dex["factory"] = address(0x30, d + 1)
+        dexes.append(dex)
+        for i, pair in enumerate(pairs):
+            pool = address(0x40, i * n_dexes + d + 1)
+            # Preise je DEX um bis zu ±2 % versetzt, damit Spreads entstehen
+            reserve1 = int(BASE_RESERVE * (1 + rng.uniform(-0.02, 0.02)))
+            chain.add_pool(dex["router"], pool, pair["token0"], pair["token1"], BASE_RESERVE, reserve1, factory=dex.get("factory"))
+            pools.append(pool)
+    return chain, pairs, dexes, pools
+
+def build_users(rng, n_users, n_pairs, dexes, pairs_per_user, autotrade):
+    names = [dex["name"] for dex in dexes]
+    return {
+        user_id: {
+            "pairs": rng.sample(range(n_pairs), min(pairs_per_user, n_pairs)),
+            "dexes": rng.sample(names, rng.randint(2, len(names))),
+            "spread": round(rng.uniform(0.5, 3.0), 2),
+            "autotrade": rng.random() < autotrade,
+        }
+        for user_id in range(1, n_users + 1)
+    }
+
+def churn(store, rng, share):
+    # Einstellungsänderungen wie aus dem Bot: Spread bzw. Autotrade umschalten
+    user_ids = list(store.snapshot)
+    for user_id in rng.sample(user_ids, int(len(user_ids) * share)):
+        state = store.get(user_id)
+        state["spread"] = str(round(rng.uniform(0.5, 3.0), 2))
+        store.put(user_id, state)
+
+def perturb(chain, rng, pools, share):
+    # Ein Swap pro gewähltem Pool: Reserves verschieben, Sync-Log im aktuellen Block
+    for pool in rng.sample(pools, max(1, int(len(pools) * share))):
+        p = chain.pairs[pool.lower()]
+        factor = 1 + rng.uniform(-0.01, 0.01)
+        chain.set_reserves(pool, int(p["reserve0"] * factor), int(p["reserve1"] / factor))
+
+# --- Executor-Stand-in: echter Sende-Pfad (Registry + NonceManager) auf dem MockNode ---
+class SubmissionProbe:
+    def __init__(self, node, latency):
+        web3 = Web3(MockProvider(node, latency=latency))
+        keys = {}
+
+        def load_wallet(user_id):
+            acct = keys.setdefault(user_id, Account.from_key(Web3.keccak(text=f"bench-{user_id}")))
+            return acct.address, acct.key
+
+        self.signers = SignerRegistry(web3, NonceManager(web3), load_wallet)
+        self.queued = {}
+        self.latencies = []
+        self._lock = threading.Lock()
+
+    def submit_hook(self, queue):
+        submit = queue.submit
+
+        def timed_submit(user_id, key, *args, **kwargs):
+            with self._lock:
+                self.queued[key] = time.perf_counter()
+            return submit(user_id, key, *args, **kwargs)
+        queue.submit = timed_submit
+
+    def execute(self, user_id, token0, token1, router_a, router_b, amount, notify, amount_in=None, expected_profit=None):
+        account = self.signers.account(user_id)
+        self.signers.sign_and_send(account, {
+            "to": Web3.to_checksum_address(router_a), "value": 0, "data": "0x", "gas": 250_000,
+            "maxFeePerGas": 2 * 10**9, "maxPriorityFeePerGas": 10**8,
+        })
+        done = time.perf_counter()
+        dex_a = next(d["name"] for d in scanner.CONFIG["dexes"] if d["router"] == router_a)
+        dex_b = next(d["name"] for d in scanner.CONFIG["dexes"] if d["router"] == router_b)
+        with self._lock:
+            queued = self.queued.pop((user_id, token0.lower(), token1.lower(), dex_a, dex_b), None)
+            if queued is not None:
+                self.latencies.append(done - queued)
+
+# --- Scanner-Globals auf die Mock-Welt umbiegen ---
+def install(node, rpc, pairs, dexes, index_path, probe, workers):
+    scanner.RPC = rpc
+    scanner.QUOTER = MulticallQuoter(async_call_fn=rpc.eth_call)
+    scanner.PAIR_INDEX = PairIndex(index_path)
+    scanner.RESERVES = ReserveCache()
+    scanner.ROUTES_ENABLED = False
+    scanner.apply_config(ConfigIndex({**scanner.CONFIG, "pairs": pairs, "dexes": dexes}))
+    scanner.GAS = GasOracle()
+    scanner.SIMULATOR = None
+    scanner.TRADES = TradeQueue(probe.execute, max_pending=10**6, workers=workers, max_age_blocks=10**6)
+    probe.submit_hook(scanner.TRADES)
+
+async def micro(rpc, pairs, dexes, calls):
+    # Einzel-Quote über den RPC-Client vs. reine Spread-Arithmetik
+    router, pair = dexes[0]["router"], pairs[0]
+    start = time.perf_counter()
+    for _ in range(calls):
+        await scanner.get_price(router, pair["token0"], pair["token1"])
+    get_price_us = (time.perf_counter() - start) / calls * 1e6
+
+    a, b = Decimal("1.0213"), Decimal("0.9987")
+    start = time.perf_counter()
+    for _ in range(calls * 100):
+        scanner.calculate_spread(a, b)
+    spread_us = (time.perf_counter() - start) / (calls * 100) * 1e6
+    return {"get_price_us": get_price_us, "calculate_spread_us": spread_us}
+
+async def run_scenario(n_users, n_pairs, n_dexes, args):
+    rng = random.Random(args.seed)
+    chain, pairs, dexes, pools = build_chain(rng, n_pairs, n_dexes, args.mode)
+    node = MockNode(chain, error_rate=args.error_rate, seed=args.seed)
+    rpc = MockAsyncRpc(node, latency=args.latency_ms / 1000)
+    probe = SubmissionProbe(MockNode(seed=args.seed), args.latency_ms / 1000)
+
+    users = build_users(rng, n_users, n_pairs, dexes, args.pairs_per_user, args.autotrade)
+    with tempfile.TemporaryDirectory() as directory:
+        install(node, rpc, pairs, dexes, os.path.join(directory, "pair_index.sqlite"), probe, args.workers)
+        await scanner.load_token_metadata()
+
+        # User wie vom Bot geschrieben; der Scanner öffnet den Store neu (Snapshot aus SQLite)
+        state_path = os.path.join(directory, "user_state.sqlite")
+        writer = StateStore(state_path)
+        for user_id, state in users.items():
+            writer.put(user_id, state)
+
+        # Speicher pro User: State-Snapshot + Watch-Set (Quotes & Watches)
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        scanner.STATE = StateStore(state_path)
+        scanner.WATCHES = WatchSet(scanner.plan_user)
+        scanner.STATE.subscribe(scanner.WATCHES.update)
+        bytes_per_user = (tracemalloc.get_traced_memory()[0] - before) / n_users
+        tracemalloc.stop()
+        quotes_per_tick = len(scanner.WATCHES.quotes)
+
+        # Warm-up: Pair-Adressen & Reserves einmal laden (wie der erste Live-Tick)
+        chain.mine()
+        await scanner.scan_tick(chain.block)
+        node.reset_stats()
+        roundtrips = rpc.roundtrips
+
+        ticks = []
+        for _ in range(args.ticks):
+            block = chain.mine()
+            perturb(chain, rng, pools, args.swap_share)
+            if args.churn:
+                churn(writer, rng, args.churn)
+            start = time.perf_counter()
+            await scanner.scan_tick(block)
+            ticks.append(time.perf_counter() - start)
+
+        calls = dict(node.calls)
+        errors = node.errors
+        roundtrips = rpc.roundtrips - roundtrips
+        micro_results = await micro(rpc, pairs, dexes, args.micro_calls)
+
+        # Ausstehende Trades abwarten, damit alle Submissions gemessen sind
+        deadline = time.monotonic() + 30
+        while scanner.TRADES.metrics()["depth"] or scanner.TRADES.metrics()["active_lanes"]:
+            if time.monotonic() > deadline:
+                break
+            await asyncio.sleep(0.01)
+        scanner.TRADES._pool.shutdown(wait=True)
+        scanner.PAIR_INDEX.close()
+        scanner.STATE.close()
+        writer.close()
+
+    total = sum(ticks)
+    submissions = probe.latencies
+    return {
+        "users": n_users,
+        "pairs": n_pairs,
+        "dexes": n_dexes,
+        "quotes_per_tick": quotes_per_tick,
+        "quotes_per_s": quotes_per_tick * len(ticks) / total if total else None,
+        "tick_ms": {
+            "p50": percentile(ticks, 0.50) * 1000,
+            "p95": percentile(ticks, 0.95) * 1000,
+            "max": max(ticks) * 1000,
+        },
+        "rpc_per_tick": {
+            "roundtrips": roundtrips / len(ticks),
+            "calls": {m: n / len(ticks) for m, n in sorted(calls.items())},
+            "errors": errors / len(ticks),
+        },
+        "bytes_per_user": bytes_per_user,
+        "executor": {
+            "trades": len(submissions),
+            "queue": scanner.TRADES.metrics(),
+            "submit_ms_p50": percentile(submissions, 0.50) * 1000 if submissions else None,
+            "submit_ms_p95": percentile(submissions, 0.95) * 1000 if submissions else None,
+        },
+        "micro": micro_results,
+    }
+
+def grid(value):
+    return [int(v) for v in value.split(",") if v]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=grid, default=[10, 100, 1000], help="kommagetrennte User-Anzahlen")
+    parser.add_argument("--pairs", type=grid, default=[5, 20], help="kommagetrennte Paar-Anzahlen")
+    parser.add_argument("--dexes", type=grid, default=[2, 4], help="kommagetrennte DEX-Anzahlen")
+    parser.add_argument("--mode", choices=MODES, default="reserves", help="reserves = lokale V2-Quotes, router = Multicall-Quotes")
+    parser.add_argument("--ticks", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="simulierte RPC-Latenz pro Roundtrip")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Anteil fehlerhafter RPC-Antworten")
+    parser.add_argument("--swap-share", type=float, default=0.2, help="Anteil der Pools mit Swap pro Block")
+    parser.add_argument("--pairs-per-user", type=int, default=3)
+    parser.add_argument("--autotrade", type=float, default=0.05, help="Anteil der User mit Autotrade")
+    parser.add_argument("--churn", type=float, default=0.0, help="Anteil der User, die pro Tick ihre Einstellungen ändern")
+    parser.add_argument("--workers", type=int, default=8, help="Threads der Trade-Queue")
+    parser.add_argument("--micro-calls", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="JSON zusätzlich in diese Datei schreiben")
+    args = parser.parse_args()
+
+    # Trade-Logs des Scanners würden die Messung dominieren
+    logging.basicConfig(level=logging.WARNING)
+
+    results = []
+    for n_users in args.users:
+        for n_pairs in args.pairs:
+            for n_dexes in args.dexes:
+                # trigger_trade meldet per print – stdout bleibt dem JSON vorbehalten
+                with redirect_stdout(sys.stderr):
+                    results.append(asyncio.run(run_scenario(n_users, n_pairs, n_dexes, args)))
+                print(f"users={n_users} pairs={n_pairs} dexes={n_dexes}: {results[-1]['quotes_per_s']:.0f} quotes/s", file=sys.stderr)
+
+    report = {
+        "benchmark": "scanner",
+        "python": platform.python_version(),
+        "params": {k: v for k, v in vars(args).items() if k != "out"},
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark: Signieren + Senden einer Transaktion, alter Pfad vs. SignerRegistry
+
+Alter Pfad pro TX: Wallet-JSON lesen, chain_id abfragen, mit dem Key-String signieren.
+Neuer Pfad: gecachter LocalAccount, gecachte chain_id, lokale Nonce (NonceManager).
+Der RPC-Provider läuft im Prozess mit fester Latenz pro Call, damit die Zahlen
+reproduzierbar sind.
+
+    python benchmarks/bench_signer.py --txs 200 --latency-ms 5
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from eth_account import Account
+from web3 import Web3
+from nonce_manager import NonceManager
+from signer_registry import SignerRegistry
+from benchmarks.mock_rpc import MockProvider
+
+def make_wallet(directory, user_id):
+    acct = Account.create()
+    with open(os.path.join(directory, f"{user_id}.json"), "w") as f:
+        json.dump({"address": acct.address, "private_key": acct.key.hex()}, f)
+
+def load_wallet(directory, user_id):
+    with open(os.path.join(directory, f"{user_id}.json")) as f:
+        data = json.load(f)
+    return data["address"], data["private_key"]
+
+def tx_template(to):
+    return {"to": to, "value": 1, "gas": 21_000, "maxFeePerGas": 2 * 10**9, "maxPriorityFeePerGas": 10**8}
+
+# --- Alter Pfad: wie execute_trade vor der Registry ---
+def send_legacy(web3, directory, user_id, nonce):
+    address, private_key = load_wallet(directory, user_id)
+    tx = {**tx_template(address), "nonce": nonce, "chainId": web3.eth.chain_id}
+    signed = web3.eth.account.sign_transaction(tx, private_key)
+    return web3.eth.send_raw_transaction(signed.raw_transaction)
+
+def run(label, fn, txs):
+    latencies = []
+    start = time.perf_counter()
+    for i in range(txs):
+        t = time.perf_counter()
+        fn(i)
+        latencies.append(time.perf_counter() - t)
+    total = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "path": label,
+        "txs": txs,
+        "total_s": total,
+        "tx_per_s": txs / total,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_ms": latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))] * 1000,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--txs", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="simulierte RPC-Latenz pro Call")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        user_id = 1
+        make_wallet(directory, user_id)
+        results = []
+
+        provider = MockProvider(latency=args.latency_ms / 1000)
+        web3 = Web3(provider)
+        results.append({**run("legacy", lambda i: send_legacy(web3, directory, user_id, i), args.txs), "rpc_calls": dict(provider.calls)})
+
+        provider = MockProvider(latency=args.latency_ms / 1000)
+        web3 = Web3(provider)
+        signers = SignerRegistry(web3, NonceManager(web3), lambda uid: load_wallet(directory, uid))
+
+        def send_registry(_):
+            account = signers.account(user_id)
+            return signers.sign_and_send(account, tx_template(account.address))
+
+        results.append({**run("registry", send_registry, args.txs), "rpc_calls": dict(provider.calls)})
+
+    print(json.dumps({"benchmark": "signer", "latency_ms": args.latency_ms, "results": results}, indent=2))
+
+if __name__ == "__main__":
+    main()
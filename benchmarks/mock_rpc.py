@@ -0,0 +1,227 @@
+"""
+MockNode: deterministischer JSON-RPC-Node im Prozess für Benchmarks (kein Netzwerk)
+
+Beantwortet die Methoden von Scanner und Sende-Pfad gegen eine MockChain
+(eth_call inkl. Multicall3, eth_getLogs, eth_blockNumber, eth_feeHistory, eth_gasPrice,
+eth_chainId, eth_getTransactionCount, eth_sendRawTransaction). Latenz pro Roundtrip und
+Fehlerrate sind einstellbar; Fehler werden über einen geseedeten RNG injiziert, zwei Läufe
+mit gleichem Seed sehen also dieselben Fehler.
+
+    node = MockNode(chain, error_rate=0.01, seed=1)
+    rpc = MockAsyncRpc(node, latency=0.002)           # statt AsyncRpcClient
+    web3 = Web3(MockProvider(node, latency=0.002))    # statt HTTPProvider
+
+MockEndpoint stellt einen MockNode als echten HTTP-Endpoint bereit (Stub-Server für den RpcRouter),
+mit Latenz-Ausreißern, HTTP 429 und Ausfall:
+
+    endpoint = MockEndpoint(node, latency=0.005, tail_share=0.1, tail_latency=0.3).start()
+    rpc = AsyncRpcClient(endpoint.url)
+"""
+
+import asyncio
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from web3 import Web3
+from web3.providers.base import BaseProvider
+from rpc_client import AsyncRpcClient
+from scanner.mock_chain import MockChain, MockRevert
+
+DEFAULT_CHAIN_ID = 11155111
+DEFAULT_BASE_FEE = 10**9
+DEFAULT_PRIORITY_FEE = 10**8
+
+class MockNode:
+    def __init__(self, chain=None, error_rate=0.0, seed=0, chain_id=DEFAULT_CHAIN_ID, base_fee=DEFAULT_BASE_FEE):
+        """
+        :param chain: MockChain mit Pools/Tokens (None = leere Chain, z.B. nur Sende-Pfad)
+        :param error_rate: Anteil der Calls, die mit einem RPC-Fehler antworten (0..1)
+        :param seed: Seed für die Fehlerinjektion
+        """
+        self.chain = chain or MockChain()
+        self.error_rate = error_rate
+        self.chain_id = chain_id
+        self.base_fee = base_fee
+        self.calls = {}     # Methode -> Anzahl
+        self.errors = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()  # Sende-Pfad läuft aus Worker-Threads
+
+    def reset_stats(self):
+        self.calls = {}
+        self.errors = 0
+
+    # --- Ein JSON-RPC-Request-Objekt -> Reply-Objekt ---
+    def handle(self, request):
+        method, params = request["method"], request.get("params", [])
+        reply = {"jsonrpc": "2.0", "id": request.get("id")}
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+            failed = self.error_rate and self._rng.random() < self.error_rate
+            if failed:
+                self.errors += 1
+        if failed:
+            reply["error"] = {"code": -32005, "message": "mock: request limit exceeded"}
+            return reply
+        try:
+            reply["result"] = self._dispatch(method, params)
+        except MockRevert as e:
+            reply["error"] = {"code": 3, "message": f"execution reverted: {e}"}
+        except Exception as e:
+            reply["error"] = {"code": -32601, "message": str(e)}
+        return reply
+
+    def handle_payload(self, payload):
+        # Einzel-Request oder Batch (Liste), wie über HTTP
+        if isinstance(payload, list):
+            return [self.handle(p) for p in payload]
+        return self.handle(payload)
+
+    def _dispatch(self, method, params):
+        chain = self.chain
+        if method == "eth_blockNumber":
+            return hex(chain.block)
+        if method == "eth_call":
+            return Web3.to_hex(chain.call(params[0]["to"], Web3.to_bytes(hexstr=params[0]["data"])))
+        if method == "eth_getLogs":
+            return chain.get_logs(params[0])
+        if method == "eth_chainId":
+            return hex(self.chain_id)
+        if method == "eth_gasPrice":
+            return hex(self.base_fee + DEFAULT_PRIORITY_FEE)
+        if method == "eth_feeHistory":
+            count = int(params[0], 16)
+            oldest = max(chain.block - count + 1, 0)
+            return {
+                "oldestBlock": hex(oldest),
+                "baseFeePerGas": [hex(self.base_fee)] * (count + 1),
+                "reward": [[hex(DEFAULT_PRIORITY_FEE)] * len(params[2])] * count,
+                "gasUsedRatio": [0.5] * count,
+            }
+        if method == "eth_getTransactionCount":
+            return "0x0"
+        if method == "eth_sendRawTransaction":
+            return Web3.to_hex(Web3.keccak(hexstr=params[0]))
+        raise ValueError(f"{method} nicht unterstützt")
+
+class MockAsyncRpc(AsyncRpcClient):
+    """
+    AsyncRpcClient ohne HTTP: Payload-Bau, Batches, Fehler-Mapping, Semaphore und Metriken
+    bleiben echt, nur der Roundtrip ist eine feste Latenz + MockNode
+    """
+    def __init__(self, node, latency=0.0, **kwargs):
+        super().__init__("mock://node", **kwargs)
+        self.node = node
+        self.latency = latency
+        self.roundtrips = 0
+
+    async def _send(self, payload):
+        self.roundtrips += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self.node.handle_payload(payload)
+
+class MockProvider(BaseProvider):
+    """
+    Blockierender web3-Provider auf dem MockNode (Sende-Pfad: chainId, Nonce, Raw-TX)
+    """
+    def __init__(self, node=None, latency=0.0):
+        super().__init__()
+        self.node = node or MockNode()
+        self.latency = latency
+        self._ids = 0
+
+    @property
+    def calls(self):
+        return self.node.calls
+
+    def make_request(self, method, params):
+        self._ids += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self.node.handle({"jsonrpc": "2.0", "id": self._ids, "method": method, "params": list(params)})
+
+class MockEndpoint:
+    """
+    HTTP-JSON-RPC-Server auf einem MockNode (Thread im Prozess, Port frei gewählt)
+    """
+    def __init__(self, node=None, latency=0.0, tail_share=0.0, tail_latency=0.0, throttle_share=0.0, seed=0):
+        """
+        :param latency: Grundlatenz pro Request in Sekunden
+        :param tail_share: Anteil der Requests mit tail_latency statt latency (Ausreißer)
+        :param throttle_share: Anteil der Requests, die mit HTTP 429 abgewiesen werden
+        """
+        self.node = node or MockNode()
+        self.latency = latency
+        self.tail_share = tail_share
+        self.tail_latency = tail_latency
+        self.throttle_share = throttle_share
+        self.down = False  # True: Verbindung wird ohne Antwort geschlossen
+        self.throttled = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    @property
+    def calls(self):
+        return self.node.calls
+
+    def _delay(self):
+        with self._lock:
+            if self._rng.random() < self.throttle_share:
+                self.throttled += 1
+                return None
+            return self.tail_latency if self._rng.random() < self.tail_share else self.latency
+
+    def start(self):
+        endpoint = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-Alive wie bei echten Providern
+            disable_nagle_algorithm = True  # sonst 40 ms Delayed-ACK zwischen Header und Body
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                if endpoint.down:
+                    self.close_connection = True
+                    return
+                delay = endpoint._delay()
+                if delay is None:
+                    self.send_error(429, "Too Many Requests")
+                    return
+                if delay:
+                    time.sleep(delay)
+                data = json.dumps(endpoint.node.handle_payload(json.loads(body))).encode()
+                try:
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # Client hat abgebrochen (z.B. verlorener Hedge)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
@@ -1,5 +1,4 @@
 import logging
-import yaml
 import os
 import json
 import asyncio
@@ -10,21 +9,29 @@ from eth_account import Account
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import Application, CommandHandler, CallbackQueryHandler, MessageHandler, filters, ContextTypes
 from telegram.constants import ParseMode
-from shared_state import user_state
-from trade_executor import execute_trade
+from shared_state import STATE
+from trade_executor import execute_trade, CONFIG_INDEX
+from rpc_router import RouterHTTPProvider, rpc_urls, router_options
+from trade_journal import JOURNAL
+from nonce_manager import NonceManager
+from gas_oracle import GasOracle, bump_fees
+from trade_queue import TradeQueue
+from metrics import serve_from_config
 
 # --- Umgebungsvariablen laden ---
 load_dotenv()
-RPC_URL = os.getenv("RPC_URL_SEPOLIA", "http://localhost:8545")
-web3 = Web3(Web3.HTTPProvider(RPC_URL))
+CONFIG = CONFIG_INDEX.index.config  # statische Abschnitte; DEXe & Paare immer aus CONFIG_INDEX.index
+web3 = Web3(RouterHTTPProvider(rpc_urls("sepolia"), **router_options(CONFIG.get("rpc", {}))))
 DEV_PRIVATE_KEY = os.getenv("DEV_PRIVATE_KEY")
 dev_account = Account.from_key(DEV_PRIVATE_KEY)
-
-with open("config.yaml", encoding="utf-8") as f:
-    CONFIG = yaml.safe_load(f)
+NONCES = NonceManager(web3)  # Dev-Wallet: sendet nur der Bot, Nonces daher lokal in diesem Prozess
+GAS = GasOracle(web3)
+TRADES = TradeQueue(execute_trade)  # eine Lane pro Wallet statt unbegrenztem Default-Pool
+TRADES.export_metrics()
 
 def build_keyboard(user_id):
-    state = user_state.get(user_id, {})
+    state = STATE.get(user_id, {})
+    index = CONFIG_INDEX.index
     selected_dexes = state.get("dexes", set())
     selected_pairs = state.get("pairs", set())
     autotrade = state.get("autotrade", False)
@@ -32,18 +39,17 @@ def build_keyboard(user_id):
 
     dex_buttons = [
         InlineKeyboardButton(
-            f"{'✅' if d['name'] in selected_dexes else '☐'} {d['name']}",
-            callback_data=f"DEX::{d['name']}"
-        ) for d in CONFIG.get("dexes", [])
+            f"{'✅' if d.name in selected_dexes else '☐'} {d.name}",
+            callback_data=f"DEX::{d.name}"
+        ) for d in index.dexes
     ]
 
     pair_buttons = [
         InlineKeyboardButton(
-            f"{'✅' if idx in selected_pairs else '☐'} " +
-            p.get("name", f"{p['token0'][:6]}/{p['token1'][:6]}"),
-            callback_data=f"PAIR::{idx}"
+            f"{'✅' if p.index in selected_pairs else '☐'} {p.name}",
+            callback_data=f"PAIR::{p.index}"
         )
-        for idx, p in enumerate(CONFIG.get("pairs", []))
+        for p in index.pairs
     ]
 
     spread_options = ["0.5", "1.0", "2.0"]
@@ -89,7 +95,7 @@ def build_keyboard(user_id):
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
     address, _ = get_or_create_wallet(user_id)
-    user_state.setdefault(user_id, {
+    STATE.setdefault(user_id, {
         "dexes": set(),
         "pairs": set(),
         "autotrade": False,
@@ -138,18 +144,20 @@ async def send_eth_to_user(user_id):
         wallet_data = json.load(f)
     recipient = Web3.to_checksum_address(wallet_data["address"])
 
-    nonce = web3.eth.get_transaction_count(dev_account.address)
-    tx = {
-        "to": recipient,
-        "value": web3.to_wei(0.01, "ether"),
-        "gas": 21000,
-        "gasPrice": web3.eth.gas_price,
-        "nonce": nonce,
-        "chainId": 11155111
-    }
-
-    signed_tx = web3.eth.account.sign_transaction(tx, private_key=DEV_PRIVATE_KEY)
-    tx_hash = web3.eth.send_raw_transaction(signed_tx.raw_transaction)
+    fees = GAS.fees()
+
+    def sign(nonce, bump):
+        tx = {
+            "to": recipient,
+            "value": web3.to_wei(0.01, "ether"),
+            "gas": 21000,
+            **bump_fees(fees, bump),
+            "nonce": nonce,
+            "chainId": 11155111
+        }
+        return web3.eth.account.sign_transaction(tx, private_key=DEV_PRIVATE_KEY).raw_transaction
+
+    tx_hash = NONCES.send(dev_account.address, sign)
     tx_hash_hex = web3.to_hex(tx_hash)
     return tx_hash_hex
 
@@ -157,7 +165,8 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
     user_id = query.from_user.id
-    state = user_state.setdefault(user_id, {"dexes": set(), "pairs": set(), "autotrade": False, "spread": "1.0"})
+    # Arbeitskopie; Änderungen werden mit STATE.put() gespeichert und an den Scanner gemeldet
+    state = STATE.setdefault(user_id, {"dexes": set(), "pairs": set(), "autotrade": False, "spread": "1.0"})
 
     parts = query.data.split("::")
     if len(parts) != 2:
@@ -194,6 +203,7 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     elif action == "SPREAD":
         if value == "CUSTOM":
             state["spread"] = "CUSTOM_PENDING"
+            STATE.put(user_id, state)
             await context.bot.edit_message_text(
                 chat_id=chat_id,
                 message_id=menu_message_id,
@@ -211,22 +221,26 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         state["autotrade"] = not state["autotrade"]
         notification_text = f"Autotrade {'aktiviert' if state['autotrade'] else 'deaktiviert'}."
 
-    elif action == "TRADE":
+    if action in ("DEX", "PAIR", "SPREAD", "AUTOTRADE"):
+        STATE.put(user_id, state)
+
+    if action == "TRADE":
         if not state["pairs"] or not state["dexes"]:
             notification_text = "❌ Bitte wähle mindestens 1 Paar und 2 DEX aus!"
         else:
             pair_idx = next(iter(state["pairs"]))
             dex_names = list(state["dexes"])
-            pair = CONFIG["pairs"][pair_idx]
-            dex_a = [d for d in CONFIG["dexes"] if d["name"] == dex_names[0]][0]["router"]
-            dex_b = [d for d in CONFIG["dexes"] if d["name"] == dex_names[1]][0]["router"]
-            token0 = pair["token0"]
-            token1 = pair["token1"]
+            index = CONFIG_INDEX.index
+            pair = index.pairs[pair_idx]
+            dex_a = index.router(dex_names[0])
+            dex_b = index.router(dex_names[1])
+            token0 = pair.token0
+            token1 = pair.token1
 
             loop = asyncio.get_event_loop()
-            loop.run_in_executor(
-                None,
-                execute_trade,
+            queued = TRADES.submit(
+                user_id,
+                (user_id, token0.lower(), token1.lower(), dex_a, dex_b),
                 user_id,
                 token0,
                 token1,
@@ -238,7 +252,7 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
                     loop
                 )
             )
-            notification_text = "🚦 Trade wird ausgeführt..."
+            notification_text = "🚦 Trade wird ausgeführt..." if queued else "⏳ Dieser Trade wartet bereits (oder die Queue ist voll)."
 
     elif action == "COPY":
         notification_text = f"📋 Adresse kopiert:\n<code>{value}</code>"
@@ -272,8 +286,9 @@ async def handle_custom_spread(update: Update, context: ContextTypes.DEFAULT_TYP
             val = float(update.message.text)
             if not (0.1 <= val <= 10.0):
                 raise ValueError("Spread außerhalb des erlaubten Bereichs.")
-            state = user_state[user_id]
+            state = STATE.setdefault(user_id)
             state["spread"] = str(val)
+            STATE.put(user_id, state)
             await context.bot.edit_message_text(
                 chat_id=chat_id,
                 message_id=menu_message_id,
@@ -282,7 +297,9 @@ async def handle_custom_spread(update: Update, context: ContextTypes.DEFAULT_TYP
                 parse_mode=ParseMode.HTML
             )
         except Exception:
-            user_state[user_id]["spread"] = "1.0"
+            state = STATE.setdefault(user_id)
+            state["spread"] = "1.0"
+            STATE.put(user_id, state)
             await context.bot.edit_message_text(
                 chat_id=chat_id,
                 message_id=menu_message_id,
@@ -308,7 +325,7 @@ async def show_status(query, state):
 
     dexes = ", ".join(state["dexes"] or ["(keine)"])
     pairs = ", ".join([
-        f"{CONFIG['pairs'][i].get('name', CONFIG['pairs'][i]['token0'][:6] + '/' + CONFIG['pairs'][i]['token1'][:6])}"
+        CONFIG_INDEX.index.pairs[i].name
         for i in state["pairs"]
     ]) or "(keine)"
     spread = state["spread"]
@@ -330,22 +347,22 @@ async def show_status(query, state):
 
 async def tradelog_handler(update, context):
     user_id = update.effective_user.id
-    log_file = os.path.join("trades", f"tradelog_{user_id}.json")
+    stats = JOURNAL.stats(user_id)
 
-    if not os.path.exists(log_file):
+    if stats is None:
         await update.message.reply_text("❌ Kein Tradelog gefunden. Starte einen Trade, um Einträge zu erzeugen!")
         return
 
-    with open(log_file, "r") as f:
-        trades = json.load(f)
+    # Ringpuffer aus den Stats, unabhängig von der Länge der Historie
+    max_trades = 10
+    trades = list(stats["recent"])[-max_trades:]
 
     if not trades:
         await update.message.reply_text("📄 Noch keine Trades vorhanden.")
         return
 
     msg = "<b>Letzte Trades:</b>\n"
-    max_trades = 10
-    for t in trades[-max_trades:]:
+    for t in trades:
         status = "✅" if t.get("status") == "SUCCESS" else "❌"
         msg += (
             f"\n{status} <b>{t['pair']}</b>\n"
@@ -365,22 +382,17 @@ async def tradelog_handler(update, context):
 
 async def profit_handler(update, context):
     user_id = update.effective_user.id
-    log_file = os.path.join("trades", f"tradelog_{user_id}.json")
+    stats = JOURNAL.stats(user_id)
 
-    if not os.path.exists(log_file):
+    if stats is None:
         await update.message.reply_text("❌ Kein Tradelog gefunden. Starte einen Trade, um Gewinne zu sehen!")
         return
 
-    with open(log_file, "r") as f:
-        trades = json.load(f)
-
-    profit_total = sum(t.get("profit", 0) for t in trades if t.get("status") == "SUCCESS" and t.get("profit") is not None)
-    dev_cut_total = sum(t.get("dev_cut", 0) for t in trades if t.get("status") == "SUCCESS" and t.get("dev_cut") is not None)
-
+    # Laufende Summen, vom Journal-Writer fortgeschrieben
     msg = (
-        f"💰 <b>Dein Gesamtprofit:</b> <code>{profit_total:.6f} ETH</code>\n"
-        f"🏦 <b>Abgeführter Dev-Cut:</b> <code>{dev_cut_total:.6f} ETH</code>\n"
-        f"(Trades: {len(trades)})"
+        f"💰 <b>Dein Gesamtprofit:</b> <code>{stats['profit_total']:.6f} ETH</code>\n"
+        f"🏦 <b>Abgeführter Dev-Cut:</b> <code>{stats['dev_cut_total']:.6f} ETH</code>\n"
+        f"(Trades: {stats['trades']})"
     )
     await update.message.reply_text(msg, parse_mode="HTML")
 
@@ -400,6 +412,8 @@ def main():
     app.add_handler(CallbackQueryHandler(button_handler))
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_custom_spread))
 
+    serve_from_config(CONFIG, "bot")
+    CONFIG_INDEX.start()  # config.yaml-Änderungen (DEXe, Paare) ohne Bot-Neustart
     print("🤖 Bot läuft...")
     app.run_polling()
 
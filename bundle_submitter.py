@@ -0,0 +1,110 @@
+"""
+BundleSubmitter: signierte Trade-Transaktionen als atomares Bundle an einen Flashbots-Relay
+
+- approve / swap / dev-cut gehen als ein Bundle raus: entweder landen alle oder keine
+- Payload-Signatur per X-Flashbots-Signature (EIP-191 über keccak des Bodys, eigener Auth-Key)
+- eth_callBundle vor jedem Versuch, danach eth_sendBundle auf den nächsten Block;
+  nicht inkludiert -> neu auf den folgenden Block, bis max_blocks erreicht sind
+"""
+
+import json
+import logging
+import time
+import requests
+from eth_account import Account
+from eth_account.messages import encode_defunct
+from web3 import Web3
+from rpc_client import RpcError
+from metrics import METRICS
+
+DEFAULT_RELAY_URL = "https://relay-sepolia.flashbots.net"
+DEFAULT_MAX_BLOCKS = 5
+DEFAULT_TIMEOUT = 10
+
+BUNDLE_INCLUSION = METRICS.histogram("bundle_inclusion_seconds", "Erster eth_sendBundle -> Bundle inkludiert")
+BUNDLES_TOTAL = METRICS.counter("bundles_total", "Eingereichte Bundles nach Ergebnis", ("outcome",))
+
+class BundleSubmitter:
+    def __init__(self, relay_url, web3, auth_account=None, max_blocks=DEFAULT_MAX_BLOCKS, poll_interval=1.0, timeout=DEFAULT_TIMEOUT):
+        """
+        :param relay_url: Relay-Endpoint (eth_callBundle / eth_sendBundle)
+        :param web3: Web3 für Blocknummer und Receipts
+        :param auth_account: LocalAccount für die Relay-Signatur (Reputation, braucht kein Guthaben)
+        :param max_blocks: Zielblöcke, bevor das Bundle aufgegeben wird
+        """
+        self.relay_url = relay_url
+        self.web3 = web3
+        self.auth_account = auth_account or Account.create()
+        self.max_blocks = max_blocks
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.session = requests.Session()
+        self._id = 0
+
+    # --- Signierter JSON-RPC-Call an den Relay ---
+    def _signature(self, body):
+        message = encode_defunct(text=Web3.to_hex(Web3.keccak(text=body)))
+        signature = self.auth_account.sign_message(message).signature
+        return f"{self.auth_account.address}:{Web3.to_hex(signature)}"
+
+    def _request(self, method, params):
+        self._id += 1
+        body = json.dumps({"jsonrpc": "2.0", "id": self._id, "method": method, "params": params})
+        resp = self.session.post(
+            self.relay_url,
+            data=body,
+            headers={"Content-Type": "application/json", "X-Flashbots-Signature": self._signature(body)},
+            timeout=self.timeout,
+        )
+        resp.raise_for_status()
+        reply = resp.json()
+        if reply.get("error"):
+            raise RpcError(method, reply["error"])
+        return reply.get("result")
+
+    @staticmethod
+    def _bundle(raw_txs, block):
+        return {"txs": [Web3.to_hex(raw) for raw in raw_txs], "blockNumber": hex(block)}
+
+    def call_bundle(self, raw_txs, block):
+        """
+        Simuliert das Bundle auf dem State des aktuellen Blocks
+        :returns: Relay-Ergebnis; wirft RpcError, wenn eine TX revertiert
+        """
+        result = self._request("eth_callBundle", [{**self._bundle(raw_txs, block), "stateBlockNumber": "latest"}])
+        for tx in result.get("results", []):
+            if tx.get("error") or tx.get("revert"):
+                raise RpcError("eth_callBundle", {"message": f"{tx.get('txHash')}: {tx.get('revert') or tx.get('error')}"})
+        return result
+
+    def send_bundle(self, raw_txs, block):
+        return self._request("eth_sendBundle", [self._bundle(raw_txs, block)])
+
+    def _receipt(self, tx_hash):
+        try:
+            return self.web3.eth.get_transaction_receipt(tx_hash)
+        except Exception:
+            return None
+
+    def submit(self, raw_txs):
+        """
+        Simuliert, sendet und retargetet das Bundle, bis es landet oder max_blocks erreicht ist
+        :returns: Receipts aller Transaktionen (gleiche Reihenfolge) oder None
+        """
+        tx_hashes = [Web3.keccak(raw) for raw in raw_txs]
+        target = self.web3.eth.block_number + 1
+        start = time.perf_counter()
+        for _ in range(self.max_blocks):
+            self.call_bundle(raw_txs, target)
+            self.send_bundle(raw_txs, target)
+            while self.web3.eth.block_number < target:
+                time.sleep(self.poll_interval)
+            # Atomar: ist die erste TX drin, sind es alle
+            if self._receipt(tx_hashes[0]) is not None:
+                BUNDLE_INCLUSION.observe(time.perf_counter() - start)
+                BUNDLES_TOTAL.labels("included").inc()
+                return [self._receipt(h) for h in tx_hashes]
+            logging.info(f"Bundle nicht in Block {target}, neuer Versuch")
+            target = self.web3.eth.block_number + 1
+        BUNDLES_TOTAL.labels("dropped").inc()
+        return None
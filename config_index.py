@@ -0,0 +1,225 @@
+"""
+ConfigIndex: config.yaml einmal kompiliert – DEX-/Paar-Records mit O(1)-Lookup, plus Hot-Reload
+
+- DexRecord / PairRecord: unveränderlich, __slots__, Adressen bereits checksummed (kein
+  Web3.to_checksum_address mehr pro Tick), Lookup per Name, Router-Adresse oder Index
+- PairRecord hält die getAmountsOut-Calldata ohne Betrag vor (Selektor + Pfad einmal kodiert)
+- mit web3 werden ERC20-Contract-Objekte der konfigurierten Tokens einmalig gebaut
+- LiveConfig prüft die mtime von config.yaml und tauscht den Index atomar aus (kein Neustart);
+  eine fehlerhafte Datei behält den alten Index
+
+    CONFIG_INDEX = LiveConfig("config.yaml")
+    router = CONFIG_INDEX.index.router("UniswapV2")
+    CONFIG_INDEX.subscribe(apply_config)  # Callback(index) nach jedem Reload
+    CONFIG_INDEX.poll()                   # z.B. einmal pro Tick; oder start() als Hintergrund-Thread
+"""
+
+import logging
+import os
+import threading
+import time
+from functools import lru_cache
+import yaml
+from web3 import Web3
+from scanner.quote_engine import GET_AMOUNTS_OUT_SELECTOR, WORD, encode_get_amounts_out
+
+DEFAULT_PATH = "config.yaml"
+DEFAULT_RELOAD_INTERVAL = 2.0  # Sekunden zwischen mtime-Checks im Hintergrund-Thread
+
+@lru_cache(maxsize=4096)
+def checksum(address):
+    # Adressen außerhalb der Config (z.B. aus Events) einmal pro Prozess umrechnen
+    return Web3.to_checksum_address(address)
+
+# --- Unveränderliche Records ---
+class _Record:
+    __slots__ = ()
+
+    def __init__(self, **fields):
+        for name, value in fields.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} ist unveränderlich")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} ist unveränderlich")
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.index}, {self.name!r})"
+
+class DexRecord(_Record):
+    __slots__ = ("index", "name", "router", "factory", "raw")
+
+class PairRecord(_Record):
+    __slots__ = ("index", "name", "token0", "token1", "raw", "_forward", "_reverse")
+
+    def amounts_out_data(self, amount_in, reverse=False):
+        """
+        getAmountsOut(amount_in, [token0, token1]) bzw. umgekehrter Pfad – nur der Betrag wird kodiert
+        """
+        return GET_AMOUNTS_OUT_SELECTOR + amount_in.to_bytes(WORD, "big") + (self._reverse if reverse else self._forward)
+
+def _path_tail(path):
+    # getAmountsOut-Calldata ohne Selektor und Betrag: Offset, Länge und Adressen hängen nur am Pfad
+    return encode_get_amounts_out(0, path)[len(GET_AMOUNTS_OUT_SELECTOR) + WORD:]
+
+# --- Kompilierte Config ---
+class ConfigIndex:
+    def __init__(self, config, web3=None, erc20_abi=None):
+        """
+        :param config: geladene config.yaml (dict); bleibt unter .config für alle übrigen Abschnitte
+        :param web3: optional – dann werden ERC20-Contracts (erc20_abi) der Paar-Tokens vorgebaut
+        """
+        self.config = config
+        self.dexes = tuple(
+            DexRecord(
+                index=i, name=d["name"], raw=d,
+                router=Web3.to_checksum_address(d["router"]) if d.get("router") else None,
+                factory=Web3.to_checksum_address(d["factory"]) if d.get("factory") else None,
+            )
+            for i, d in enumerate(config.get("dexes", []))
+        )
+        self.pairs = tuple(self._pair(i, p) for i, p in enumerate(config.get("pairs", [])))
+
+        self.dex_names = tuple(d.name for d in self.dexes)
+        self.dex_by_name = {d.name: d for d in self.dexes}
+        self.dex_by_router = {d.router.lower(): d for d in self.dexes if d.router}
+        self.dex_by_factory = {d.factory.lower(): d for d in self.dexes if d.factory}
+        self.pair_by_tokens = {}  # (token_in, token_out) lower -> (PairRecord, reverse)
+        for pair in self.pairs:
+            self.pair_by_tokens.setdefault((pair.token0.lower(), pair.token1.lower()), (pair, False))
+            self.pair_by_tokens.setdefault((pair.token1.lower(), pair.token0.lower()), (pair, True))
+        self.tokens = tuple(sorted({t for pair in self.pairs for t in (pair.token0, pair.token1)}))
+        self.routers = tuple(sorted({d.router for d in self.dexes if d.router}))
+
+        self.web3 = web3
+        self.erc20_abi = erc20_abi
+        self._contracts = {
+            token: web3.eth.contract(address=token, abi=erc20_abi) for token in self.tokens
+        } if web3 is not None and erc20_abi is not None else {}
+
+    @staticmethod
+    def _pair(i, p):
+        token0 = Web3.to_checksum_address(p["token0"])
+        token1 = Web3.to_checksum_address(p["token1"])
+        return PairRecord(
+            index=i, token0=token0, token1=token1, raw=p,
+            name=p.get("name", f"{token0[:6]}/{token1[:6]}"),
+            _forward=_path_tail([token0, token1]),
+            _reverse=_path_tail([token1, token0]),
+        )
+
+    @classmethod
+    def load(cls, path=DEFAULT_PATH, **kwargs):
+        with open(path, encoding="utf-8") as f:
+            return cls(yaml.safe_load(f) or {}, **kwargs)
+
+    # --- Lookups ---
+    def dex(self, name):
+        return self.dex_by_name.get(name)
+
+    def router(self, name):
+        dex = self.dex_by_name.get(name)
+        return dex.router if dex else None
+
+    def pair(self, pair_id):
+        """
+        :returns: PairRecord oder None, wenn der Index (z.B. aus einem alten User-State) nicht existiert
+        """
+        return self.pairs[pair_id] if 0 <= pair_id < len(self.pairs) else None
+
+    def amounts_out_data(self, amount_in, token_in, token_out):
+        # Konfigurierte Paare aus dem Vorrat, alles andere klassisch kodiert
+        hit = self.pair_by_tokens.get((token_in.lower(), token_out.lower()))
+        if hit is None:
+            return encode_get_amounts_out(amount_in, [token_in, token_out])
+        pair, reverse = hit
+        return pair.amounts_out_data(amount_in, reverse)
+
+    def erc20(self, token):
+        """
+        :returns: ERC20-Contract (vorgebaut für Config-Tokens, sonst einmal gebaut und gemerkt)
+        """
+        token = checksum(token)
+        contract = self._contracts.get(token)
+        if contract is None:
+            if self.web3 is None:
+                raise RuntimeError("ConfigIndex ohne web3: keine Contract-Objekte")
+            contract = self._contracts.setdefault(token, self.web3.eth.contract(address=token, abi=self.erc20_abi))
+        return contract
+
+# --- Hot-Reload: mtime-Check, atomarer Austausch ---
+class LiveConfig:
+    def __init__(self, path=DEFAULT_PATH, **kwargs):
+        """
+        :param kwargs: werden an ConfigIndex durchgereicht (web3, erc20_abi)
+        """
+        self.path = path
+        self.kwargs = kwargs
+        self.mtime = os.stat(path).st_mtime_ns
+        self.index = ConfigIndex.load(path, **kwargs)
+        self.reloads = 0
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def bind(self, **kwargs):
+        """
+        ConfigIndex-Optionen nachreichen (z.B. web3, sobald der Provider aus der Config gebaut ist)
+        """
+        with self._lock:
+            self.kwargs.update(kwargs)
+            self.index = ConfigIndex(self.index.config, **self.kwargs)
+
+    def subscribe(self, callback):
+        """
+        :param callback: (ConfigIndex) -> None, nach jedem erfolgreichen Reload
+        """
+        self._subscribers.append(callback)
+
+    def poll(self):
+        """
+        :returns: True, wenn config.yaml neu geladen wurde
+        """
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError as e:
+            logging.warning(f"Config {self.path} nicht lesbar: {e}")
+            return False
+        if mtime == self.mtime:
+            return False
+
+        with self._lock:
+            if mtime == self.mtime:
+                return False
+            self.mtime = mtime
+            try:
+                index = ConfigIndex.load(self.path, **self.kwargs)
+            except Exception as e:
+                logging.warning(f"Config {self.path} fehlerhaft, behalte alte Version: {e}")
+                return False
+            self.index = index  # ein Attribut-Tausch: Leser sehen alt oder neu, nie halb
+            self.reloads += 1
+
+        logging.info(f"Config neu geladen: {len(index.dexes)} DEXe, {len(index.pairs)} Paare")
+        for callback in self._subscribers:
+            callback(index)
+        return True
+
+    def start(self, interval=DEFAULT_RELOAD_INTERVAL):
+        # Für Prozesse ohne eigenen Tick (Bot): mtime im Hintergrund prüfen
+        if self._thread is not None:
+            return self._thread
+
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.poll()
+                except Exception as e:
+                    logging.warning(f"Config-Reload fehlgeschlagen: {e}")
+
+        self._thread = threading.Thread(target=run, name="config-reload", daemon=True)
+        self._thread.start()
+        return self._thread
@@ -0,0 +1,167 @@
+"""
+GasOracle: EIP-1559-Gebühren aus eth_feeHistory, einmal pro Block statt pro Transaktion
+
+- Base-Fee des nächsten Blocks + Priority-Fee-Perzentile (Median über die letzten Blöcke)
+- fees() liefert maxFeePerGas / maxPriorityFeePerGas aus dem Cache (Fallback: gasPrice,
+  falls der Node kein feeHistory kann)
+- gas_limit() cached estimate_gas-Ergebnisse pro (Contract, Methode)
+- Sync (Executor/Bot, Tracker-Thread pro Block) und async (Scanner, AsyncRpcClient)
+"""
+
+import logging
+import threading
+import time
+from statistics import median
+from metrics import cache_lookup
+
+DEFAULT_PERCENTILES = (10, 50, 90)
+URGENCY = {"low": 0, "normal": 1, "high": 2}  # Index in DEFAULT_PERCENTILES
+DEFAULT_BLOCK_COUNT = 10
+DEFAULT_MAX_AGE = 12.0  # Sekunden, ca. ein Block
+GAS_LIMIT_MARGIN = 1.2
+REPLACEMENT_BUMP = 1.125  # Nodes verlangen für eine Ersatz-TX mindestens +10% auf beide Fees
+FEE_FIELDS = ("maxFeePerGas", "maxPriorityFeePerGas", "gasPrice")
+
+def _to_int(value):
+    return value if isinstance(value, int) else int(value, 16)
+
+def bump_fees(tx, times=1):
+    """
+    :param tx: TX-Dict oder Fee-Dict aus GasOracle.fees()
+    :param times: Anzahl Erhöhungen um REPLACEMENT_BUMP (0 = unverändert)
+    :returns: Kopie mit erhöhten Fee-Feldern
+    """
+    if not times:
+        return tx
+    factor = REPLACEMENT_BUMP ** times
+    return {k: int(v * factor) + 1 if k in FEE_FIELDS and v is not None else v for k, v in tx.items()}
+
+class GasOracle:
+    def __init__(self, web3=None, block_count=DEFAULT_BLOCK_COUNT, percentiles=DEFAULT_PERCENTILES,
+                 base_fee_multiplier=2, max_age=DEFAULT_MAX_AGE, poll_interval=1.0):
+        """
+        :param web3: Web3-Instanz für den Sync-Pfad (None im Scanner, dort update_async)
+        :param block_count: Blöcke pro eth_feeHistory
+        :param base_fee_multiplier: Puffer auf die Base-Fee für maxFeePerGas (übersteht mehrere volle Blöcke)
+        :param max_age: Sekunden, nach denen fees() ohne Tracker-Thread neu lädt
+        """
+        self.web3 = web3
+        self.block_count = block_count
+        self.percentiles = list(percentiles)
+        self.base_fee_multiplier = base_fee_multiplier
+        self.max_age = max_age
+        self.poll_interval = poll_interval
+        self.base_fee = None     # Base-Fee des nächsten Blocks (wei)
+        self.priority = None     # Priority-Fee pro Perzentil (wei)
+        self.legacy_price = None # eth_gasPrice, falls kein EIP-1559
+        self.block = None
+        self.updated_at = 0.0
+        self.gas_limits = {}     # (contract, methode) -> gas
+        self._lock = threading.Lock()
+        self._thread = None
+
+    # --- feeHistory auswerten ---
+    def apply_fee_history(self, history, block=None):
+        base_fees = [_to_int(b) for b in history["baseFeePerGas"]]
+        rewards = [[_to_int(r) for r in row] for row in history.get("reward") or []]
+        if not base_fees or not base_fees[-1]:
+            raise ValueError("Keine Base-Fee (Chain ohne EIP-1559?)")
+        with self._lock:
+            # Letzter Eintrag = Base-Fee des kommenden Blocks
+            self.base_fee = base_fees[-1]
+            self.priority = [int(median(col)) for col in zip(*rewards)] if rewards else [0] * len(self.percentiles)
+            self.legacy_price = None
+            self.block = block if block is not None else _to_int(history["oldestBlock"]) + len(base_fees) - 2
+            self.updated_at = time.monotonic()
+
+    def _apply_legacy(self, gas_price, block=None):
+        with self._lock:
+            self.base_fee = self.priority = None
+            self.legacy_price = _to_int(gas_price)
+            self.block = block
+            self.updated_at = time.monotonic()
+
+    def update(self, block=None):
+        try:
+            self.apply_fee_history(self.web3.eth.fee_history(self.block_count, "latest", self.percentiles), block)
+        except Exception as e:
+            logging.debug(f"feeHistory nicht verfügbar ({e}), nutze eth_gasPrice")
+            self._apply_legacy(self.web3.eth.gas_price, block)
+
+    async def update_async(self, rpc, block=None):
+        """
+        :param rpc: AsyncRpcClient
+        :param block: aktueller Block; ist er schon geladen, passiert nichts (ein Call pro Block)
+        """
+        cache_lookup("fee_history", block is not None and block == self.block)
+        if block is not None and block == self.block:
+            return
+        try:
+            history = await rpc.request("eth_feeHistory", [hex(self.block_count), "latest", self.percentiles])
+            self.apply_fee_history(history, block)
+        except Exception as e:
+            logging.debug(f"feeHistory nicht verfügbar ({e}), nutze eth_gasPrice")
+            self._apply_legacy(await rpc.request("eth_gasPrice"), block)
+
+    # --- Tracker-Thread: ein feeHistory pro neuem Block ---
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="gas-oracle", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                block = self.web3.eth.block_number
+                if block != self.block:
+                    self.update(block)
+            except Exception as e:
+                logging.warning(f"Gas-Oracle-Update fehlgeschlagen: {e}")
+            time.sleep(self.poll_interval)
+
+    def _ensure_fresh(self):
+        if self.web3 is None:
+            return
+        self.start()
+        if time.monotonic() - self.updated_at > self.max_age:
+            self.update()
+
+    # --- Abfragen (aus dem Cache) ---
+    def fees(self, urgency="normal"):
+        """
+        :returns: Fee-Felder für ein TX-Dict – maxFeePerGas/maxPriorityFeePerGas oder gasPrice
+        """
+        self._ensure_fresh()
+        if self.base_fee is None:
+            return {"gasPrice": self.legacy_price}
+        tip = self.priority[URGENCY[urgency]]
+        return {
+            "maxFeePerGas": self.base_fee * self.base_fee_multiplier + tip,
+            "maxPriorityFeePerGas": tip,
+        }
+
+    def gas_price(self, urgency="normal"):
+        """
+        Erwarteter effektiver Preis pro Gas (wei) für Profitabilitäts-Checks, ohne RPC-Call
+        """
+        if self.base_fee is None:
+            return self.legacy_price
+        return self.base_fee + self.priority[URGENCY[urgency]]
+
+    def gas_limit(self, key, estimate_fn, default):
+        """
+        :param key: z.B. (router, "swap")
+        :param estimate_fn: () -> gas, z.B. contract.functions.x().estimate_gas
+        :param default: Limit, falls die Schätzung fehlschlägt (auch gecached, kein Retry pro TX)
+        """
+        cache_lookup("gas_limit", key in self.gas_limits)
+        if key in self.gas_limits:
+            return self.gas_limits[key]
+        try:
+            limit = int(estimate_fn() * GAS_LIMIT_MARGIN)
+        except Exception as e:
+            logging.debug(f"estimate_gas für {key} fehlgeschlagen, nutze {default}: {e}")
+            limit = default
+        self.gas_limits[key] = limit
+        return limit
@@ -0,0 +1,328 @@
+"""
+Metrics: Counter, Gauges und Histogramme im Prometheus-Textformat, plus /metrics-Endpoint
+
+- keine Abhängigkeit: Registry, Serialisierung und HTTP-Server aus der Standardbibliothek
+- billig genug für den Hot-Path: observe() = bisect + drei Additionen unter einem Lock
+- Spans (span() / traced()) messen die Dauer eines Blocks bzw. einer Funktion in
+  span_seconds{span="..."}, sync wie async
+
+    RPC_CALLS = METRICS.counter("rpc_calls_total", "JSON-RPC-Calls", ("endpoint", "method"))
+    RPC_CALLS.labels("node", "eth_call").inc()
+
+    @traced("get_price")
+    async def get_price(...): ...
+
+    start_server("127.0.0.1", 9108)  # curl localhost:9108/metrics
+"""
+
+import functools
+import inspect
+import logging
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+# Sekunden: von Einzel-Quotes (ms) bis Inklusion (mehrere Blöcke)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 9108
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def endpoint_label(url):
+    # Nur Host (und Port): Pfade von RPC-URLs enthalten oft API-Keys
+    parsed = urlparse(url)
+    if not parsed.hostname:
+        return url
+    return f"{parsed.hostname}:{parsed.port}" if parsed.port else parsed.hostname
+
+# --- Metrik-Familien: ein Kind pro Label-Kombination ---
+class _Family:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._children[()] = self._child()
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            # Schneller Pfad nur für String-Labels; alles andere wird normalisiert
+            values = tuple(str(v) for v in values)
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name}: erwartet Labels {self.labelnames}, bekommen {values}")
+            with self._lock:
+                child = self._children.setdefault(values, self._child())
+        return child
+
+    def _items(self):
+        return list(self._children.items())
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in self._items():
+            lines.extend(self._render_child(values, child))
+        return lines
+
+class _Value:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value):
+        self.value = value
+
+class Counter(_Family):
+    kind = "counter"
+
+    def _child(self):
+        return _Value()
+
+    def inc(self, amount=1):
+        self._children[()].inc(amount)
+
+    def _render_child(self, values, child):
+        return [f"{self.name}{_labels(self.labelnames, values)} {_number(child.value)}"]
+
+class Gauge(Counter):
+    """
+    Gauge mit set()/inc()/dec() oder mit Callback, der beim Scrape ausgewertet wird:
+    fn() -> Zahl (ohne Labels) oder {Label-Tupel: Zahl}
+    """
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=(), fn=None):
+        super().__init__(name, documentation, labelnames)
+        self.fn = fn
+
+    def set(self, value):
+        self._children[()].set(value)
+
+    def _items(self):
+        if self.fn is None:
+            yield from super()._items()
+            return
+        try:
+            values = self.fn()
+        except Exception as e:
+            logging.debug(f"Gauge {self.name} nicht lesbar: {e}")
+            return
+        if not isinstance(values, dict):
+            values = {(): values}
+        for labels, value in values.items():
+            child = _Value()
+            child.value = value
+            yield tuple(str(v) for v in labels), child
+
+class _Buckets:
+    __slots__ = ("bounds", "counts", "sum", "count", "_lock")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # letzter Eintrag = +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    def time(self):
+        return _Timer(self.observe)
+
+class Histogram(_Family):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _child(self):
+        return _Buckets(self.buckets)
+
+    def observe(self, value):
+        self._children[()].observe(value)
+
+    def time(self):
+        return self._children[()].time()
+
+    def _render_child(self, values, child):
+        with child._lock:
+            counts, total, count = list(child.counts), child.sum, child.count
+        lines, cumulative = [], 0
+        for bound, n in zip((*self.buckets, float("inf")), counts):
+            cumulative += n
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, values, [('le', _number(bound))])} {cumulative}")
+        lines.append(f"{self.name}_sum{_labels(self.labelnames, values)} {_number(total)}")
+        lines.append(f"{self.name}_count{_labels(self.labelnames, values)} {count}")
+        return lines
+
+class _Timer:
+    __slots__ = ("observe", "start")
+
+    def __init__(self, observe):
+        self.observe = observe
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.observe(time.perf_counter() - self.start)
+        return False
+
+# --- Registry: Metriken einmal pro Name (erneutes Anlegen liefert dieselbe Instanz) ---
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = cls(name, *args, **kwargs)
+            elif type(metric) is not cls:
+                raise ValueError(f"Metrik {name} existiert bereits als {metric.kind}")
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=(), fn=None):
+        gauge = self._register(Gauge, name, documentation, labelnames)
+        if fn is not None:
+            gauge.fn = fn
+        return gauge
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self):
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+METRICS = Registry()
+
+# --- Cache-Trefferquoten: ein Counter für alle Caches ---
+CACHE_LOOKUPS = METRICS.counter("cache_lookups_total", "Cache-Lookups nach Ergebnis", ("cache", "result"))
+
+def cache_lookup(cache, hit):
+    CACHE_LOOKUPS.labels(cache, "hit" if hit else "miss").inc()
+
+# --- Spans: Dauer eines Blocks / einer Funktion ---
+SPAN_SECONDS = METRICS.histogram("span_seconds", "Dauer instrumentierter Hot-Path-Abschnitte", ("span",))
+
+def span(name):
+    """
+    with span("fetch_quotes"): ...
+    """
+    return SPAN_SECONDS.labels(name).time()
+
+def traced(name=None):
+    """
+    Decorator: misst jeden Aufruf in span_seconds{span=name} (sync und async)
+    """
+    def decorate(fn):
+        observe = SPAN_SECONDS.labels(name or fn.__name__).observe
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    observe(time.perf_counter() - start)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                observe(time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+# --- /metrics-Endpoint (Daemon-Thread, einmal pro Prozess) ---
+_server = None
+
+def start_server(host=DEFAULT_HOST, port=DEFAULT_PORT, registry=METRICS):
+    """
+    :returns: laufender ThreadingHTTPServer (port=0 -> freier Port, siehe server_address)
+    """
+    global _server
+    if _server is not None:
+        return _server
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            data = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    _server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+    logging.info(f"Metrics unter http://{host}:{_server.server_address[1]}/metrics")
+    return _server
+
+def serve_from_config(config, role):
+    """
+    :param config: komplette config.yaml; Abschnitt metrics (enabled, host, ports.<role>)
+    :param role: Prozess, z.B. "scanner" oder "bot" – jeder Prozess hat seinen eigenen Port
+    """
+    cfg = config.get("metrics", {})
+    if not cfg.get("enabled", False):
+        return None
+    port = cfg.get("ports", {}).get(role, DEFAULT_PORT)
+    try:
+        return start_server(cfg.get("host", DEFAULT_HOST), port)
+    except OSError as e:
+        logging.warning(f"Metrics-Endpoint auf Port {port} nicht gestartet: {e}")
+        return None
@@ -0,0 +1,135 @@
+"""
+MockRelay: lokaler Flashbots-Relay + Mini-Chain für Offline-Tests des BundleSubmitters
+
+Ein HTTP-Server im Prozess, der sowohl die Relay-Methoden (eth_callBundle, eth_sendBundle)
+als auch die Chain-Methoden des Submitters (eth_blockNumber, eth_getTransactionReceipt,
+eth_chainId) beantwortet. Die X-Flashbots-Signatur wird geprüft. Blöcke entstehen per
+mine() oder automatisch alle block_time Sekunden; ein Bundle für Block N landet, wenn
+es in N gemined wird und miss_blocks aufgebraucht sind.
+
+    relay = MockRelay(miss_blocks=1, block_time=0.2).start()
+    submitter = BundleSubmitter(relay.url, Web3(Web3.HTTPProvider(relay.url)))
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from eth_account import Account
+from eth_account.messages import encode_defunct
+from web3 import Web3
+
+class MockRelay:
+    def __init__(self, miss_blocks=0, revert=False, block_time=None, chain_id=11155111):
+        """
+        :param miss_blocks: so viele Zielblöcke wird ein Bundle verpasst, bevor es landet
+        :param revert: eth_callBundle meldet einen Revert für die letzte TX
+        :param block_time: Sekunden pro automatisch geminetem Block (None = nur mine())
+        """
+        self.miss_blocks = miss_blocks
+        self.revert = revert
+        self.block_time = block_time
+        self.chain_id = chain_id
+        self.block = 100
+        self.bundles = {}    # Zielblock -> [Liste von Raw-TXs]
+        self.receipts = {}   # tx_hash -> Receipt (JSON-RPC-Format)
+        self.requests = []   # (method, signer) aller Relay-Calls
+        self._lock = threading.Lock()
+        self._server = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self):
+        relay = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"])).decode()
+                request = json.loads(body)
+                try:
+                    result = relay.handle(request["method"], request.get("params", []), body, self.headers.get("X-Flashbots-Signature"))
+                    reply = {"jsonrpc": "2.0", "id": request.get("id"), "result": result}
+                except Exception as e:
+                    reply = {"jsonrpc": "2.0", "id": request.get("id"), "error": {"code": -32000, "message": str(e)}}
+                data = json.dumps(reply).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        if self.block_time:
+            threading.Thread(target=self._auto_mine, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+
+    def _auto_mine(self):
+        while self._server is not None:
+            time.sleep(self.block_time)
+            self.mine()
+
+    # --- Block minen: Bundles für diesen Block landen (oder werden verpasst) ---
+    def mine(self):
+        with self._lock:
+            self.block += 1
+            for raw_txs in self.bundles.pop(self.block, []):
+                if self.miss_blocks > 0:
+                    self.miss_blocks -= 1
+                    continue
+                for i, raw in enumerate(raw_txs):
+                    tx_hash = Web3.to_hex(Web3.keccak(hexstr=raw))
+                    self.receipts[tx_hash] = self._receipt(tx_hash, i)
+            return self.block
+
+    def _receipt(self, tx_hash, index):
+        zero = "0x" + "00" * 32
+        return {
+            "transactionHash": tx_hash, "transactionIndex": hex(index),
+            "blockHash": Web3.to_hex(Web3.keccak(text=str(self.block))), "blockNumber": hex(self.block),
+            "from": "0x" + "00" * 20, "to": "0x" + "00" * 20, "contractAddress": None,
+            "gasUsed": hex(21_000), "cumulativeGasUsed": hex(21_000 * (index + 1)), "effectiveGasPrice": hex(10**9),
+            "logs": [], "logsBloom": "0x" + "00" * 256, "status": "0x1", "type": "0x2", "root": zero,
+        }
+
+    def _verify(self, body, signature):
+        if not signature or ":" not in signature:
+            raise ValueError("X-Flashbots-Signature fehlt")
+        address, sig = signature.split(":", 1)
+        message = encode_defunct(text=Web3.to_hex(Web3.keccak(text=body)))
+        if Account.recover_message(message, signature=sig).lower() != address.lower():
+            raise ValueError("X-Flashbots-Signature ungültig")
+        return address
+
+    # --- JSON-RPC ---
+    def handle(self, method, params, body, signature):
+        if method == "eth_blockNumber":
+            return hex(self.block)
+        if method == "eth_chainId":
+            return hex(self.chain_id)
+        if method == "eth_getTransactionReceipt":
+            return self.receipts.get(params[0])
+        if method in ("eth_callBundle", "eth_sendBundle"):
+            signer = self._verify(body, signature)
+            self.requests.append((method, signer))
+            bundle = params[0]
+            hashes = [Web3.to_hex(Web3.keccak(hexstr=raw)) for raw in bundle["txs"]]
+            if method == "eth_callBundle":
+                results = [{"txHash": h, "gasUsed": 21_000} for h in hashes]
+                if self.revert:
+                    results[-1]["revert"] = "execution reverted"
+                return {"results": results, "stateBlockNumber": self.block}
+            with self._lock:
+                self.bundles.setdefault(int(bundle["blockNumber"], 16), []).append(bundle["txs"])
+            return {"bundleHash": Web3.to_hex(Web3.keccak(text="".join(hashes)))}
+        raise ValueError(f"{method} nicht unterstützt")
@@ -0,0 +1,250 @@
+"""
+NonceManager: lokale Nonce-Vergabe pro Adresse, damit Transaktionen direkt hintereinander
+gesendet werden können (approve -> swap -> dev-cut), ohne auf Receipts zu warten
+
+- Vergabe ist pro Adresse serialisiert (Lock), auch über mehrere Executor-Threads
+- Prozesse: Bot (manuelle Trades) und Scanner (Autotrades) senden für dieselben User-Wallets.
+  Mit path liegen die Zähler in einer gemeinsamen SQLite-Datei (WAL, wie StateStore) und jede
+  Vergabe ist eine IMMEDIATE-Transaktion -> kein Prozess startet von einem veralteten Zähler.
+  Ohne path gilt: genau ein Prozess besitzt die Adresse (z.B. das Dev-Wallet im Bot).
+- reserve(): Nonces eines Bundles bleiben reserviert, bis es landet oder aufgegeben wird;
+  andere Threads dieses Prozesses bekommen solange keine Nonce für die Adresse
+- Startwert und Resync per eth_getTransactionCount(address, "pending")
+- Antworten des Nodes beim Senden:
+  "already known" -> genau diese TX liegt schon im Mempool (web3-Retry, Broadcast): gesendet
+  "nonce too low" & Co. -> Resync, neue Nonce, neu signieren
+  "replacement transaction underpriced" -> gleiche Nonce mit erhöhter Fee (gas_oracle.bump_fees)
+
+ConfirmationWatcher: ein Hintergrund-Thread pollt die Receipts gesendeter Transaktionen
+und ruft pro Transaktion einen Callback auf (statt wait_for_transaction_receipt im Trade);
+Zeit vom Senden bis zum Receipt landet in tx_inclusion_seconds
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from web3 import Web3
+from web3.exceptions import TransactionNotFound
+from metrics import METRICS
+
+# Fehlertexte der Nodes, nach denen der lokale Zähler nicht mehr stimmt
+NONCE_ERRORS = ("nonce too low", "nonce too high", "invalid nonce")
+# Auf der Nonce liegt schon eine andere TX mit mindestens gleicher Fee
+UNDERPRICED_ERRORS = ("replacement transaction underpriced",)
+# Der Node kennt genau diese signierte TX bereits (alte Geth-Versionen: "known transaction")
+ALREADY_KNOWN_ERRORS = ("already known", "known transaction")
+
+def _matches(error, messages):
+    msg = str(error).lower()
+    return any(m in msg for m in messages)
+
+def is_nonce_error(error):
+    return _matches(error, NONCE_ERRORS)
+
+def is_underpriced(error):
+    return _matches(error, UNDERPRICED_ERRORS)
+
+def is_already_known(error):
+    return _matches(error, ALREADY_KNOWN_ERRORS)
+
+DEFAULT_PATH = os.path.join("data", "nonces.sqlite")
+
+TX_INCLUSION = METRICS.histogram("tx_inclusion_seconds", "Gesendet -> Receipt gesehen (Auflösung: poll_interval)")
+TX_TIMEOUTS = METRICS.counter("tx_timeouts_total", "Transaktionen ohne Receipt nach timeout")
+
+class NonceManager:
+    def __init__(self, web3, retries=2, path=None):
+        """
+        :param web3: Web3-Instanz für getTransactionCount und sendRawTransaction
+        :param retries: erneute Versuche nach einem Nonce-Fehler bzw. Fee-Erhöhungen
+        :param path: SQLite-Datei für prozessübergreifende Zähler (None = nur in diesem Prozess)
+        """
+        self.web3 = web3
+        self.retries = retries
+        self._next = {}  # address -> nächste freie Nonce (None = neu vom Node holen)
+        self._locks = {}
+        self._reservations = {}  # address -> NonceReservation (offenes Bundle)
+        self._guard = threading.Lock()
+        self.db = None
+        if path is not None:
+            if path != ":memory:" and os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA busy_timeout=5000")
+            self.db.execute("CREATE TABLE IF NOT EXISTS nonces (address TEXT PRIMARY KEY, next INTEGER) WITHOUT ROWID")
+            self._db_lock = threading.Lock()  # eine Connection für alle Threads
+
+    def _lock(self, address):
+        with self._guard:
+            return self._locks.setdefault(address, threading.RLock())  # reentrant für reserve()
+
+    def _update(self, address, fn):
+        """
+        :param fn: nächste Nonce (oder None) -> (neue nächste Nonce, Ergebnis)
+        Lokal unter dem Adress-Lock, mit db zusätzlich in einer Transaktion über alle Prozesse
+        """
+        with self._lock(address):
+            if self.db is None:
+                self._next[address], result = fn(self._next.get(address))
+                return result
+            with self._db_lock:
+                self.db.execute("BEGIN IMMEDIATE")
+                try:
+                    row = self.db.execute("SELECT next FROM nonces WHERE address = ?", (address.lower(),)).fetchone()
+                    value, result = fn(row[0] if row else None)
+                    self.db.execute("INSERT OR REPLACE INTO nonces VALUES (?, ?)", (address.lower(), value))
+                    self.db.execute("COMMIT")
+                except BaseException:
+                    self.db.execute("ROLLBACK")
+                    raise
+                return result
+
+    def allocate(self, address):
+        def take(nonce):
+            if nonce is None:
+                nonce = self.web3.eth.get_transaction_count(address, "pending")
+            return nonce + 1, nonce
+        nonce = self._update(address, take)
+        reservation = self._reservations.get(address)
+        if reservation is not None:
+            reservation.nonces.append(nonce)  # nur der Halter kommt am Adress-Lock vorbei
+        return nonce
+
+    def reserve(self, address):
+        """
+        :returns: NonceReservation – release(), wenn das Bundle nicht landet, sonst close()
+        """
+        return NonceReservation(self, address)
+
+    def release(self, address, nonce):
+        # Nonce wurde nicht gesendet: zurückgeben, falls sie die letzte war, sonst Lücke -> Resync
+        self._update(address, lambda current: (nonce if current == nonce + 1 else None, None))
+
+    def resync(self, address):
+        self._update(address, lambda _: (None, None))
+
+    def send(self, address, sign_fn):
+        """
+        :param sign_fn: (nonce, bump) -> signierte Raw-Transaktion (bytes); bump = wie oft die
+                        Fee für eine Ersatz-TX auf derselben Nonce erhöht werden soll
+        :returns: TX-Hash
+        """
+        nonce, bump = self.allocate(address), 0
+        for attempt in range(self.retries + 1):
+            raw = None
+            try:
+                raw = sign_fn(nonce, bump)
+                return self.web3.eth.send_raw_transaction(raw)
+            except Exception as e:
+                if raw is not None and is_already_known(e):
+                    # Kein zweites Signieren: das wäre dieselbe Aktion auf einer neuen Nonce
+                    return Web3.keccak(raw)
+                if attempt < self.retries and is_underpriced(e):
+                    logging.warning(f"Nonce {nonce} für {address} belegt ({e}), erhöhe Fee")
+                    bump += 1
+                    continue
+                if attempt < self.retries and is_nonce_error(e):
+                    logging.warning(f"Nonce {nonce} für {address} abgelehnt ({e}), Resync")
+                    self.resync(address)
+                    nonce, bump = self.allocate(address), 0
+                    continue
+                if is_nonce_error(e) or is_underpriced(e):
+                    self.resync(address)
+                else:
+                    self.release(address, nonce)
+                raise
+
+class NonceReservation:
+    """
+    Hält die Nonce-Vergabe einer Adresse für ein Bundle: signierte, noch nicht inkludierte TXs
+    dürfen keine öffentlich gesendete TX (z.B. Dev-Cut aus dem Watcher-Thread) hinter sich haben,
+    sonst hängt diese nach einem verpassten Bundle hinter einer Lücke
+    """
+    def __init__(self, manager, address):
+        self.manager = manager
+        self.address = address
+        self.nonces = []
+        self._lock = manager._lock(address)
+        self._lock.acquire()
+        manager._reservations[address] = self
+        self.active = True
+
+    def release(self):
+        # Bundle nicht inkludiert: alle reservierten Nonces zurückgeben
+        if not self.active:
+            return
+        if self.nonces:
+            first, last = self.nonces[0], self.nonces[-1]
+            self.manager._update(self.address, lambda current: (first if current == last + 1 else None, None))
+        self.close()
+
+    def close(self):
+        # Bundle gelandet (oder nichts signiert): Nonces bleiben verbraucht, Vergabe wieder frei
+        if self.active:
+            self.active = False
+            self.manager._reservations.pop(self.address, None)
+            self._lock.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        self.release() if exc_type else self.close()
+
+class ConfirmationWatcher:
+    def __init__(self, web3, poll_interval=1.0, timeout=300):
+        """
+        :param poll_interval: Sekunden zwischen zwei Receipt-Runden
+        :param timeout: Sekunden, nach denen eine Transaktion als verloren gilt
+        """
+        self.web3 = web3
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self._pending = {}  # tx_hash -> (gesendet, on_receipt, on_timeout)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def watch(self, tx_hash, on_receipt, on_timeout=None):
+        """
+        :param on_receipt: receipt -> None (auch bei status == 0)
+        :param on_timeout: tx_hash -> None, wenn nach timeout kein Receipt vorliegt
+        """
+        with self._lock:
+            self._pending[tx_hash] = (time.monotonic(), on_receipt, on_timeout)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="confirmation-watcher", daemon=True)
+                self._thread.start()
+
+    def pending(self):
+        return len(self._pending)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                pending = list(self._pending.items())
+            for tx_hash, (sent, on_receipt, on_timeout) in pending:
+                try:
+                    receipt = self.web3.eth.get_transaction_receipt(tx_hash)
+                except TransactionNotFound:
+                    if time.monotonic() - sent < self.timeout:
+                        continue
+                    receipt, callback = tx_hash, on_timeout
+                    TX_TIMEOUTS.inc()
+                except Exception as e:
+                    logging.warning(f"Receipt für {self.web3.to_hex(tx_hash)} nicht abrufbar: {e}")
+                    continue
+                else:
+                    callback = on_receipt
+                    TX_INCLUSION.observe(time.monotonic() - sent)
+                with self._lock:
+                    self._pending.pop(tx_hash, None)
+                if callback is None:
+                    continue
+                try:
+                    callback(receipt)
+                except Exception as e:
+                    logging.warning(f"Callback für {self.web3.to_hex(tx_hash)} fehlgeschlagen: {e}")
+            time.sleep(self.poll_interval)
@@ -0,0 +1,153 @@
+"""
+AsyncRpcClient: schlanker JSON-RPC-Client auf aiohttp für Scanner & Executor
+
+- ein gemeinsamer Keep-Alive-Connection-Pool pro Endpoint
+- Limit für gleichzeitig laufende Requests (Semaphore)
+- JSON-RPC-Batch-Requests (mehrere Calls in einem HTTP-Roundtrip)
+- Calls, Fehler und Latenz pro Endpoint & Methode in metrics (rpc_*)
+"""
+
+import asyncio
+import itertools
+import time
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from web3 import Web3
+from metrics import METRICS, endpoint_label
+
+DEFAULT_MAX_IN_FLIGHT = 32
+DEFAULT_POOL_SIZE = 16
+DEFAULT_TIMEOUT = 10
+
+RPC_CALLS = METRICS.counter("rpc_calls_total", "JSON-RPC-Calls (Batch-Einträge einzeln)", ("endpoint", "method"))
+RPC_ERRORS = METRICS.counter("rpc_errors_total", "JSON-RPC-Fehler (Transport oder error-Objekt)", ("endpoint", "method"))
+RPC_LATENCY = METRICS.histogram("rpc_latency_seconds", "Dauer eines Roundtrips (Batches als method=batch)", ("endpoint", "method"))
+
+class RpcError(Exception):
+    def __init__(self, method, error):
+        self.method = method
+        self.code = error.get("code") if isinstance(error, dict) else None
+        message = error.get("message") if isinstance(error, dict) else str(error)
+        super().__init__(f"{method}: {message}")
+
+# --- Komfort-Methoden über request() (AsyncRpcClient, RpcRouter) ---
+class RpcMethods:
+    async def eth_call(self, to, data, block="latest"):
+        result = await self.request("eth_call", [{"to": to, "data": Web3.to_hex(data)}, block])
+        return Web3.to_bytes(hexstr=result)
+
+    async def block_number(self):
+        return int(await self.request("eth_blockNumber"), 16)
+
+    async def send_raw_transaction(self, raw_tx):
+        return await self.request("eth_sendRawTransaction", [Web3.to_hex(raw_tx)])
+
+class AsyncRpcClient(RpcMethods):
+    def __init__(self, url, max_in_flight=DEFAULT_MAX_IN_FLIGHT, pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT):
+        """
+        :param url: HTTP(S) JSON-RPC Endpoint
+        :param max_in_flight: max. gleichzeitige HTTP-Requests
+        :param pool_size: max. offene Keep-Alive-Verbindungen
+        """
+        self.url = url
+        self.endpoint = endpoint_label(url)
+        self.pool_size = pool_size
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self._limit = asyncio.Semaphore(max_in_flight)
+        self._ids = itertools.count(1)
+        self._session = None
+
+    # --- Session lazy anlegen (muss im laufenden Event-Loop passieren) ---
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _send(self, payload):
+        async with self._get_session().post(self.url, json=payload) as resp:
+            resp.raise_for_status()
+            return await resp.json(content_type=None)
+
+    async def _post(self, payload):
+        method = payload["method"] if isinstance(payload, dict) else "batch"
+        for p in payload if isinstance(payload, list) else (payload,):
+            RPC_CALLS.labels(self.endpoint, p["method"]).inc()
+        async with self._limit:
+            start = time.perf_counter()
+            try:
+                return await self._send(payload)
+            except Exception:
+                RPC_ERRORS.labels(self.endpoint, method).inc()
+                raise
+            finally:
+                RPC_LATENCY.labels(self.endpoint, method).observe(time.perf_counter() - start)
+
+    def _payload(self, method, params):
+        return {"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": list(params)}
+
+    # --- Einzelner Call ---
+    async def request(self, method, params=()):
+        reply = await self._post(self._payload(method, params))
+        if reply.get("error"):
+            RPC_ERRORS.labels(self.endpoint, method).inc()
+            raise RpcError(method, reply["error"])
+        return reply.get("result")
+
+    # --- Batch: [(method, params)] -> Ergebnisse in gleicher Reihenfolge ---
+    # Fehler einzelner Calls werden als RpcError-Objekt zurückgegeben, nicht geworfen
+    async def batch(self, calls):
+        if not calls:
+            return []
+        payload = [self._payload(method, params) for method, params in calls]
+        replies = await self._post(payload)
+        if isinstance(replies, dict):
+            # Manche Provider antworten auf ungültige Batches mit einem einzelnen Fehlerobjekt
+            raise RpcError("batch", replies.get("error", replies))
+        by_id = {r.get("id"): r for r in replies}
+        results = []
+        for p in payload:
+            r = by_id.get(p["id"], {"error": {"message": "keine Antwort im Batch"}})
+            if r.get("error"):
+                RPC_ERRORS.labels(self.endpoint, p["method"]).inc()
+            results.append(RpcError(p["method"], r["error"]) if r.get("error") else r.get("result"))
+        return results
+
+# --- Sync-Pfad mit denselben rpc_*-Metriken wie der async Client ---
+class InstrumentedHTTPProvider(Web3.HTTPProvider):
+    def __init__(self, endpoint_uri, **kwargs):
+        super().__init__(endpoint_uri, **kwargs)
+        self.endpoint = endpoint_label(str(endpoint_uri))
+
+    def make_request(self, method, params):
+        RPC_CALLS.labels(self.endpoint, method).inc()
+        start = time.perf_counter()
+        try:
+            response = super().make_request(method, params)
+        except Exception:
+            RPC_ERRORS.labels(self.endpoint, method).inc()
+            raise
+        finally:
+            RPC_LATENCY.labels(self.endpoint, method).observe(time.perf_counter() - start)
+        if isinstance(response, dict) and response.get("error"):
+            RPC_ERRORS.labels(self.endpoint, method).inc()
+        return response
+
+# --- Sync-Pfad (Executor-Threads): ein gemeinsamer Keep-Alive-Pool statt Setup pro Thread ---
+def pooled_http_provider(url, pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return InstrumentedHTTPProvider(url, session=session, request_kwargs={"timeout": timeout})
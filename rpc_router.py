@@ -0,0 +1,575 @@
+"""
+RpcRouter: mehrere JSON-RPC-Endpoints hinter einer Schnittstelle – Health-Scoring, Hedging, Broadcast
+
+- pro Endpoint EWMA von Latenz und Fehlerquote, p95 aus den letzten Latenzen, Token-Bucket
+  als Rate-Limit; Rate-Limit-Antworten (HTTP 429, -32005) schicken den Endpoint kurz in die Pause
+- Reads gehen an den Endpoint mit dem besten Score; ist nach dessen p95 keine Antwort da,
+  läuft ein Duplikat am zweitbesten Endpoint (Hedge), die erste Antwort gewinnt
+- Transportfehler und Rate-Limits -> nächster Endpoint; Node-Fehler (z.B. Revert) kommen direkt zurück
+- Reads auf eine feste Blocknummer (eth_getLogs bis head, eth_call auf hex(head)) gehen nur an
+  Endpoints, deren Head mindestens so weit ist; Heads kommen aus eth_blockNumber-Antworten,
+  fehlt ein passender Endpoint, werden alle Heads einmal abgefragt (sync_heads)
+- eth_sendRawTransaction geht parallel an alle Endpoints (mehr Mempools, kein Single Point of Failure);
+  lehnt ein Endpoint ab, zählt das gegen seinen Score (außer "already known")
+- async (RpcRouter, Schnittstelle wie AsyncRpcClient) und sync (RouterHTTPProvider für web3)
+
+    RPC = RpcRouter(rpc_urls("sepolia"), **router_options(CONFIG.get("rpc", {})))
+    web3 = Web3(RouterHTTPProvider(rpc_urls("sepolia"), **router_options(CONFIG.get("rpc", {}))))
+
+Endpoints kommen aus .env: RPC_URLS_SEPOLIA (kommagetrennt) plus RPC_URL_SEPOLIA, analog MAINNET.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from web3.providers.base import BaseProvider
+from metrics import METRICS, endpoint_label
+from nonce_manager import is_already_known
+from rpc_client import AsyncRpcClient, RpcError, RpcMethods, pooled_http_provider, DEFAULT_MAX_IN_FLIGHT, DEFAULT_POOL_SIZE, DEFAULT_TIMEOUT
+
+DEFAULT_URL = "http://localhost:8545"
+DEFAULT_HEDGE_MIN = 0.05     # Sekunden: nie früher hedgen (sonst doppelte Last bei schnellen Nodes)
+DEFAULT_HEDGE_MAX = 2.0      # Sekunden: Deadline ohne Latenz-Historie bzw. Obergrenze
+DEFAULT_EWMA_ALPHA = 0.2
+DEFAULT_ERROR_HALF_LIFE = 30.0  # Sekunden, bis eine Fehlerquote ohne neuen Traffic halbiert ist
+DEFAULT_COOLDOWN = 1.0       # Sekunden Pause nach Rate-Limit
+DEFAULT_BURST = 20
+LATENCY_WINDOW = 128         # Latenzen für das p95 pro Endpoint
+
+RATE_LIMIT_CODES = {-32005, -32029, 429}
+BROADCAST_METHODS = {"eth_sendRawTransaction"}
+# Position des Block-Parameters (eth_getLogs: fromBlock/toBlock im Filter, siehe pinned_block)
+BLOCK_PARAMS = {
+    "eth_call": 1, "eth_estimateGas": 1, "eth_getBalance": 1, "eth_getCode": 1,
+    "eth_getTransactionCount": 1, "eth_getStorageAt": 2, "eth_getBlockByNumber": 0, "eth_feeHistory": 1,
+}
+
+RPC_HEDGES = METRICS.counter("rpc_hedges_total", "Gehedgte Reads (Duplikat an zweiten Endpoint)", ("endpoint",))
+RPC_HEDGE_WINS = METRICS.counter("rpc_hedge_wins_total", "Reads, bei denen das Duplikat zuerst antwortete", ("endpoint",))
+RPC_FAILOVERS = METRICS.counter("rpc_failovers_total", "Reads nach Fehler an den nächsten Endpoint", ("endpoint",))
+RPC_BROADCAST_FAILURES = METRICS.counter("rpc_broadcast_failures_total", "Vom Endpoint abgelehnte oder verlorene Broadcasts", ("endpoint",))
+
+ROUTERS = []  # alle Router des Prozesses (Scanner: async + sync) für die Endpoint-Gauges
+METRICS.gauge(
+    "rpc_endpoint_latency_seconds", "EWMA-Latenz pro Endpoint", ("endpoint", "router"),
+    fn=lambda: {(e.label, type(r).__name__): e.latency or 0.0 for r in ROUTERS for e in r.endpoints},
+)
+METRICS.gauge(
+    "rpc_endpoint_error_rate", "EWMA-Fehlerquote pro Endpoint", ("endpoint", "router"),
+    fn=lambda: {(e.label, type(r).__name__): e.error_rate() for r in ROUTERS for e in r.endpoints},
+)
+
+def rpc_urls(network=None, default=DEFAULT_URL):
+    """
+    :param network: "sepolia" / "mainnet" (Default: NETWORK aus .env)
+    :param default: Endpoint, falls keine der beiden Variablen gesetzt ist
+    :returns: Endpoint-URLs aus RPC_URLS_<NETZ> (kommagetrennt) und RPC_URL_<NETZ>, ohne Duplikate
+    """
+    network = (network or os.getenv("NETWORK", "sepolia")).upper()
+    urls = [u.strip() for u in os.getenv(f"RPC_URLS_{network}", "").split(",") if u.strip()]
+    if os.getenv(f"RPC_URL_{network}"):
+        urls.append(os.getenv(f"RPC_URL_{network}"))
+    return list(dict.fromkeys(urls)) or [default]
+
+def router_options(rpc_cfg):
+    """
+    :param rpc_cfg: Abschnitt rpc aus config.yaml
+    :returns: kwargs für RpcRouter / RouterHTTPProvider
+    """
+    return {
+        "hedge": rpc_cfg.get("hedge", True),
+        "hedge_min": rpc_cfg.get("hedge_min_ms", DEFAULT_HEDGE_MIN * 1000) / 1000,
+        "hedge_max": rpc_cfg.get("hedge_max_ms", DEFAULT_HEDGE_MAX * 1000) / 1000,
+        "rate_limit": rpc_cfg.get("rate_limit"),
+        "rate_limits": rpc_cfg.get("rate_limits") or {},
+        "burst": rpc_cfg.get("burst", DEFAULT_BURST),
+        "pool_size": rpc_cfg.get("pool_size", DEFAULT_POOL_SIZE),
+    }
+
+def _rate_limited(error):
+    status = getattr(error, "status", None) or getattr(getattr(error, "response", None), "status_code", None)
+    return status == 429 or getattr(error, "code", None) in RATE_LIMIT_CODES
+
+def _retryable(error):
+    # Node-Fehler (Revert, ungültige Parameter) sind an jedem Endpoint gleich -> nicht wiederholen
+    return not isinstance(error, RpcError) or _rate_limited(error)
+
+def _block_number(value):
+    if isinstance(value, int):
+        return value
+    if isinstance(value, dict):  # EIP-1898 {"blockNumber": ...}
+        return _block_number(value.get("blockNumber"))
+    if isinstance(value, str) and value.startswith("0x"):
+        return int(value, 16)
+    return None  # "latest", "pending", Block-Hash-Objekt ohne Nummer
+
+def pinned_block(method, params):
+    """
+    :returns: Blocknummer, die ein Endpoint für diesen Read kennen muss (None = jeder Endpoint)
+    """
+    params = list(params)
+    if method == "eth_getLogs":
+        flt = params[0] if params and isinstance(params[0], dict) else {}
+        blocks = [_block_number(flt.get(key)) for key in ("fromBlock", "toBlock")]
+        return max((b for b in blocks if b is not None), default=None)
+    index = BLOCK_PARAMS.get(method)
+    if index is None or len(params) <= index:
+        return None
+    return _block_number(params[index])
+
+def _broadcast_error(errors):
+    # Alle Endpoints abgelehnt: "already known" (gilt als gesendet) vor Node-Fehlern vor Transportfehlern
+    return (
+        next((e for e in errors if is_already_known(e)), None)
+        or next((e for e in errors if isinstance(e, RpcError)), errors[0])
+    )
+
+def _broadcast_failed(endpoint, error):
+    # Abgelehnte TX (z.B. Mempool voll, Transportfehler) zählt gegen den Endpoint; "already known" nicht
+    if is_already_known(error):
+        return False
+    RPC_BROADCAST_FAILURES.labels(endpoint.label).inc()
+    logging.warning(f"Broadcast an {endpoint.label} fehlgeschlagen: {error}")
+    return True
+
+# --- Rate-Limit pro Endpoint ---
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "stamp", "_lock")
+
+    def __init__(self, rate, burst=DEFAULT_BURST):
+        """
+        :param rate: Requests pro Sekunde
+        :param burst: max. angesparte Tokens
+        """
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst))
+        self.tokens = self.burst
+        self.stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def take(self, now=None):
+        """
+        :returns: True, wenn ein Token verbraucht wurde
+        """
+        with self._lock:
+            self._refill(now or time.monotonic())
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+    def wait_time(self, now=None):
+        with self._lock:
+            self._refill(now or time.monotonic())
+            return max(0.0, (1 - self.tokens) / self.rate)
+
+# --- Health eines Endpoints ---
+class Endpoint:
+    def __init__(self, url, client, rate_limit=None, burst=DEFAULT_BURST, alpha=DEFAULT_EWMA_ALPHA):
+        """
+        :param client: AsyncRpcClient bzw. web3-Provider dieses Endpoints
+        :param rate_limit: Requests/s (None = unbegrenzt)
+        """
+        self.url = url
+        self.label = endpoint_label(url)
+        self.client = client
+        self.bucket = TokenBucket(rate_limit, burst) if rate_limit else None
+        self.alpha = alpha
+        self.latency = None        # EWMA in Sekunden (None = noch keine Messung)
+        self.errors = 0.0          # EWMA der Fehlerquote 0..1
+        self.errors_at = time.monotonic()
+        self.cooldown_until = 0.0
+        self.in_flight = 0
+        self.samples = deque(maxlen=LATENCY_WINDOW)
+        self.p95 = None
+        self.head = None           # höchster Block, den dieser Endpoint gemeldet hat
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"Endpoint({self.label})"
+
+    def error_rate(self, now=None):
+        now = time.monotonic() if now is None else now
+        return self.errors * 0.5 ** ((now - self.errors_at) / DEFAULT_ERROR_HALF_LIFE)
+
+    def score(self, now):
+        """
+        Kleiner ist besser: erwartete Latenz, verteuert durch Fehlerquote und laufende Requests
+        """
+        if now < self.cooldown_until:
+            return float("inf")
+        latency = self.latency if self.latency is not None else 0.0  # neue Endpoints zuerst ausprobieren
+        errors = self.error_rate(now)
+        return latency * (1 + self.in_flight) * (1 + 20 * errors) + errors
+
+    def available(self, now):
+        return now >= self.cooldown_until and (self.bucket is None or self.bucket.take(now))
+
+    def wait_time(self, now):
+        cooldown = max(0.0, self.cooldown_until - now)
+        return max(cooldown, self.bucket.wait_time(now) if self.bucket else 0.0)
+
+    def observe(self, seconds, ok=True, rate_limited=False):
+        now = time.monotonic()
+        with self._lock:
+            self.latency = seconds if self.latency is None else self.latency + self.alpha * (seconds - self.latency)
+            errors = self.error_rate(now)
+            self.errors = errors + self.alpha * ((0.0 if ok else 1.0) - errors)
+            self.errors_at = now
+            if rate_limited:
+                self.cooldown_until = now + DEFAULT_COOLDOWN
+            self.samples.append(seconds)
+            if len(self.samples) % 16 == 0 or self.p95 is None:
+                ordered = sorted(self.samples)
+                self.p95 = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+    def saw_head(self, block):
+        if self.head is None or block > self.head:
+            self.head = block
+
+    def at_block(self, block):
+        return block is None or (self.head is not None and self.head >= block)
+
+    def deadline(self, low, high):
+        # Hedge-Zeitpunkt: p95 dieses Endpoints, begrenzt auf [low, high]
+        return high if self.p95 is None else min(high, max(low, self.p95))
+
+    def stats(self):
+        return {
+            "latency_ms": None if self.latency is None else round(self.latency * 1000, 2),
+            "p95_ms": None if self.p95 is None else round(self.p95 * 1000, 2),
+            "errors": round(self.error_rate(), 4),
+            "in_flight": self.in_flight,
+            "head": self.head,
+        }
+
+# --- Gemeinsame Auswahl-Logik (async & sync) ---
+class _Balancer:
+    def __init__(self, endpoints, hedge=True, hedge_min=DEFAULT_HEDGE_MIN, hedge_max=DEFAULT_HEDGE_MAX):
+        if not endpoints:
+            raise ValueError("RpcRouter braucht mindestens einen Endpoint")
+        self.endpoints = endpoints
+        self.hedge = hedge and len(endpoints) > 1
+        self.hedge_min = hedge_min
+        self.hedge_max = hedge_max
+        ROUTERS.append(self)
+
+    @staticmethod
+    def _build(urls, make_client, rate_limit, rate_limits, burst):
+        return [
+            Endpoint(url, make_client(url), rate_limits.get(endpoint_label(url), rate_limit), burst)
+            for url in urls
+        ]
+
+    def pick(self, exclude=(), block=None):
+        """
+        :param block: nur Endpoints, deren Head mindestens diesen Block erreicht hat
+        :returns: (Endpoint mit bestem Score und freiem Token, None) oder (None, Wartezeit bis zum nächsten);
+                  (None, None), wenn kein Endpoint in Frage kommt
+        """
+        now = time.monotonic()
+        if len(self.endpoints) == 1:
+            block = None  # keine Alternative: der einzige Endpoint bekommt alles
+        candidates = sorted(
+            (e for e in self.endpoints if e not in exclude and e.at_block(block)),
+            key=lambda e: e.score(now),
+        )
+        if not candidates:
+            return None, None
+        for endpoint in candidates:
+            if endpoint.available(now):
+                return endpoint, None
+        return None, min(e.wait_time(now) for e in candidates)
+
+    def stats(self):
+        return {e.label: e.stats() for e in self.endpoints}
+
+# --- Async: Drop-in für AsyncRpcClient im Scanner ---
+class RpcRouter(RpcMethods, _Balancer):
+    def __init__(self, urls, max_in_flight=DEFAULT_MAX_IN_FLIGHT, pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT,
+                 hedge=True, hedge_min=DEFAULT_HEDGE_MIN, hedge_max=DEFAULT_HEDGE_MAX,
+                 rate_limit=None, rate_limits=None, burst=DEFAULT_BURST, client_factory=None):
+        """
+        :param urls: JSON-RPC-Endpoints (Reihenfolge egal, gewählt wird nach Score)
+        :param rate_limit: Requests/s pro Endpoint; rate_limits: {Host: Requests/s} überschreibt pro Endpoint
+        :param client_factory: url -> AsyncRpcClient (Default: echter HTTP-Client)
+        """
+        make_client = client_factory or (lambda url: AsyncRpcClient(url, max_in_flight=max_in_flight, pool_size=pool_size, timeout=timeout))
+        super().__init__(
+            self._build(urls, make_client, rate_limit, rate_limits or {}, burst),
+            hedge=hedge, hedge_min=hedge_min, hedge_max=hedge_max,
+        )
+        self._background = set()  # Broadcast-Tasks, die nach der ersten Antwort weiterlaufen
+
+    async def close(self):
+        for endpoint in self.endpoints:
+            await endpoint.client.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _attempt(self, endpoint, fn, method=None):
+        endpoint.in_flight += 1
+        start = time.perf_counter()
+        try:
+            result = await fn(endpoint.client)
+        except asyncio.CancelledError:
+            # Verlierer eines Hedges: mindestens so langsam wie bisher gemessen
+            endpoint.observe(time.perf_counter() - start)
+            raise
+        except Exception as e:
+            if method in BROADCAST_METHODS:
+                ok = not _broadcast_failed(endpoint, e)
+            else:
+                ok = not _retryable(e)
+            endpoint.observe(time.perf_counter() - start, ok=ok, rate_limited=_rate_limited(e))
+            raise
+        finally:
+            endpoint.in_flight -= 1
+        endpoint.observe(time.perf_counter() - start)
+        if method == "eth_blockNumber":
+            endpoint.saw_head(int(result, 16))
+        return result
+
+    async def sync_heads(self):
+        # Alle Endpoints nach ihrem Head fragen (ein eth_blockNumber je Endpoint, parallel)
+        call = lambda client: client.request("eth_blockNumber")
+        await asyncio.gather(*[self._attempt(e, call, "eth_blockNumber") for e in self.endpoints], return_exceptions=True)
+
+    async def _acquire(self, exclude, block=None):
+        while True:
+            endpoint, delay = self.pick(exclude, block)
+            if endpoint is not None or delay is None:
+                return endpoint
+            await asyncio.sleep(delay)
+
+    async def _read(self, fn, method=None, block=None):
+        tried, pending, error, hedged, synced = [], {}, None, False, False
+        while True:
+            if not pending:
+                endpoint = await self._acquire(tried, block)
+                if endpoint is None and block is not None and not synced:
+                    # Kein Endpoint bekannt auf diesem Block: Heads auffrischen, dann erneut wählen
+                    synced = True
+                    await self.sync_heads()
+                    continue
+                if endpoint is None:
+                    raise error or RpcError("router", f"kein Endpoint auf Block {block}" if block is not None else "kein Endpoint verfügbar")
+                if tried:
+                    RPC_FAILOVERS.labels(endpoint.label).inc()
+                tried.append(endpoint)
+                pending[asyncio.ensure_future(self._attempt(endpoint, fn, method))] = endpoint
+
+            can_hedge = self.hedge and not hedged and len(tried) < len(self.endpoints)
+            timeout = tried[-1].deadline(self.hedge_min, self.hedge_max) if can_hedge else None
+            done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+            if not done:
+                # Deadline verpasst: Duplikat an den nächstbesten Endpoint (nur mit freiem Token, ohne Warten)
+                hedged = True
+                endpoint, _ = self.pick(tried, block)
+                if endpoint is not None:
+                    RPC_HEDGES.labels(endpoint.label).inc()
+                    tried.append(endpoint)
+                    pending[asyncio.ensure_future(self._attempt(endpoint, fn, method))] = endpoint
+                continue
+
+            for task in done:
+                endpoint = pending.pop(task)
+                try:
+                    result = task.result()
+                except Exception as e:
+                    if not _retryable(e):
+                        self._cancel(pending)
+                        raise
+                    logging.debug(f"RPC {endpoint.label} fehlgeschlagen, nächster Endpoint: {e}")
+                    error = e
+                    continue
+                if hedged and endpoint is not tried[0]:
+                    RPC_HEDGE_WINS.labels(endpoint.label).inc()
+                self._cancel(pending)
+                return result
+
+    @staticmethod
+    def _cancel(pending):
+        for task in pending:
+            task.cancel()
+
+    async def _broadcast(self, fn, method):
+        tasks = [asyncio.ensure_future(self._attempt(endpoint, fn, method)) for endpoint in self.endpoints]
+        errors = []
+        for next_done in asyncio.as_completed(tasks):
+            try:
+                result = await next_done
+            except Exception as e:
+                errors.append(e)
+                continue
+            # Die übrigen Endpoints bekommen die TX trotzdem (weitere Mempools); Ergebnis egal
+            for task in tasks:
+                if not task.done():
+                    self._background.add(task)
+                    task.add_done_callback(self._settle)
+            return result
+        raise _broadcast_error(errors)
+
+    def _settle(self, task):
+        # Fehler sind in _attempt schon gezählt und geloggt; hier nur abholen
+        self._background.discard(task)
+        if not task.cancelled():
+            task.exception()
+
+    async def request(self, method, params=()):
+        call = lambda client: client.request(method, params)
+        if method in BROADCAST_METHODS:
+            return await self._broadcast(call, method)
+        return await self._read(call, method, pinned_block(method, params))
+
+    async def batch(self, calls):
+        # Batches enthalten nur Reads (Quotes, Logs); Fehler einzelner Calls kommen als RpcError-Objekt zurück
+        if not calls:
+            return []
+        blocks = [b for method, params in calls if (b := pinned_block(method, params)) is not None]
+        return await self._read(lambda client: client.batch(calls), block=max(blocks, default=None))
+
+# --- Sync: web3-Provider für Executor & Bot ---
+class RouterHTTPProvider(BaseProvider, _Balancer):
+    def __init__(self, urls, pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT,
+                 hedge=True, hedge_min=DEFAULT_HEDGE_MIN, hedge_max=DEFAULT_HEDGE_MAX,
+                 rate_limit=None, rate_limits=None, burst=DEFAULT_BURST, provider_factory=None):
+        """
+        :param provider_factory: url -> blockierender web3-Provider (Default: pooled_http_provider)
+        """
+        BaseProvider.__init__(self)
+        make_provider = provider_factory or (lambda url: pooled_http_provider(url, pool_size=pool_size, timeout=timeout))
+        _Balancer.__init__(
+            self, self._build(urls, make_provider, rate_limit, rate_limits or {}, burst),
+            hedge=hedge, hedge_min=hedge_min, hedge_max=hedge_max,
+        )
+        # Hedges & Broadcasts laufen in Threads; Verlierer laufen zu Ende und zählen in die Statistik
+        self._pool = ThreadPoolExecutor(max_workers=max(4, 4 * len(self.endpoints)), thread_name_prefix="rpc-router") if len(self.endpoints) > 1 else None
+
+    def _attempt(self, endpoint, method, params):
+        with endpoint._lock:
+            endpoint.in_flight += 1
+        start = time.perf_counter()
+        try:
+            response = endpoint.client.make_request(method, params)
+        except Exception as e:
+            if method in BROADCAST_METHODS:
+                _broadcast_failed(endpoint, e)
+            endpoint.observe(time.perf_counter() - start, ok=False, rate_limited=_rate_limited(e))
+            raise
+        finally:
+            with endpoint._lock:
+                endpoint.in_flight -= 1
+        error = response.get("error") if isinstance(response, dict) else None
+        if error:
+            error = RpcError(method, error)
+            if method in BROADCAST_METHODS:
+                ok = not _broadcast_failed(endpoint, error)
+            else:
+                ok = not _retryable(error)
+            endpoint.observe(time.perf_counter() - start, ok=ok, rate_limited=_rate_limited(error))
+            if _retryable(error):
+                raise error  # Rate-Limit -> nächster Endpoint
+        else:
+            endpoint.observe(time.perf_counter() - start)
+            if method == "eth_blockNumber":
+                endpoint.saw_head(_block_number(response.get("result")) or 0)
+        return response
+
+    def sync_heads(self):
+        # Alle Endpoints nach ihrem Head fragen (parallel im Pool; ein einzelner Endpoint wird nie gepinnt)
+        if self._pool is not None:
+            wait([self._pool.submit(self._attempt, e, "eth_blockNumber", []) for e in self.endpoints])
+
+    def _acquire(self, exclude, block=None):
+        while True:
+            endpoint, delay = self.pick(exclude, block)
+            if endpoint is not None or delay is None:
+                return endpoint
+            time.sleep(delay)
+
+    def make_request(self, method, params):
+        if method in BROADCAST_METHODS and self._pool is not None:
+            return self._broadcast(method, params)
+
+        block = pinned_block(method, params)
+        tried, pending, error, hedged, synced = [], {}, None, False, False
+        while True:
+            if not pending:
+                endpoint = self._acquire(tried, block)
+                if endpoint is None and block is not None and not synced:
+                    synced = True
+                    self.sync_heads()
+                    continue
+                if endpoint is None:
+                    raise error or RpcError(method, f"kein Endpoint auf Block {block}" if block is not None else "kein Endpoint verfügbar")
+                if tried:
+                    RPC_FAILOVERS.labels(endpoint.label).inc()
+                tried.append(endpoint)
+                if self._pool is None:
+                    try:
+                        return self._attempt(endpoint, method, params)
+                    except Exception as e:
+                        error = e
+                        continue
+                pending[self._pool.submit(self._attempt, endpoint, method, params)] = endpoint
+
+            can_hedge = self.hedge and not hedged and len(tried) < len(self.endpoints)
+            timeout = tried[-1].deadline(self.hedge_min, self.hedge_max) if can_hedge else None
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            if not done:
+                hedged = True
+                endpoint, _ = self.pick(tried, block)
+                if endpoint is not None:
+                    RPC_HEDGES.labels(endpoint.label).inc()
+                    tried.append(endpoint)
+                    pending[self._pool.submit(self._attempt, endpoint, method, params)] = endpoint
+                continue
+
+            for future in done:
+                endpoint = pending.pop(future)
+                try:
+                    response = future.result()
+                except Exception as e:
+                    logging.debug(f"RPC {endpoint.label} fehlgeschlagen, nächster Endpoint: {e}")
+                    error = e
+                    continue
+                if hedged and endpoint is not tried[0]:
+                    RPC_HEDGE_WINS.labels(endpoint.label).inc()
+                return response
+
+    def _broadcast(self, method, params):
+        futures = [self._pool.submit(self._attempt, endpoint, method, params) for endpoint in self.endpoints]
+        responses = []
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    response = future.result()
+                except Exception:
+                    continue  # in _attempt gezählt und geloggt
+                if not response.get("error"):
+                    return response  # übrige Threads laufen weiter, die TX landet in mehreren Mempools
+                responses.append(response)
+        if responses:
+            # z.B. "nonce too low" – an web3 wie vom einzelnen Node; "already known" zuerst (gilt als gesendet)
+            return next((r for r in responses if is_already_known(r["error"])), responses[0])
+        return futures[0].result()  # alle mit Transportfehler: ersten Fehler werfen
+
+    def is_connected(self, show_traceback=False):
+        return any(endpoint.client.is_connected(show_traceback) for endpoint in self.endpoints)
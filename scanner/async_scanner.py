@@ -2,45 +2,130 @@ import asyncio
 import os
 import sys
 import logging
+from itertools import combinations
+from decimal import Decimal
+import numpy as np
 from dotenv import load_dotenv
 from web3 import Web3
-import yaml
 
-# Telegram shared_state laden
+# Telegram shared_state laden (SQLite-StateStore, Änderungen aus dem Bot per STATE.poll())
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'telegrambot')))
-from shared_state import user_state
+from shared_state import STATE
+from rpc_client import AsyncRpcClient, RpcError, DEFAULT_MAX_IN_FLIGHT
+from rpc_router import RpcRouter, RouterHTTPProvider, rpc_urls, router_options
+from gas_oracle import GasOracle
+from config_index import LiveConfig, checksum
+from metrics import METRICS, traced, cache_lookup, serve_from_config
+from trade_queue import TradeQueue, DEFAULT_MAX_PENDING, DEFAULT_WORKERS, DEFAULT_MAX_AGE_BLOCKS
+from scanner.quote_engine import (
+    MulticallQuoter, MULTICALL3_ADDRESS, DEFAULT_BATCH_SIZE,
+    decode_get_amounts_out,
+)
+from scanner.reserve_cache import ReserveCache, get_amount_out
+from scanner.pair_index import PairIndex, DEFAULT_PATH as PAIR_INDEX_PATH
+from scanner.spread_engine import SpreadEngine
+from scanner.route_search import RouteGraph, RouteAlerts, DEFAULT_REALERT_PCT
+from scanner.block_scheduler import BlockScheduler, DEFAULT_POLL_INTERVAL
+from scanner.trade_sizing import optimal_trade, optimal_trades, DEFAULT_TRADE_GAS
+from scanner.trade_simulator import TradeSimulator
+from scanner.watch_set import WatchSet
 
 # --- ENV & CONFIG ---
 load_dotenv()
 NETWORK = os.getenv("NETWORK", "sepolia")
-RPC_URL = os.getenv("RPC_URL_MAINNET") if NETWORK == "mainnet" else os.getenv("RPC_URL_SEPOLIA")
+RPC_URLS = rpc_urls(NETWORK)  # RPC_URLS_<NETZ> (kommagetrennt) + RPC_URL_<NETZ>
 PRIVATE_KEY = os.getenv("PRIVATE_KEY")
-web3 = Web3(Web3.HTTPProvider(RPC_URL))
-
-with open("config.yaml", encoding="utf-8") as f:
-    CONFIG = yaml.safe_load(f)
-
-# --- Dummy Router Interface (Uniswap/SushiV2 getAmountsOut) ---
-ROUTER_ABI = [
-    {
-        "name": "getAmountsOut",
-        "type": "function",
-        "inputs": [
-            {"name": "amountIn", "type": "uint256"},
-            {"name": "path", "type": "address[]"}
-        ],
-        "outputs": [{"name": "amounts", "type": "uint256[]"}],
-        "stateMutability": "view"
-    }
-]
 
-# --- Preis abrufen (async, aber via Thread wegen web3 call) ---
-def get_price(router_address, token0, token1):
+# Kompilierte Config (DEX-/Paar-Records); dexes, pairs & routes.tokens werden zur Laufzeit neu geladen,
+# alle übrigen Abschnitte gelten ab Start
+CONFIG_INDEX = LiveConfig("config.yaml")
+INDEX = CONFIG_INDEX.index
+CONFIG = INDEX.config
+
+# --- RPC: Router über alle Endpoints (async im Event-Loop + Sync-Provider), Hedging & Failover ---
+RPC_CFG = CONFIG.get("rpc", {})
+RPC = RpcRouter(RPC_URLS, max_in_flight=RPC_CFG.get("max_in_flight", DEFAULT_MAX_IN_FLIGHT), **router_options(RPC_CFG))
+web3 = Web3(RouterHTTPProvider(RPC_URLS, **router_options(RPC_CFG)))
+
+# --- Scheduler: ein Scan pro Block ---
+SCHEDULER_CFG = CONFIG.get("scheduler", {})
+
+# --- Pre-Trade-Simulation (eth_simulateV1 oder lokaler Fork), optional ---
+SIM_CFG = CONFIG.get("simulation", {})
+SIMULATOR = TradeSimulator(
+    AsyncRpcClient(SIM_CFG["fork_rpc"]) if SIM_CFG.get("mode") == "fork" else RPC,
+    mode=SIM_CFG.get("mode", "simulate")
+) if SIM_CFG.get("enabled", False) else None
+
+# --- Multicall3-Quoter (alle Quotes eines Ticks in wenigen eth_calls) ---
+MULTICALL_CFG = CONFIG.get("multicall", {})
+QUOTER = MulticallQuoter(
+    async_call_fn=RPC.eth_call,
+    batch_size=MULTICALL_CFG.get("batch_size", DEFAULT_BATCH_SIZE),
+    multicall_address=MULTICALL_CFG.get("address", MULTICALL3_ADDRESS)
+) if MULTICALL_CFG.get("enabled", True) else None
+
+# --- Reserve-Cache: lokale V2-Quotes für DEXe mit bekannter Factory ---
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+RESERVES = ReserveCache()
+# Persistenter Index: Pair-Adressen (inkl. "kein Pool"), Token-Reihenfolge & Decimals
+PAIR_INDEX = PairIndex(CONFIG.get("pair_index", {}).get("path", PAIR_INDEX_PATH))
+
+# --- Multi-Hop-Routen: Graph über alle Pools aller DEXe mit Factory ---
+ROUTES_CFG = CONFIG.get("routes", {})
+ROUTES_ENABLED = ROUTES_CFG.get("enabled", False)
+ROUTE_MIN_HOPS = ROUTES_CFG.get("min_hops", 3)  # 2-Hop-Routen deckt die Spread-Matrix ab
+ROUTE_ALERTS = RouteAlerts(ROUTES_CFG.get("realert_pct", DEFAULT_REALERT_PCT))  # stehende Route nicht jeden Block melden
+
+# --- WETH (Gaskosten-Umrechnung beim Trade-Sizing) ---
+WETH = CONFIG.get("weth", "0x4200000000000000000000000000000000000006").lower()
+GAS = GasOracle()  # Fees pro Block per update_async, Abfragen im Tick ohne RPC-Call
+
+# --- Aus der Config abgeleitete Strukturen (beim Start und nach jedem Reload) ---
+def apply_config(index):
+    global INDEX, CONFIG, FACTORY_BY_ROUTER, DEX_BY_FACTORY, ROUTE_TOKENS, ROUTE_KEYS, ROUTE_GRAPH, SPREADS
+    INDEX = index
+    CONFIG = index.config
+    FACTORY_BY_ROUTER = {dex.router.lower(): dex.factory for dex in index.dexes if dex.router and dex.factory}
+    DEX_BY_FACTORY = {key: dex.name for key, dex in index.dex_by_factory.items()}
+    ROUTE_TOKENS = sorted(set(index.tokens) | {checksum(t) for t in CONFIG.get("routes", {}).get("tokens", [])})
+    ROUTE_KEYS = {
+        PairIndex.key(factory, a, b)
+        for factory in DEX_BY_FACTORY for a, b in combinations(ROUTE_TOKENS, 2)
+    } if ROUTES_ENABLED else set()
+    ROUTE_GRAPH = RouteGraph(RESERVES)  # Pools beim nächsten Tick aus ROUTE_KEYS neu setzen
+    # Spread-Matrix: Zeilen = Paare, Spalten = DEXe
+    SPREADS = SpreadEngine(len(index.pairs), list(index.dex_names))
+
+apply_config(INDEX)
+CONFIG_INDEX.subscribe(apply_config)
+
+# --- Metriken (/metrics, siehe metrics.serve_from_config) ---
+SCAN_TICK = METRICS.histogram("scan_tick_seconds", "Dauer eines Scan-Durchlaufs (ein Block)")
+OPPORTUNITIES = METRICS.counter("scanner_opportunities_total", "Autotrade-Treffer nach Ergebnis", ("outcome",))
+
+# --- Standard-Quote-Menge: 1 Token0 (Decimals aus dem Pair-Index, Default 18) ---
+def quote_amount(token):
+    return 10 ** PAIR_INDEX.decimals(token, 18)
+
+# --- Roh-Betrag -> Token-Einheiten ---
+def to_units(amount, token):
+    return Decimal(amount).scaleb(-PAIR_INDEX.decimals(token, 18))
+
+# --- Decimals aller konfigurierten Tokens einmalig auflösen (danach aus dem Index) ---
+async def load_token_metadata():
+    tokens = PAIR_INDEX.missing_decimals(INDEX.tokens)
+    if tokens and QUOTER is not None:
+        PAIR_INDEX.set_decimals(await QUOTER.decimals_async(tokens))
+
+# --- Preis abrufen (einzelne Quote, async über den RPC-Client) ---
+@traced("get_price")
+async def get_price(router_address, token0, token1, amount_in=None):
     try:
-        router = web3.eth.contract(address=Web3.to_checksum_address(router_address), abi=ROUTER_ABI)
-        amount_in = Web3.to_wei(1, 'ether')  # 1 Token0
-        amounts = router.functions.getAmountsOut(amount_in, [token0, token1]).call()
-        return Web3.from_wei(amounts[1], 'ether')
+        amount_in = amount_in or quote_amount(token0)
+        data = INDEX.amounts_out_data(amount_in, token0, token1)
+        amounts = decode_get_amounts_out(await RPC.eth_call(checksum(router_address), data))
+        return to_units(amounts[-1], token1)
     except Exception as e:
         logging.debug(f"Preisfehler: {e}")
         return None
@@ -51,98 +136,433 @@ def calculate_spread(a, b):
         return 0
     return abs(a - b) / min(a, b) * 100
 
-# --- Router-Adresse holen (KORRIGIERT: router, nicht factory) ---
+# --- Router-Adresse holen (checksummed, Dict-Lookup im ConfigIndex) ---
 def get_router(name):
-    for dex in CONFIG['dexes']:
-        if dex['name'] == name:
-            return dex['router']
-    return None
+    return INDEX.router(name)
 
 # --- Trade auslösen inkl. Telegram-Callback (Bot Notification) ---
-def trigger_trade(user_id, token0, token1, dex_a, dex_b, spread, bot_notify=None):
-    print(f"🔥 Trade ausgelöst für User {user_id}: {token0[:6]}/{token1[:6]} von {dex_a} → {dex_b} ({spread:.2f}%)")
+def run_trade(*args, **kwargs):
     # Importiere execute_trade nur hier (Importzyklen vermeiden)
     from trade_executor import execute_trade
+    return execute_trade(*args, **kwargs)
+
+# --- Ausführungs-Queue: eine Lane pro Wallet, begrenzt, Dedup & Staleness ---
+TRADE_QUEUE_CFG = CONFIG.get("trade_queue", {})
+TRADES = TradeQueue(
+    run_trade,
+    max_pending=TRADE_QUEUE_CFG.get("max_pending", DEFAULT_MAX_PENDING),
+    workers=TRADE_QUEUE_CFG.get("workers", DEFAULT_WORKERS),
+    max_age_blocks=TRADE_QUEUE_CFG.get("max_age_blocks", DEFAULT_MAX_AGE_BLOCKS),
+)
+TRADES.export_metrics()
 
+def trigger_trade(user_id, token0, token1, dex_a, dex_b, spread, bot_notify=None, amount_in=None, expected_profit=None, block=None):
+    print(f"🔥 Trade ausgelöst für User {user_id}: {token0[:6]}/{token1[:6]} von {dex_a} → {dex_b} ({spread:.2f}%)")
     router_a = get_router(dex_a)
     router_b = get_router(dex_b)
 
     # Lambda zum Telegram-Benachrichtigen
-    # (bot_notify ist ein async-callback, z.B. vom Bot)
+    # (bot_notify ist ein async-callback, z.B. vom Bot; läuft aus dem Trade-Thread)
+    loop = asyncio.get_event_loop()
+
     def notify(uid, msg):
         if bot_notify:
-            asyncio.run_coroutine_threadsafe(
-                bot_notify(uid, msg), asyncio.get_event_loop()
-            )
+            asyncio.run_coroutine_threadsafe(bot_notify(uid, msg), loop)
         else:
             print(f"[{uid}] {msg}")
 
-    # In eigenem Thread ausführen (executor kann blocken)
-    loop = asyncio.get_event_loop()
-    loop.run_in_executor(
-        None,
-        execute_trade,
-        user_id, token0, token1, router_a, router_b, 1,
-        notify
-    )
+    # In die Lane der Wallet einreihen (executor kann blocken)
+    key = (user_id, token0.lower(), token1.lower(), dex_a, dex_b)
+    if not TRADES.submit(
+        user_id, key,
+        user_id, token0, token1, router_a, router_b, 1, notify,
+        amount_in=amount_in, expected_profit=expected_profit, block=block
+    ):
+        OPPORTUNITIES.labels("not_queued").inc()
+        logging.info(f"[User {user_id}] Trade {key[1][:6]}/{key[2][:6]} nicht eingereiht (Duplikat oder Queue voll)")
+
+# --- Plan eines Users: welche Quotes er braucht und wofür (Slot in der Spread-Matrix) ---
+# Liefert ([(quote, (pair_id, dex_idx))], watch) oder ([], None), wenn der User nichts beobachtet
+def plan_user(user_id, state):
+    dex_names = [d for d in state.get("dexes", []) if get_router(d) and d in SPREADS.dex_index]
+    # Gespeicherte States können älter als die Config sein: unbekannte Paare ignorieren
+    pair_ids = [i for i in state.get("pairs", []) if INDEX.pair(i)]
+
+    if len(dex_names) < 2 or not pair_ids:
+        return [], None
+    try:
+        spread_limit = float(state.get("spread", 1.0))
+    except (TypeError, ValueError):
+        return [], None  # z.B. "CUSTOM_PENDING": Eingabe im Bot noch offen
+
+    entries = []
+    for pair_id in pair_ids:
+        pair = INDEX.pairs[pair_id]
+        amount = quote_amount(pair.token0)
+        for name in dex_names:
+            q = (get_router(name), pair.token0, pair.token1, amount)
+            entries.append((q, (pair_id, SPREADS.dex_index[name])))
+
+    return entries, {
+        "user_id": user_id,
+        "dexes": dex_names,
+        "dex_idx": [SPREADS.dex_index[name] for name in dex_names],
+        "pairs": pair_ids,
+        "spread_limit": spread_limit,
+        "autotrade": state.get("autotrade", False),
+    }
+
+# --- Tick-Plan bauen: eindeutige Quotes über alle User (kompletter Neuaufbau) ---
+# Liefert (quotes, watches):
+#   quotes  = {(router, token0, token1, amount): {(pair_id, dex_idx)}} – jede Quote genau einmal
+#   watches = Liste pro User mit DEX-/Paar-Auswahl und Spread-Limit
+def build_quote_plan(states):
+    quotes = {}
+    watches = []
+
+    for user_id, state in list(states.items()):
+        entries, watch = plan_user(user_id, state)
+        if watch is None:
+            continue
+        for q, slot in entries:
+            quotes.setdefault(q, set()).add(slot)
+        watches.append(watch)
+
+    return quotes, watches
+
+# --- Watch-Set: inkrementell aus den Änderungen des StateStores (einmal alle, dann nur Diffs) ---
+WATCHES = WatchSet(plan_user)
+STATE.subscribe(WATCHES.update)
+
+# --- Spreads gegen den Abo-Index: nur Märkte bewegter Paare werden neu bewertet ---
+# Liefert [(watch, pair_id, spread, sell_dex, buy_dex)] für alle überschrittenen Limits
+@traced("evaluate_spreads")
+def evaluate_spreads(prices, slots, index):
+    SPREADS.clear()
+    rows, cols, values = [], [], []
+    for q, price in prices.items():
+        if price is None:
+            continue
+        for pair_id, dex_idx in slots.get(q, ()):
+            rows.append(pair_id)
+            cols.append(dex_idx)
+            values.append(float(price))
+    if values:
+        SPREADS.set_prices(rows, cols, values)
+
+    return [
+        (watch, p, spread, SPREADS.dex_names[sell], SPREADS.dex_names[buy])
+        for watch, p, spread, sell, buy in index.match(SPREADS.prices, SPREADS.moved())
+    ]
+
+# --- Pair-Key einer Quote (nur wenn die Factory des Routers bekannt ist) ---
+def pair_key(quote):
+    router, token0, token1, _ = quote
+    factory = FACTORY_BY_ROUTER.get(router.lower())
+    if not factory:
+        return None
+    return PairIndex.key(factory, token0, token1)
+
+# --- Reserve-Cache aktuell halten: Sync-Logs seit letztem Block + neue Pools laden ---
+# Liefert (geänderte Pairs, neue Pools hinzugekommen?)
+async def sync_reserves(keys, head=None):
+    if head is None:
+        head = await RPC.block_number()
+    changed = set()
+
+    if len(RESERVES) and RESERVES.last_block is not None and head > RESERVES.last_block:
+        logs = await RPC.request("eth_getLogs", [RESERVES.filter_params(RESERVES.last_block + 1, head)])
+        changed = RESERVES.apply_logs(logs)
 
-# --- Scanner Loop ---
+    # Pair-Adressen nur auflösen, wenn sie nicht schon im persistenten Index stehen
+    lookups = PAIR_INDEX.missing(keys)
+    if lookups:
+        resolved = await QUOTER.pair_addresses_async(lookups)
+        PAIR_INDEX.set_pairs({
+            key: None if pair == ZERO_ADDRESS else pair
+            for key, pair in resolved.items()
+            if pair is not None  # None = Call-Fehler -> nächster Tick versucht es erneut
+        })
+
+    # Neue Pools einmalig mit getReserves füllen, danach nur noch über Sync-Events;
+    # auf head gepinnt, damit Snapshot und Log-Fenster (bis head) genau aneinanderschließen
+    new_pools = {
+        pair: key for key in keys
+        if (pair := PAIR_INDEX.pair(*key)) and pair not in RESERVES
+    }
+    added = False
+    if new_pools:
+        for pair, reserves in (await QUOTER.reserves_async(new_pools, block=head)).items():
+            if reserves is not None:
+                _, token0, token1 = new_pools[pair]
+                RESERVES.set_pool(pair, token0, token1, reserves[0], reserves[1], block=head)
+                added = True
+
+    RESERVES.last_block = head
+    return changed, added
+
+# --- Reserves für den Tick aktualisieren (Quotes + Routen-Graph) ---
+@traced("refresh_reserves")
+async def refresh_reserves(quotes, head=None):
+    if QUOTER is None or not (FACTORY_BY_ROUTER or ROUTE_KEYS):
+        return
+    try:
+        changed, added = await sync_reserves({key for key in map(pair_key, quotes) if key} | ROUTE_KEYS, head)
+    except Exception as e:
+        logging.warning(f"Reserve-Sync fehlgeschlagen, nutze Router-Quotes: {e}")
+        return
+
+    if ROUTES_ENABLED:
+        if added or not len(ROUTE_GRAPH):
+            ROUTE_GRAPH.set_pools(
+                (pair, DEX_BY_FACTORY[key[0]], key[1], key[2])
+                for key in ROUTE_KEYS if (pair := PAIR_INDEX.pair(*key)) and pair in RESERVES
+            )
+        elif changed:
+            ROUTE_GRAPH.update(changed)
+
+# --- Multi-Hop-Zyklen gegen denselben User-Filter wie die Spread-Matrix prüfen ---
+# Liefert [(watch, cycle)]: Suche im Teilgraph der DEXe & Tokens des Users (gleiche Auswahl = eine Suche),
+# Routen ab ROUTE_MIN_HOPS, Profit >= Spread-Limit
+def match_routes(watches):
+    if not ROUTE_GRAPH.has_cycle():
+        return []
+    groups = {}
+    for watch in watches:
+        tokens = frozenset(
+            t.lower() for i in watch["pairs"]
+            for t in (INDEX.pairs[i].token0, INDEX.pairs[i].token1)
+        )
+        if len(tokens) >= ROUTE_MIN_HOPS:  # ein Zyklus mit k Hops braucht k Tokens
+            groups.setdefault((frozenset(watch["dexes"]), tokens), []).append(watch)
+    return [
+        (watch, cycle)
+        for (dexes, tokens), group in groups.items()
+        for cycle in ROUTE_GRAPH.find_cycles(ROUTE_MIN_HOPS, dexes=dexes, tokens=tokens)
+        for watch in group
+        if cycle["profit_pct"] >= watch["spread_limit"]
+    ]
+
+# --- Router-Quotes (Multicall3-Batches) für alles, was nicht lokal berechnet werden kann ---
+async def fetch_router_quotes(quotes):
+    if QUOTER is None:
+        # Fallback ohne Multicall3: alle eth_calls als ein JSON-RPC-Batch
+        replies = await RPC.batch([
+            ("eth_call", [{"to": checksum(router), "data": Web3.to_hex(INDEX.amounts_out_data(amount, token0, token1))}, "latest"])
+            for router, token0, token1, amount in quotes
+        ])
+        prices = {}
+        for q, reply in zip(quotes, replies):
+            try:
+                if isinstance(reply, RpcError):
+                    raise reply
+                prices[q] = to_units(decode_get_amounts_out(Web3.to_bytes(hexstr=reply))[-1], q[2])
+            except Exception as e:
+                logging.debug(f"Preisfehler: {e}")
+                prices[q] = None
+        return prices
+
+    amounts = await QUOTER.amounts_out_async(quotes)
+    return {
+        q: to_units(amount, q[2]) if amount is not None else None
+        for q, amount in amounts.items()
+    }
+
+# --- Alle Quotes des Plans einmalig holen: lokal aus Reserves, Rest über Router ---
+@traced("fetch_quotes")
+async def fetch_quotes(quotes):
+    quotes = list(quotes)
+    prices = {}
+    remote = []
+    for q in quotes:
+        key = pair_key(q)
+        pair = PAIR_INDEX.pair(*key) if key else None
+        hit = bool(pair) and pair in RESERVES
+        cache_lookup("reserves", hit)
+        if hit:
+            amount = RESERVES.quote(pair, q[1], q[3])
+            prices[q] = to_units(amount, q[2]) if amount is not None else None
+        else:
+            remote.append(q)
+
+    if remote:
+        prices.update(await fetch_router_quotes(remote))
+    return prices
+
+# --- Reserves eines Pools in Richtung token_in (None wenn nicht im Cache) ---
+def pool_reserves(dex_name, token_in, token0, token1):
+    router = get_router(dex_name)
+    key = pair_key((router, token0, token1, 0)) if router else None
+    pair = PAIR_INDEX.pair(*key) if key else None
+    if not pair or pair not in RESERVES:
+        return None
+    return RESERVES.reserves(pair, token_in)
+
+# --- Gaskosten (wei) in token0-Einheiten umrechnen ---
+def gas_in_token0(gas_wei, token0, token1, a_in, a_out):
+    if token0.lower() == WETH:
+        return gas_wei
+    if token1.lower() == WETH:
+        return gas_wei * a_in // a_out
+    return 0  # kein WETH im Paar: Gas nicht umrechenbar, Profit brutto
+
+# --- Optimale Trade-Größe für alle Kandidaten (Screening vektorisiert, Ergebnis exakt) ---
+# candidates: [(token0, token1, dex_a, dex_b)] -> [(amount_in, expected_profit)],
+# (None, None) wenn die Reserves eines Pools nicht bekannt sind
+@traced("size_trades")
+async def size_trades(candidates, block=None):
+    results = [(None, None)] * len(candidates)
+    rows, idx = [], []
+    gas_wei = None
+    for i, (token0, token1, dex_a, dex_b) in enumerate(candidates):
+        ra = pool_reserves(dex_a, token0, token0, token1)  # token0 -> token1 auf A
+        rb = pool_reserves(dex_b, token1, token0, token1)  # token1 -> token0 auf B
+        if not ra or not rb:
+            continue
+        if gas_wei is None:
+            # Höchstens ein eth_feeHistory pro Block, danach aus dem Cache
+            await GAS.update_async(RPC, block)
+            gas_wei = DEFAULT_TRADE_GAS * GAS.gas_price()
+        rows.append((*ra, *rb, gas_in_token0(gas_wei, token0, token1, *ra)))
+        idx.append(i)
+
+    if rows:
+        _, profits = optimal_trades(*np.array(rows, dtype=float).T)
+        for row, i, profit in zip(rows, idx, profits):
+            results[i] = optimal_trade(*row[:4], gas_cost=row[4]) if profit > 0 else (0, 0)
+    return results
+
+# --- Wallet-Adresse eines Users (Signer-Registry des Executors, einmal geladen) ---
+def wallet_address(user_id):
+    from trade_executor import SIGNERS
+    account = SIGNERS.account(user_id)
+    return account.address if account else None
+
+# --- Alle gesizten Trades eines Ticks parallel simulieren ---
+# trades: [(user_id, token0, token1, dex_a, dex_b, amount_in)] -> [(ok, net_profit, error)]
+@traced("simulate_trades")
+async def simulate_trades(trades):
+    results = [(False, None, "Reserves/Wallet unbekannt")] * len(trades)
+    requests, idx, gas_args = [], [], []
+    for i, (user_id, token0, token1, dex_a, dex_b, amount_in) in enumerate(trades):
+        ra = pool_reserves(dex_a, token0, token0, token1)
+        sender = wallet_address(user_id)
+        if not ra or not sender:
+            continue
+        amount_mid = get_amount_out(amount_in, *ra)
+        requests.append((sender, token0, token1, get_router(dex_a), get_router(dex_b), amount_in, amount_mid))
+        idx.append(i)
+        gas_args.append((token0, token1, *ra))
+
+    gas_price = GAS.gas_price() or 0
+    for i, args, sim in zip(idx, gas_args, await SIMULATOR.simulate_many(requests)):
+        if not sim["ok"]:
+            results[i] = (False, None, sim["error"])
+            continue
+        net = sim["profit"] - gas_in_token0(sim["gas_used"] * gas_price, *args)
+        results[i] = (net > 0, net, None if net > 0 else "Profit unter Gas")
+    return results
+
+# --- Ein Scan-Durchlauf (pro neuem Block) ---
+async def scan_tick(block=None, bot_notify=None):
+    TRADES.set_block(block)
+    # config.yaml geändert: Decimals neuer Tokens laden, dann alle User gegen die neuen Indizes planen
+    if CONFIG_INDEX.poll():
+        try:
+            await load_token_metadata()
+        except Exception as e:
+            logging.warning(f"Token-Decimals nicht geladen, nutze 18: {e}")
+        WATCHES.rebuild(STATE.snapshot)
+    # Nur User neu planen, deren Einstellungen sich seit dem letzten Tick geändert haben
+    STATE.poll()
+    quotes, watches = WATCHES.plan()
+
+    # Reserve-Cache (Sync-Events) & Routen-Graph aktualisieren
+    await refresh_reserves(quotes, head=block)
+
+    # Jede (router, token0, token1, amount)-Quote nur einmal pro Tick abfragen
+    prices = await fetch_quotes(quotes) if quotes else {}
+
+    # Treffer aus dem Markt-Index (ein bisect pro bewegtem Markt statt Schleife über alle User)
+    hits = []
+    for watch, pair_id, best_spread, dex_a, dex_b in evaluate_spreads(prices, quotes, WATCHES.index):
+        pair = INDEX.pairs[pair_id]
+        logging.info(f"[User {watch['user_id']}] Best Spread {best_spread:.2f}% bei {pair.name} zwischen {dex_a} und {dex_b}")
+        if watch["autotrade"]:
+            hits.append((watch["user_id"], pair.token0, pair.token1, dex_a, dex_b, best_spread))
+
+    if hits:
+        try:
+            sizes = await size_trades([(t0, t1, a, b) for _, t0, t1, a, b, _ in hits], block)
+        except Exception as e:
+            logging.warning(f"Trade-Sizing fehlgeschlagen: {e}")
+            sizes = [(None, None)] * len(hits)
+
+        # Vor dem Senden durchspielen: Reverts & unprofitable Trades kosten kein Gas
+        sims = {}
+        if SIMULATOR is not None:
+            sized = [(h[:5], a) for h, (a, _) in zip(hits, sizes) if a]
+            try:
+                sims = dict(zip(
+                    [k for k, _ in sized],
+                    await simulate_trades([(*k, a) for k, a in sized])
+                ))
+            except Exception as e:
+                logging.warning(f"Simulation fehlgeschlagen: {e}")
+                sims = {k: (False, None, str(e)) for k, _ in sized}
+
+        for (user_id, token0, token1, dex_a, dex_b, best_spread), (amount_in, expected_profit) in zip(hits, sizes):
+            if amount_in == 0 or (expected_profit is not None and expected_profit <= 0):
+                OPPORTUNITIES.labels("unprofitable").inc()
+                logging.info(f"[User {user_id}] Spread {best_spread:.2f}% nach Slippage & Gas nicht profitabel – kein Trade")
+                continue
+            sim = sims.get((user_id, token0, token1, dex_a, dex_b))
+            if sim is not None:
+                ok, net, error = sim
+                if not ok:
+                    OPPORTUNITIES.labels("simulation_rejected").inc()
+                    logging.info(f"[User {user_id}] Simulation verworfen: {error}")
+                    continue
+                expected_profit = net
+            OPPORTUNITIES.labels("triggered").inc()
+            trigger_trade(
+                user_id, token0, token1, dex_a, dex_b, best_spread, bot_notify=bot_notify,
+                amount_in=amount_in, expected_profit=expected_profit, block=block
+            )
+
+    # Multi-Hop-Zyklen (nur Meldung, der Executor handelt bisher nur zwei DEXe)
+    if ROUTES_ENABLED and watches:
+        for watch, cycle in ROUTE_ALERTS.filter(match_routes(watches)):
+            route = " → ".join(f"{t[:6]}" for t in cycle["tokens"])
+            msg = f"🔁 Route {route} über {', '.join(cycle['dexes'])}: +{cycle['profit_pct']:.2f}% (vor Slippage)"
+            logging.info(f"[User {watch['user_id']}] {msg}")
+            if bot_notify:
+                await bot_notify(watch["user_id"], msg)
+
+# --- Scanner Loop: genau ein Scan pro neuem Block ---
 async def scan_loop(bot_notify=None):
     print("🚀 Async High-Speed Scanner gestartet...")
-    while True:
-        tasks = []
+    serve_from_config(CONFIG, "scanner")
+    try:
+        await load_token_metadata()
+    except Exception as e:
+        logging.warning(f"Token-Decimals nicht geladen, nutze 18: {e}")
+    WATCHES.rebuild(STATE.snapshot)  # Quote-Mengen hängen von den Decimals ab
 
-        for user_id, state in user_state.items():
-            dex_names = list(state.get("dexes", []))
-            pair_ids = list(state.get("pairs", []))
-            spread_limit = float(state.get("spread", 1.0))
-            autotrade = state.get("autotrade", False)
+    scheduler = BlockScheduler(
+        RPC.block_number,
+        poll_interval=SCHEDULER_CFG.get("block_poll_interval", DEFAULT_POLL_INTERVAL),
+        overrun=SCHEDULER_CFG.get("overrun", "coalesce")
+    )
 
-            if len(dex_names) < 2 or not pair_ids:
-                continue
+    async def scan(block):
+        with SCAN_TICK.time():
+            await scan_tick(block, bot_notify=bot_notify)
+        if scheduler.scans and scheduler.scans % 100 == 0:
+            logging.info(f"Scheduler: {scheduler.stats()}")
+            logging.info(f"Trade-Queue: {TRADES.metrics()}")
 
-            for pair_id in pair_ids:
-                pair = CONFIG['pairs'][pair_id]
-                token0 = Web3.to_checksum_address(pair['token0'])
-                token1 = Web3.to_checksum_address(pair['token1'])
-                name = pair.get("name", f"{token0[:6]}/{token1[:6]}")
-
-                best_spread = 0
-                best_combo = None
-
-                combinations = [
-                    (a, b) for i, a in enumerate(dex_names)
-                    for j, b in enumerate(dex_names) if i < j
-                ]
-
-                # Preise für alle DEXe gleichzeitig holen (async)
-                price_tasks = []
-                for a, b in combinations:
-                    ra = get_router(a)
-                    rb = get_router(b)
-                    if not ra or not rb:
-                        continue
-                    # Threaded, da Web3 nicht async
-                    price_tasks.append((
-                        (a, b),
-                        asyncio.to_thread(get_price, ra, token0, token1),
-                        asyncio.to_thread(get_price, rb, token0, token1)
-                    ))
-
-                for (dex_a, dex_b), t1, t2 in price_tasks:
-                    price_a, price_b = await asyncio.gather(t1, t2)
-                    spread = calculate_spread(price_a, price_b)
-                    if spread >= spread_limit and spread > best_spread:
-                        best_spread = spread
-                        best_combo = (dex_a, dex_b)
-
-                if best_combo:
-                    dex_a, dex_b = best_combo
-                    logging.info(f"[User {user_id}] Best Spread {best_spread:.2f}% bei {name} zwischen {dex_a} und {dex_b}")
-                    if autotrade:
-                        trigger_trade(user_id, token0, token1, dex_a, dex_b, best_spread, bot_notify=bot_notify)
-
-        await asyncio.sleep(5)  # Etwas längeres Intervall, damit Sepolia-Rate-Limits nicht greifen
+    await scheduler.run(scan)
 
 # --- Main für Standalone-Test ---
 if __name__ == "__main__":
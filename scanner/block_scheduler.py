@@ -0,0 +1,108 @@
+"""
+BlockScheduler: genau ein Scan pro neuem Block statt fester Sleep-Intervalle
+
+Pollt eth_blockNumber (ein billiger Call) und startet pro neuem Block einen Scan.
+Läuft ein Scan noch, wenn der nächste Block kommt, wird er je nach Policy abgebrochen
+("cancel") oder der neue Block nach Ende des laufenden Scans nachgeholt ("coalesce",
+mehrere wartende Blöcke werden zu einem Scan auf dem neuesten zusammengefasst).
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+
+DEFAULT_POLL_INTERVAL = 1.0
+
+class BlockScheduler:
+    def __init__(self, block_number_fn, poll_interval=DEFAULT_POLL_INTERVAL, overrun="coalesce", history=1000):
+        """
+        :param block_number_fn: awaitable () -> int, z.B. AsyncRpcClient.block_number
+        :param poll_interval: Sekunden zwischen zwei eth_blockNumber-Polls
+        :param overrun: "coalesce" oder "cancel" für Scans, die in den nächsten Block laufen
+        :param history: Anzahl gespeicherter Latenzen für die Perzentile
+        """
+        if overrun not in ("coalesce", "cancel"):
+            raise ValueError(f"Unbekannte Overrun-Policy: {overrun}")
+        self.block_number_fn = block_number_fn
+        self.poll_interval = poll_interval
+        self.overrun = overrun
+        self.latencies = deque(maxlen=history)  # Block gesehen -> Scan fertig (Sekunden)
+        self.last_block = None
+        self.scans = 0
+        self.cancelled = 0
+        self.coalesced = 0
+        self.missed = 0  # Blöcke, die zwischen zwei Polls ganz übersprungen wurden
+        self._pending = None
+        self._task = None
+
+    async def _scan(self, scan_fn, block, seen):
+        try:
+            await scan_fn(block)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.warning(f"Scan für Block {block} fehlgeschlagen: {e}")
+        self.latencies.append(time.perf_counter() - seen)
+        self.scans += 1
+
+    async def _worker(self, scan_fn, block, seen):
+        while True:
+            await self._scan(scan_fn, block, seen)
+            if self._pending is None:
+                return
+            (block, seen), self._pending = self._pending, None
+
+    def on_block(self, scan_fn, block):
+        """
+        Neuen Block einplanen (auch direkt nutzbar, z.B. aus einer newHeads-Subscription)
+        """
+        if self.last_block is not None and block <= self.last_block:
+            return
+        if self.last_block is not None:
+            self.missed += block - self.last_block - 1
+        self.last_block = block
+        seen = time.perf_counter()
+
+        if self._task is not None and not self._task.done():
+            if self.overrun == "cancel":
+                self._task.cancel()
+                self.cancelled += 1
+            else:
+                if self._pending is not None:
+                    self.coalesced += 1
+                self._pending = (block, seen)
+                return
+        self._task = asyncio.ensure_future(self._worker(scan_fn, block, seen))
+
+    async def run(self, scan_fn):
+        """
+        :param scan_fn: async (block) -> None, ein Scan-Durchlauf
+        """
+        try:
+            while True:
+                try:
+                    self.on_block(scan_fn, await self.block_number_fn())
+                except Exception as e:
+                    logging.warning(f"eth_blockNumber fehlgeschlagen: {e}")
+                await asyncio.sleep(self.poll_interval)
+        finally:
+            if self._task is not None:
+                self._task.cancel()
+
+    def stats(self):
+        lat = sorted(self.latencies)
+
+        def pct(p):
+            return lat[min(len(lat) - 1, int(p / 100 * len(lat)))] * 1000 if lat else None
+
+        return {
+            "last_block": self.last_block,
+            "scans": self.scans,
+            "cancelled": self.cancelled,
+            "coalesced": self.coalesced,
+            "missed_blocks": self.missed,
+            "latency_ms_p50": pct(50),
+            "latency_ms_p95": pct(95),
+            "latency_ms_max": lat[-1] * 1000 if lat else None,
+        }
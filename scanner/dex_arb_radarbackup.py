@@ -4,21 +4,51 @@ DexArbRadar: Multi-DEX Arbitrage Scanner with Telegram Alerts
 """
 
 import asyncio
+import os
+import sys
+import time
 import yaml
 import logging
+import numpy as np
 from web3 import Web3
 from telegram import Bot
 from typing import Optional
 
+# Repo root on the path so scanner.* imports also work when started from scanner/
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scanner.reserve_cache import ReserveCache, sort_tokens
+from scanner.pair_index import PairIndex, DEFAULT_PATH as PAIR_INDEX_PATH
+from scanner.spread_engine import SpreadEngine
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+PAIR_ABI = [
+    {
+        "constant": True,
+        "inputs": [],
+        "name": "getReserves",
+        "outputs": [
+            {"name": "_reserve0", "type": "uint112"},
+            {"name": "_reserve1", "type": "uint112"},
+            {"name": "_blockTimestampLast", "type": "uint32"}
+        ],
+        "type": "function"
+    }
+]
+
 class Dex:
-    def __init__(self, name: str, factory_addr: str, w3: Web3) -> None:
+    def __init__(self, name: str, factory_addr: str, w3: Web3, cache: ReserveCache, index: PairIndex) -> None:
         """
         :param name: Name of the DEX (e.g., "UniswapV2")
         :param factory_addr: Factory contract address
         :param w3: Web3 instance
+        :param cache: shared reserve cache, kept current via Sync events
+        :param index: persistent pair-address index (survives restarts)
         """
         self.name = name
         self.w3 = w3
+        self.cache = cache
+        self.index = index
+        self.factory_addr = factory_addr
         # Convert to checksum address
         address = Web3.to_checksum_address(factory_addr)
         self.factory = w3.eth.contract(
@@ -37,49 +67,80 @@ class Dex:
             ]
         )
 
+    def pair_address(self, token0: str, token1: str) -> Optional[str]:
+        """
+        Resolve the pair address once; it never changes after deployment
+        """
+        if not self.index.known(self.factory_addr, token0, token1):
+            pair_addr = self.factory.functions.getPair(token0, token1).call()
+            self.index.set_pairs({
+                (self.factory_addr, token0, token1): None if pair_addr == ZERO_ADDRESS else pair_addr
+            })
+        return self.index.pair(self.factory_addr, token0, token1)
+
     async def price(self, token0: str, token1: str) -> Optional[float]:
         """
-        Fetch price token1 per token0 on this DEX
+        Price token1 per token0 on this DEX, computed from cached reserves
         :returns: price or None if no pool exists
         """
-        pair_addr = self.factory.functions.getPair(token0, token1).call()
-        if pair_addr == "0x0000000000000000000000000000000000000000":
+        pair_addr = self.pair_address(token0, token1)
+        if pair_addr is None:
             return None
 
-        pair = self.w3.eth.contract(
-            address=pair_addr,
-            abi=[
-                {
-                    "constant": True,
-                    "inputs": [],
-                    "name": "getReserves",
-                    "outputs": [
-                        {"name": "_reserve0", "type": "uint112"},
-                        {"name": "_reserve1", "type": "uint112"},
-                        {"name": "_blockTimestampLast", "type": "uint32"}
-                    ],
-                    "type": "function"
-                },
-                {
-                    "constant": True,
-                    "inputs": [],
-                    "name": "token0",
-                    "outputs": [{"name": "", "type": "address"}],
-                    "type": "function"
-                }
-            ]
-        )
-        r0, r1, _ = pair.functions.getReserves().call()
-        t0_addr = pair.functions.token0().call()
-        return (r1 / r0) if (t0_addr.lower() == token0.lower()) else (r0 / r1)
+        if pair_addr not in self.cache:
+            # Initial fill only; afterwards reserves are updated from Sync events
+            block = self.w3.eth.block_number
+            pair = self.w3.eth.contract(address=pair_addr, abi=PAIR_ABI)
+            r0, r1, _ = pair.functions.getReserves().call(block_identifier=block)
+            self.cache.set_pool(pair_addr, *sort_tokens(token0, token1), r0, r1, block=block)
+            if self.cache.last_block is None:
+                self.cache.last_block = block
 
-async def monitor_pair(cfg: dict, dex_objs: list, bot: Optional[Bot]) -> None:
+        reserve_in, reserve_out = self.cache.reserves(pair_addr, token0)
+        if reserve_in == 0:
+            return None
+        return reserve_out / reserve_in
+
+def sync_reserves(w3: Web3, cache: ReserveCache, head: int) -> set:
+    """
+    Apply all Sync events up to head
+    :returns: set of pairs whose reserves changed
+    """
+    changed = set()
+    if len(cache) and cache.last_block is not None and head > cache.last_block:
+        changed = cache.apply_logs(w3.eth.get_logs(cache.filter_params(cache.last_block + 1, head)))
+    cache.last_block = head
+    return changed
+
+async def monitor_pair(cfg: dict, dex_objs: list, bot: Optional[Bot], cache: ReserveCache) -> None:
     t0 = Web3.to_checksum_address(cfg["pairs"][0]["token0"])
     t1 = Web3.to_checksum_address(cfg["pairs"][0]["token1"])
     threshold = cfg["threshold_spread"] / 100.0
-    interval = cfg["poll_interval"]
+    interval = cfg.get("block_poll_interval", 1.0)
+    w3 = dex_objs[0].w3
+    last_block = None
 
     while True:
+        # One scan per new block: poll the head and skip blocks we already scanned
+        try:
+            head = w3.eth.block_number
+        except Exception as e:
+            logging.warning(f"Block number error: {e}")
+            await asyncio.sleep(interval)
+            continue
+        if head == last_block:
+            await asyncio.sleep(interval)
+            continue
+        if last_block is not None and head > last_block + 1:
+            logging.info(f"Missed {head - last_block - 1} block(s) before {head}")
+        last_block = head
+        block_seen = time.perf_counter()
+
+        try:
+            sync_reserves(w3, cache, head)
+        except Exception as e:
+            logging.warning(f"Sync event error: {e}")
+
         prices = {}
         for dex in dex_objs:
             try:
@@ -90,24 +151,26 @@ async def monitor_pair(cfg: dict, dex_objs: list, bot: Optional[Bot]) -> None:
             except Exception as e:
                 logging.warning(f"{dex.name} error: {e}")
 
+        # All pairwise spreads in one vectorized pass (upper triangle = each DEX pair once)
         names = list(prices.keys())
-        for i in range(len(names)):
-            for j in range(i + 1, len(names)):
-                a, b = names[i], names[j]
-                pa, pb = prices[a], prices[b]
-                spread = abs(pa - pb) / min(pa, pb)
-                if spread >= threshold:
-                    msg = (
-                        f"🚨 Arbitrage Alert 🚨\n"
-                        f"{a}: {pa:.6f}\n"
-                        f"{b}: {pb:.6f}\n"
-                        f"Spread: {spread*100:.2f}%"
-                    )
-                    logging.info(msg.replace("\n", " | "))
-                    if bot:
-                        await bot.send_message(cfg["telegram"]["chat_id"], msg)
-
-        await asyncio.sleep(interval)
+        engine = SpreadEngine(1, names)
+        engine.set_prices([0] * len(names), range(len(names)), [prices[n] for n in names])
+        spreads = engine.pairwise()[0] / 100
+        for i, j in zip(*np.nonzero(np.triu(spreads >= threshold, k=1))):
+            a, b = names[i], names[j]
+            pa, pb = prices[a], prices[b]
+            spread = spreads[i, j]
+            msg = (
+                f"🚨 Arbitrage Alert 🚨\n"
+                f"{a}: {pa:.6f}\n"
+                f"{b}: {pb:.6f}\n"
+                f"Spread: {spread*100:.2f}%"
+            )
+            logging.info(msg.replace("\n", " | "))
+            if bot:
+                await bot.send_message(cfg["telegram"]["chat_id"], msg)
+
+        logging.debug(f"Block {head} scanned in {(time.perf_counter() - block_seen) * 1000:.1f} ms")
 
 async def main() -> None:
     cfg = yaml.safe_load(open("config.yaml"))
@@ -116,14 +179,16 @@ async def main() -> None:
     if not w3.is_connected():
         raise ConnectionError("Unable to connect to RPC endpoint.")
 
-    dex_objs = [Dex(d["name"], d["factory"], w3) for d in cfg["dexes"]]
+    cache = ReserveCache()
+    index = PairIndex(cfg.get("pair_index", {}).get("path", PAIR_INDEX_PATH))
+    dex_objs = [Dex(d["name"], d["factory"], w3, cache, index) for d in cfg["dexes"]]
 
     bot = None
     token = cfg.get("telegram", {}).get("bot_token")
     if token:
         bot = Bot(token=token)
 
-    await monitor_pair(cfg, dex_objs, bot)
+    await monitor_pair(cfg, dex_objs, bot, cache)
 
 if __name__ == "__main__":
     logging.basicConfig(
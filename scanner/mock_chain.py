@@ -0,0 +1,139 @@
+"""
+MockChain: lokaler Stand-in für Router, Pairs und Multicall3 (Offline-Tests ohne RPC)
+"""
+
+from eth_abi import decode, encode
+from web3 import Web3
+from scanner.quote_engine import (
+    MULTICALL3_ADDRESS,
+    AGGREGATE3_SELECTOR,
+    GET_AMOUNTS_OUT_SELECTOR,
+    GET_RESERVES_SELECTOR,
+    GET_PAIR_SELECTOR,
+    DECIMALS_SELECTOR,
+)
+from scanner.reserve_cache import SYNC_TOPIC, get_amount_out
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+class MockRevert(Exception):
+    pass
+
+# --- Uniswap-V2 getAmountOut (0.3% Fee, Integer-Mathe wie im Router) ---
+def v2_amount_out(amount_in, reserve_in, reserve_out):
+    try:
+        return get_amount_out(amount_in, reserve_in, reserve_out)
+    except ValueError as e:
+        raise MockRevert(str(e))
+
+class MockChain:
+    def __init__(self, multicall_address=MULTICALL3_ADDRESS):
+        self.multicall = multicall_address.lower()
+        self.routers = {}   # router -> {(tokenA, tokenB): pair}
+        self.factories = {} # factory -> {(tokenA, tokenB): pair}
+        self.tokens = {}    # token -> decimals
+        self.pairs = {}     # pair -> {"token0", "token1", "reserve0", "reserve1", "ts"}
+        self.failing = set()
+        self.calls = 0      # Anzahl "RPC"-Roundtrips
+        self.block = 0
+        self.logs = []      # emittierte Sync-Logs (rohes JSON-RPC-Format)
+
+    # --- Setup ---
+    def add_pool(self, router, pair, token0, token1, reserve0, reserve1, ts=0, factory=None):
+        router, pair = router.lower(), pair.lower()
+        token0, token1 = token0.lower(), token1.lower()
+        self.pairs[pair] = {"token0": token0, "token1": token1, "reserve0": reserve0, "reserve1": reserve1, "ts": ts}
+        pools = self.routers.setdefault(router, {})
+        pools[(token0, token1)] = pair
+        pools[(token1, token0)] = pair
+        if factory:
+            pools = self.factories.setdefault(factory.lower(), {})
+            pools[(token0, token1)] = pair
+            pools[(token1, token0)] = pair
+
+    def add_token(self, token, decimals=18):
+        self.tokens[token.lower()] = decimals
+
+    def mine(self):
+        self.block += 1
+        return self.block
+
+    def set_reserves(self, pair, reserve0, reserve1, ts=0):
+        # Wie ein Swap: Reserves ändern und Sync-Log im aktuellen Block emittieren
+        self.pairs[pair.lower()].update(reserve0=reserve0, reserve1=reserve1, ts=ts)
+        self.logs.append({
+            "address": Web3.to_checksum_address(pair),
+            "topics": [SYNC_TOPIC],
+            "data": Web3.to_hex(encode(["uint112", "uint112"], [reserve0, reserve1])),
+            "blockNumber": hex(self.block),
+            "logIndex": hex(len(self.logs)),
+            "removed": False,
+        })
+
+    # --- eth_getLogs Stand-in ---
+    def get_logs(self, params):
+        self.calls += 1
+        addresses = {a.lower() for a in params.get("address", [])}
+        start = int(params.get("fromBlock", "0x0"), 16)
+        end = self.block if params.get("toBlock", "latest") == "latest" else int(params["toBlock"], 16)
+        return [
+            log for log in self.logs
+            if start <= int(log["blockNumber"], 16) <= end
+            and (not addresses or log["address"].lower() in addresses)
+        ]
+
+    def fail(self, target):
+        # Alle Calls an target reverten (Fehler-Isolation testen)
+        self.failing.add(target.lower())
+
+    # --- eth_call Stand-in: (to, data[, block]) -> bytes ---
+    def call(self, to, data, block="latest"):
+        # Keine Historie: gelesen wird immer der aktuelle Stand, Blöcke nach dem Head sind unbekannt
+        self.calls += 1
+        if block != "latest" and int(block, 16) > self.block:
+            raise ValueError(f"header not found ({block})")
+        return self._dispatch(to.lower(), bytes(data))
+
+    async def call_async(self, to, data, block="latest"):
+        return self.call(to, data, block)
+
+    def _dispatch(self, to, data):
+        if to in self.failing:
+            raise MockRevert(f"execution reverted ({to})")
+        selector, args = data[:4], data[4:]
+
+        if to == self.multicall and selector == AGGREGATE3_SELECTOR:
+            results = []
+            for target, allow_failure, calldata in decode(["(address,bool,bytes)[]"], args)[0]:
+                try:
+                    results.append((True, self._dispatch(target.lower(), bytes(calldata))))
+                except MockRevert:
+                    if not allow_failure:
+                        raise
+                    results.append((False, b""))
+            return encode(["(bool,bytes)[]"], [results])
+
+        if to in self.routers and selector == GET_AMOUNTS_OUT_SELECTOR:
+            amount_in, path = decode(["uint256", "address[]"], args)
+            amounts = [amount_in]
+            for a, b in zip(path, path[1:]):
+                pair = self.routers[to].get((a.lower(), b.lower()))
+                if pair is None:
+                    raise MockRevert("UniswapV2Library: PAIR_NOT_FOUND")
+                p = self.pairs[pair]
+                r_in, r_out = (p["reserve0"], p["reserve1"]) if p["token0"] == a.lower() else (p["reserve1"], p["reserve0"])
+                amounts.append(v2_amount_out(amounts[-1], r_in, r_out))
+            return encode(["uint256[]"], [amounts])
+
+        if to in self.factories and selector == GET_PAIR_SELECTOR:
+            token_a, token_b = decode(["address", "address"], args)
+            return encode(["address"], [self.factories[to].get((token_a.lower(), token_b.lower()), ZERO_ADDRESS)])
+
+        if to in self.tokens and selector == DECIMALS_SELECTOR:
+            return encode(["uint8"], [self.tokens[to]])
+
+        if to in self.pairs and selector == GET_RESERVES_SELECTOR:
+            p = self.pairs[to]
+            return encode(["uint112", "uint112", "uint32"], [p["reserve0"], p["reserve1"], p["ts"]])
+
+        raise MockRevert(f"unbekannter Call {Web3.to_hex(selector)} an {to}")
@@ -0,0 +1,107 @@
+"""
+PairIndex: persistenter Index für unveränderliche Pool-Metadaten (SQLite)
+
+- factory + Tokens -> Pair-Adresse (inkl. Negativ-Einträgen für nicht existierende Pools)
+- Token-Reihenfolge (token0 < token1, wie in Uniswap V2) und Token-Decimals
+Beim Start komplett in den Speicher geladen; pro Tick keine Lookups für Bekanntes.
+"""
+
+import os
+import sqlite3
+import time
+from scanner.reserve_cache import sort_tokens
+
+DEFAULT_PATH = os.path.join("data", "pair_index.sqlite")
+NEGATIVE_TTL = 24 * 3600  # nicht existierende Pools nach 1 Tag erneut prüfen
+
+class PairIndex:
+    def __init__(self, path=DEFAULT_PATH, negative_ttl=NEGATIVE_TTL):
+        """
+        :param path: SQLite-Datei (":memory:" für Tests)
+        :param negative_ttl: Sekunden, bis ein "kein Pool"-Eintrag neu geprüft wird
+        """
+        self.negative_ttl = negative_ttl
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS pairs (
+                factory TEXT NOT NULL,
+                token0 TEXT NOT NULL,
+                token1 TEXT NOT NULL,
+                pair TEXT,
+                checked_at REAL NOT NULL,
+                PRIMARY KEY (factory, token0, token1)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS tokens (
+                address TEXT PRIMARY KEY,
+                decimals INTEGER NOT NULL
+            ) WITHOUT ROWID;
+        """)
+        self._pairs = {
+            (factory, token0, token1): (pair, checked_at)
+            for factory, token0, token1, pair, checked_at in self.db.execute("SELECT * FROM pairs")
+        }
+        self._decimals = dict(self.db.execute("SELECT address, decimals FROM tokens"))
+
+    def close(self):
+        self.db.close()
+
+    @staticmethod
+    def key(factory, token_a, token_b):
+        return (factory.lower(), *sort_tokens(token_a, token_b))
+
+    # --- Pairs ---
+    def known(self, factory, token_a, token_b):
+        entry = self._pairs.get(self.key(factory, token_a, token_b))
+        if entry is None:
+            return False
+        pair, checked_at = entry
+        return pair is not None or time.time() - checked_at < self.negative_ttl
+
+    def pair(self, factory, token_a, token_b):
+        """
+        :returns: Pair-Adresse oder None (kein Pool bzw. unbekannt)
+        """
+        entry = self._pairs.get(self.key(factory, token_a, token_b))
+        return entry[0] if entry else None
+
+    def missing(self, lookups):
+        # lookups: Iterable aus (factory, tokenA, tokenB) -> alle noch nicht (gültig) bekannten
+        return {self.key(*lookup) for lookup in lookups if not self.known(*lookup)}
+
+    def set_pairs(self, resolved):
+        """
+        :param resolved: {(factory, tokenA, tokenB): Pair-Adresse oder None für "kein Pool"}
+        """
+        now = time.time()
+        rows = []
+        for lookup, pair in resolved.items():
+            key = self.key(*lookup)
+            self._pairs[key] = (pair, now)
+            rows.append((*key, pair, now))
+        if rows:
+            with self.db:
+                self.db.executemany("INSERT OR REPLACE INTO pairs VALUES (?, ?, ?, ?, ?)", rows)
+
+    def pairs(self):
+        # Alle existierenden Pools: {(factory, token0, token1): pair}
+        return {key: pair for key, (pair, _) in self._pairs.items() if pair}
+
+    # --- Token-Decimals ---
+    def decimals(self, token, default=None):
+        return self._decimals.get(token.lower(), default)
+
+    def refresh_decimals(self):
+        # Decimals, die ein anderer Prozess (Scanner) inzwischen aufgelöst hat, nachladen
+        self._decimals.update(self.db.execute("SELECT address, decimals FROM tokens"))
+
+    def missing_decimals(self, tokens):
+        return {t.lower() for t in tokens if t.lower() not in self._decimals}
+
+    def set_decimals(self, resolved):
+        rows = [(token.lower(), int(dec)) for token, dec in resolved.items() if dec is not None]
+        self._decimals.update(rows)
+        if rows:
+            with self.db:
+                self.db.executemany("INSERT OR REPLACE INTO tokens VALUES (?, ?)", rows)
@@ -0,0 +1,280 @@
+"""
+MulticallQuoter: bündelt getAmountsOut/getReserves eines Ticks in Multicall3-aggregate3-Batches
+"""
+
+import asyncio
+import logging
+from web3 import Web3
+
+# --- Multicall3 (gleiche Adresse auf Mainnet, Sepolia & fast allen EVM-Chains) ---
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+DEFAULT_BATCH_SIZE = 100
+
+# --- Selektoren (einmalig berechnet) ---
+AGGREGATE3_SELECTOR = Web3.keccak(text="aggregate3((address,bool,bytes)[])")[:4]
+GET_AMOUNTS_OUT_SELECTOR = Web3.keccak(text="getAmountsOut(uint256,address[])")[:4]
+GET_RESERVES_SELECTOR = Web3.keccak(text="getReserves()")[:4]
+GET_PAIR_SELECTOR = Web3.keccak(text="getPair(address,address)")[:4]
+DECIMALS_SELECTOR = Web3.keccak(text="decimals()")[:4]
+ALLOWANCE_SELECTOR = Web3.keccak(text="allowance(address,address)")[:4]
+
+# --- Calldata bauen / Ergebnisse dekodieren ---
+# Fester ABI-Layout per Byte-Konkatenation bzw. int.from_bytes statt eth_abi (Hot-Path je Quote);
+# bitgleich zu eth_abi encode/decode, siehe benchmarks/bench_codec.py
+WORD = 32
+_OFFSET_2_WORDS = (2 * WORD).to_bytes(WORD, "big")  # Offset des dynamischen Teils nach 2 Kopf-Wörtern
+_OFFSET_1_WORD = WORD.to_bytes(WORD, "big")
+_TRUE = (1).to_bytes(WORD, "big")
+
+def _word(value):
+    return value.to_bytes(WORD, "big")
+
+def _address(address):
+    raw = address if isinstance(address, bytes) else bytes.fromhex(address[2:])
+    if len(raw) != 20:
+        raise ValueError(f"Keine Adresse: {address!r}")
+    return bytes(12) + raw
+
+def _uint(data, offset=0):
+    if len(data) < offset + WORD:
+        raise ValueError(f"Zu kurz: {len(data)} Bytes, Wort bei {offset} erwartet")
+    return int.from_bytes(data[offset:offset + WORD], "big")
+
+def encode_get_amounts_out(amount_in, path):
+    return (
+        GET_AMOUNTS_OUT_SELECTOR + _word(amount_in) + _OFFSET_2_WORDS + _word(len(path))
+        + b"".join(map(_address, path))
+    )
+
+def decode_get_amounts_out(data):
+    # uint256[]: Offset, Länge, Elemente
+    start = _uint(data) + WORD
+    n = _uint(data, start - WORD)
+    if len(data) < start + n * WORD:
+        raise ValueError(f"Zu kurz für {n} Beträge: {len(data)} Bytes")
+    return tuple(int.from_bytes(data[i:i + WORD], "big") for i in range(start, start + n * WORD, WORD))
+
+def encode_get_reserves():
+    return GET_RESERVES_SELECTOR
+
+def decode_get_reserves(data):
+    # (uint112 reserve0, uint112 reserve1, uint32 blockTimestampLast)
+    return _uint(data), _uint(data, WORD), _uint(data, 2 * WORD)
+
+def encode_get_pair(token_a, token_b):
+    return GET_PAIR_SELECTOR + _address(token_a) + _address(token_b)
+
+def decode_get_pair(data):
+    _uint(data)  # Länge prüfen
+    return Web3.to_checksum_address("0x" + data[12:WORD].hex())
+
+def encode_decimals():
+    return DECIMALS_SELECTOR
+
+def decode_decimals(data):
+    return _uint(data)
+
+def encode_allowance(owner, spender):
+    return ALLOWANCE_SELECTOR + _address(owner) + _address(spender)
+
+def decode_allowance(data):
+    return _uint(data)
+
+def encode_aggregate3(calls):
+    # calls: [(target, calldata)] – allowFailure immer True (Fehler pro Call isoliert)
+    # (address,bool,bytes)[]: Offset, Länge, ein Kopf-Offset pro Tupel, dann die Tupel
+    heads, tails, offset = [], [], len(calls) * WORD
+    for target, data in calls:
+        padded = data + bytes(-len(data) % WORD)
+        tail = _address(target) + _TRUE + _word(3 * WORD) + _word(len(data)) + padded
+        heads.append(_word(offset))
+        tails.append(tail)
+        offset += len(tail)
+    return AGGREGATE3_SELECTOR + _OFFSET_1_WORD + _word(len(calls)) + b"".join(heads) + b"".join(tails)
+
+def decode_aggregate3(data):
+    # (bool success, bytes returnData)[]
+    base = _uint(data) + WORD
+    n = _uint(data, base - WORD)
+    results = []
+    for i in range(n):
+        start = base + _uint(data, base + i * WORD)
+        success = _uint(data, start)
+        ret = start + _uint(data, start + WORD)
+        size = _uint(data, ret)
+        if len(data) < ret + WORD + size + (-size % WORD):
+            raise ValueError(f"returnData {i} abgeschnitten")
+        results.append((success != 0, data[ret + WORD:ret + WORD + size]))
+    return tuple(results)
+
+# --- Quoting Engine: packt alle Calls eines Ticks in aggregate3-Batches ---
+class MulticallQuoter:
+    def __init__(self, call_fn=None, batch_size=DEFAULT_BATCH_SIZE, multicall_address=MULTICALL3_ADDRESS, async_call_fn=None):
+        """
+        :param call_fn: blockierender eth_call (to, data) -> bytes, z.B. web3 oder MockChain
+        :param batch_size: max. Anzahl Sub-Calls pro aggregate3
+        :param async_call_fn: awaitable eth_call (to, data) -> bytes, z.B. AsyncRpcClient.eth_call
+        Mit block wird (to, data, block) aufgerufen, die Call-Funktion muss den Block dann annehmen.
+        """
+        self.call_fn = call_fn
+        self.async_call_fn = async_call_fn
+        self.batch_size = max(1, int(batch_size))
+        self.address = Web3.to_checksum_address(multicall_address)
+
+    def _encode_batch(self, batch):
+        return encode_aggregate3([(t, d) for t, d, _ in batch])
+
+    @staticmethod
+    def _decode_batch(batch, raw):
+        try:
+            results = decode_aggregate3(bytes(raw))
+        except Exception as e:
+            logging.debug(f"Multicall-Antwort nicht dekodierbar: {e}")
+            return [None] * len(batch)
+
+        decoded = []
+        for (target, _, decoder), (success, ret) in zip(batch, results):
+            if not success or not ret:
+                decoded.append(None)
+                continue
+            try:
+                decoded.append(decoder(ret))
+            except Exception as e:
+                logging.debug(f"Dekodierfehler bei {target}: {e}")
+                decoded.append(None)
+        return decoded
+
+    @staticmethod
+    def _block_args(block):
+        # Ohne Block bleibt es beim Default der Call-Funktion ("latest")
+        return () if block is None else (hex(block) if isinstance(block, int) else block,)
+
+    def _run_batch(self, batch, block=None):
+        # Ein eth_call pro Batch; schlägt der ganze Batch fehl, sind alle Ergebnisse None
+        try:
+            raw = self.call_fn(self.address, self._encode_batch(batch), *self._block_args(block))
+        except Exception as e:
+            logging.debug(f"Multicall-Batch fehlgeschlagen: {e}")
+            return [None] * len(batch)
+        return self._decode_batch(batch, raw)
+
+    async def _run_batch_async(self, batch, block=None):
+        if self.async_call_fn is None:
+            # Threaded, da call_fn blockiert
+            return await asyncio.to_thread(self._run_batch, batch, block)
+        try:
+            raw = await self.async_call_fn(self.address, self._encode_batch(batch), *self._block_args(block))
+        except Exception as e:
+            logging.debug(f"Multicall-Batch fehlgeschlagen: {e}")
+            return [None] * len(batch)
+        return self._decode_batch(batch, raw)
+
+    def _batches(self, calls):
+        return [calls[i:i + self.batch_size] for i in range(0, len(calls), self.batch_size)]
+
+    def aggregate(self, calls):
+        """
+        :param calls: Liste aus (target, calldata, decoder)
+        :returns: Liste der dekodierten Ergebnisse (None bei Fehler), gleiche Reihenfolge
+        """
+        results = []
+        for batch in self._batches(calls):
+            results.extend(self._run_batch(batch))
+        return results
+
+    async def aggregate_async(self, calls, block=None):
+        """
+        :param block: Blocknummer, auf die alle eth_calls gepinnt werden (None = "latest")
+        """
+        # Batches parallel, ohne Threads sobald async_call_fn gesetzt ist
+        batches = await asyncio.gather(*[
+            self._run_batch_async(batch, block) for batch in self._batches(calls)
+        ])
+        return [r for batch in batches for r in batch]
+
+    # --- Komfort: Router-Quotes & Pair-Reserves ---
+    @staticmethod
+    def _amounts_out_calls(quotes):
+        return [
+            (router, encode_get_amounts_out(amount, [token0, token1]), decode_get_amounts_out)
+            for router, token0, token1, amount in quotes
+        ]
+
+    @staticmethod
+    def _reserves_calls(pairs):
+        return [(pair, encode_get_reserves(), decode_get_reserves) for pair in pairs]
+
+    @staticmethod
+    def _pair_calls(lookups):
+        return [
+            (factory, encode_get_pair(token_a, token_b), decode_get_pair)
+            for factory, token_a, token_b in lookups
+        ]
+
+    @staticmethod
+    def _decimals_calls(tokens):
+        return [(token, encode_decimals(), decode_decimals) for token in tokens]
+
+    @staticmethod
+    def _allowance_calls(triples):
+        return [
+            (token, encode_allowance(owner, spender), decode_allowance)
+            for owner, token, spender in triples
+        ]
+
+    @staticmethod
+    def _amount_out(result):
+        return result[-1] if result else None
+
+    def amounts_out(self, quotes):
+        """
+        :param quotes: Iterable aus (router, token0, token1, amount_in)
+        :returns: {quote: amount_out (int) oder None}
+        """
+        quotes = list(quotes)
+        results = self.aggregate(self._amounts_out_calls(quotes))
+        return {q: self._amount_out(r) for q, r in zip(quotes, results)}
+
+    async def amounts_out_async(self, quotes):
+        quotes = list(quotes)
+        results = await self.aggregate_async(self._amounts_out_calls(quotes))
+        return {q: self._amount_out(r) for q, r in zip(quotes, results)}
+
+    def reserves(self, pairs):
+        """
+        :param pairs: Iterable aus Pair-Adressen
+        :returns: {pair: (reserve0, reserve1, blockTimestampLast) oder None}
+        """
+        pairs = list(pairs)
+        return dict(zip(pairs, self.aggregate(self._reserves_calls(pairs))))
+
+    async def reserves_async(self, pairs, block=None):
+        """
+        :param block: Reserves auf genau diesem Block lesen (passend zu den Sync-Logs bis dahin)
+        """
+        pairs = list(pairs)
+        return dict(zip(pairs, await self.aggregate_async(self._reserves_calls(pairs), block)))
+
+    async def pair_addresses_async(self, lookups):
+        """
+        :param lookups: Iterable aus (factory, tokenA, tokenB)
+        :returns: {lookup: Pair-Adresse (Zero-Address wenn kein Pool) oder None bei Fehler}
+        """
+        lookups = list(lookups)
+        return dict(zip(lookups, await self.aggregate_async(self._pair_calls(lookups))))
+
+    async def decimals_async(self, tokens):
+        """
+        :param tokens: Iterable aus ERC20-Adressen
+        :returns: {token: decimals oder None bei Fehler}
+        """
+        tokens = list(tokens)
+        return dict(zip(tokens, await self.aggregate_async(self._decimals_calls(tokens))))
+
+    def allowances(self, triples):
+        """
+        :param triples: Iterable aus (owner, token, spender)
+        :returns: {triple: allowance (int) oder None bei Fehler}
+        """
+        triples = list(triples)
+        return dict(zip(triples, self.aggregate(self._allowance_calls(triples))))
@@ -0,0 +1,114 @@
+"""
+ReserveCache: Uniswap-V2-Reserves pro Pair-Adresse, aktuell gehalten über Sync-Events
+
+Quotes werden lokal mit der exakten Router-Mathe (0.3% Fee, Integer) berechnet –
+kein RPC-Call pro Quote, Refresh nur wenn ein Pool wirklich ein Sync-Event emittiert.
+"""
+
+from web3 import Web3
+
+# --- Sync(uint112 reserve0, uint112 reserve1) ---
+SYNC_TOPIC = Web3.to_hex(Web3.keccak(text="Sync(uint112,uint112)"))
+
+# --- UniswapV2Library.getAmountOut (identisch zum Router, inkl. Rundung) ---
+def get_amount_out(amount_in, reserve_in, reserve_out):
+    if amount_in <= 0:
+        raise ValueError("UniswapV2Library: INSUFFICIENT_INPUT_AMOUNT")
+    if reserve_in <= 0 or reserve_out <= 0:
+        raise ValueError("UniswapV2Library: INSUFFICIENT_LIQUIDITY")
+    amount_in_with_fee = amount_in * 997
+    return (amount_in_with_fee * reserve_out) // (reserve_in * 1000 + amount_in_with_fee)
+
+# --- V2 sortiert Token nach Adresse: token0 ist immer die kleinere ---
+def sort_tokens(token_a, token_b):
+    a, b = token_a.lower(), token_b.lower()
+    return (a, b) if a < b else (b, a)
+
+def _to_int(value):
+    if isinstance(value, int):
+        return value
+    if isinstance(value, (bytes, bytearray)):
+        return int.from_bytes(value, "big")
+    return int(value, 16)
+
+def _to_bytes(value):
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value)
+    return Web3.to_bytes(hexstr=value)
+
+class ReserveCache:
+    def __init__(self):
+        self.pools = {}         # pair -> {"token0", "token1", "reserve0", "reserve1", "pos"}
+        self.last_block = None  # letzter Block, bis zu dem Sync-Logs angewendet wurden
+
+    def __contains__(self, pair):
+        return pair.lower() in self.pools
+
+    def __len__(self):
+        return len(self.pools)
+
+    # --- Pool mit Start-Reserves aufnehmen (z.B. aus Multicall getReserves) ---
+    def set_pool(self, pair, token0, token1, reserve0, reserve1, block=0):
+        self.pools[pair.lower()] = {
+            "token0": token0.lower(),
+            "token1": token1.lower(),
+            "reserve0": reserve0,
+            "reserve1": reserve1,
+            "pos": (block, -1),
+        }
+
+    def reserves(self, pair, token_in):
+        """
+        :returns: (reserve_in, reserve_out) in Richtung token_in -> anderes Token
+        """
+        p = self.pools[pair.lower()]
+        if p["token0"] == token_in.lower():
+            return p["reserve0"], p["reserve1"]
+        return p["reserve1"], p["reserve0"]
+
+    def quote(self, pair, token_in, amount_in):
+        """
+        getAmountsOut-Äquivalent für einen Hop, rein lokal
+        :returns: amount_out oder None bei unbekanntem / leerem Pool
+        """
+        if pair.lower() not in self.pools:
+            return None
+        try:
+            return get_amount_out(amount_in, *self.reserves(pair, token_in))
+        except ValueError:
+            return None
+
+    # --- Sync-Events anwenden ---
+    def filter_params(self, from_block, to_block="latest"):
+        # eth_getLogs-Filter für alle gecachten Pairs
+        return {
+            "address": [Web3.to_checksum_address(p) for p in self.pools],
+            "topics": [SYNC_TOPIC],
+            "fromBlock": hex(from_block) if isinstance(from_block, int) else from_block,
+            "toBlock": hex(to_block) if isinstance(to_block, int) else to_block,
+        }
+
+    def apply_logs(self, logs):
+        """
+        Wendet Sync-Logs an (web3-AttributeDicts oder rohe JSON-RPC-Logs).
+        Ältere Logs als der gecachte Stand werden ignoriert.
+        :returns: Set der Pairs, deren Reserves sich geändert haben
+        """
+        changed = set()
+        for log in logs:
+            topics = log["topics"]
+            if not topics or Web3.to_hex(_to_bytes(topics[0])) != SYNC_TOPIC:
+                continue
+            pair = log["address"].lower()
+            p = self.pools.get(pair)
+            if p is None or log.get("removed"):
+                continue
+            pos = (_to_int(log["blockNumber"]), _to_int(log["logIndex"]))
+            if pos <= p["pos"]:
+                continue
+            data = _to_bytes(log["data"])
+            reserve0, reserve1 = int.from_bytes(data[:32], "big"), int.from_bytes(data[32:64], "big")
+            if (reserve0, reserve1) != (p["reserve0"], p["reserve1"]):
+                changed.add(pair)
+            p.update(reserve0=reserve0, reserve1=reserve1, pos=pos)
+        return changed
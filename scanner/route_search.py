@@ -0,0 +1,322 @@
+"""
+RouteGraph: Multi-Hop-Zyklus-Arbitrage über alle gecachten V2-Pools
+
+Jeder Pool liefert zwei gerichtete Kanten mit Gewicht -log(γ · r_out / r_in).
+Ein negativer Zyklus ist eine Route (z.B. WETH→USDC→PEPE→WETH), deren Produkt der
+Grenzkurse > 1 ist. Suche per Bellman-Ford/SPFA über Kanten-Arrays (NumPy),
+Frontier-basiert und inkrementell: ändern sich nur einige Reserves, werden nur die
+betroffenen Knoten neu relaxiert (has_cycle).
+
+find_cycles sucht im Teilgraph der erlaubten DEXe/Tokens. Ab min_hops 3 läuft die Suche
+ohne Rückweg – Knoten ist die Kante, über die ein Token erreicht wurde, und kein Schritt
+führt direkt zum Vorgänger-Token zurück. Ein 2-Hop-Arb über parallele Pools verdeckt damit
+keine längeren Routen. Nach jedem Suchlauf fallen die Kanten der gefundenen Zyklen weg, der
+nächste Lauf findet die übrigen.
+"""
+
+import math
+import numpy as np
+
+LOG_FEE = math.log(0.997)
+EPS = 1e-12
+DEFAULT_MAX_SEARCHES = 8  # Suchläufe pro find_cycles
+DEFAULT_REALERT_PCT = 0.5  # Profit-Änderung (Prozentpunkte), ab der eine stehende Route erneut gemeldet wird
+
+class RouteGraph:
+    def __init__(self, cache):
+        """
+        :param cache: ReserveCache, aus dem die Kantengewichte gelesen werden
+        """
+        self.cache = cache
+        self.set_pools([])
+
+    # --- Pool-Set setzen (selten): baut Knoten- und Kanten-Arrays neu ---
+    def set_pools(self, pools):
+        """
+        :param pools: Iterable aus (pair, dex_name, token0, token1)
+        """
+        pools = [(pair.lower(), dex, t0.lower(), t1.lower()) for pair, dex, t0, t1 in pools]
+        self.pairs = [p[0] for p in pools]
+        self.pool_dex = [p[1] for p in pools]
+        self.pool_index = {pair: i for i, pair in enumerate(self.pairs)}
+        self.token_list = sorted({t for p in pools for t in p[2:]})
+        self.tokens = {t: i for i, t in enumerate(self.token_list)}
+
+        t0 = np.array([self.tokens[p[2]] for p in pools], dtype=np.intp)
+        t1 = np.array([self.tokens[p[3]] for p in pools], dtype=np.intp)
+        # Kante 2i: token0 -> token1, Kante 2i+1: token1 -> token0
+        self.src = np.empty(2 * len(pools), dtype=np.intp)
+        self.dst = np.empty(2 * len(pools), dtype=np.intp)
+        self.src[0::2], self.dst[0::2] = t0, t1
+        self.src[1::2], self.dst[1::2] = t1, t0
+        self.pool = np.repeat(np.arange(len(pools), dtype=np.intp), 2)
+        self.weight = np.full(2 * len(pools), np.inf)
+        self._update_weights(np.arange(len(pools), dtype=np.intp))
+        self._build_turns()
+        self._reset()
+
+    def __len__(self):
+        return len(self.pairs)
+
+    def _build_turns(self):
+        # Übergänge Kante e1 -> e2 (dst[e1] == src[e2]), außer e2 führt zurück zu src[e1]
+        order = np.argsort(self.src, kind="stable")
+        bounds = np.searchsorted(self.src[order], np.arange(len(self.token_list) + 1))
+        first, second = [np.empty(0, dtype=np.intp)], [np.empty(0, dtype=np.intp)]
+        for e in range(len(self.src)):
+            v = self.dst[e]
+            out = order[bounds[v]:bounds[v + 1]]
+            out = out[self.dst[out] != self.src[e]]
+            first.append(np.full(len(out), e, dtype=np.intp))
+            second.append(out)
+        self.turn_src = np.concatenate(first)
+        self.turn_dst = np.concatenate(second)
+
+    def _reset(self):
+        n = len(self.token_list)
+        self.dist = np.zeros(n)
+        self.pred = np.full(n, -1, dtype=np.intp)
+        self.frontier = np.ones(n, dtype=bool)
+
+    def _update_weights(self, pool_idx):
+        for i in pool_idx.tolist():
+            p = self.cache.pools.get(self.pairs[i])
+            r0, r1 = (p["reserve0"], p["reserve1"]) if p else (0, 0)
+            if r0 > 0 and r1 > 0:
+                lr = math.log(r1) - math.log(r0)
+                self.weight[2 * i] = -(LOG_FEE + lr)
+                self.weight[2 * i + 1] = -(LOG_FEE - lr)
+            else:
+                self.weight[2 * i] = self.weight[2 * i + 1] = np.inf
+
+    # --- Inkrementell: nur geänderte Pools neu gewichten, betroffene Knoten neu relaxieren ---
+    def update(self, changed_pairs):
+        idx = np.array([self.pool_index[p.lower()] for p in changed_pairs if p.lower() in self.pool_index], dtype=np.intp)
+        if not len(idx):
+            return
+        edges = np.concatenate([2 * idx, 2 * idx + 1])
+        old = self.weight[edges].copy()
+        self._update_weights(idx)
+        new = self.weight[edges]
+
+        # Billiger gewordene Kanten: deren Startknoten wieder in die Frontier
+        self.frontier[self.src[edges[new < old]]] = True
+
+        # Teurer gewordene Kanten im Vorgänger-Baum: Teilbaum auf 0 (virtuelle Quelle) zurücksetzen
+        worse = edges[new > old]
+        worse = worse[self.pred[self.dst[worse]] == worse]
+        if len(worse):
+            affected = np.zeros(len(self.token_list), dtype=bool)
+            affected[self.dst[worse]] = True
+            has_pred = self.pred >= 0
+            while True:
+                parents = np.zeros_like(affected)
+                parents[has_pred] = affected[self.src[self.pred[has_pred]]]
+                grown = affected | parents
+                if (grown == affected).all():
+                    break
+                affected = grown
+            self.dist[affected] = 0.0
+            self.pred[affected] = -1
+            self.frontier |= affected
+            # Kanten in zurückgesetzte Knoten können jetzt wieder die besten sein
+            self.frontier[self.src[affected[self.dst]]] = True
+
+    # --- SPFA-Runden über Kanten-Arrays ---
+    def _relax(self, max_rounds):
+        rounds = 0
+        while self.frontier.any() and rounds < max_rounds:
+            e = np.nonzero(self.frontier[self.src])[0]
+            self.frontier[:] = False
+            cand = self.dist[self.src[e]] + self.weight[e]
+            better = cand < self.dist[self.dst[e]] - EPS
+            e, cand = e[better], cand[better]
+            if not len(e):
+                break
+            order = np.argsort(cand, kind="stable")
+            e, cand = e[order], cand[order]
+            nodes, first = np.unique(self.dst[e], return_index=True)
+            self.dist[nodes] = cand[first]
+            self.pred[nodes] = e[first]
+            self.frontier[nodes] = True
+            rounds += 1
+        return self.frontier.any()
+
+    # --- Zyklus-Suche über einen beliebigen Graphen (Token- oder Übergangsgraph) ---
+    def _negative_cycles(self, node_count, s_src, s_dst, s_edge):
+        """
+        Bellman-Ford/SPFA von einer virtuellen Quelle, Abbruch sobald der Vorgänger-Graph
+        einen Zyklus enthält
+        :param s_edge: Basis-Kante (Gewicht) pro Kante des Suchgraphs
+        :returns: Liste geschlossener Wege als Basis-Kanten-Listen
+        """
+        weight = self.weight[s_edge]
+        dist = np.zeros(node_count)
+        pred = np.full(node_count, -1, dtype=np.intp)
+        frontier = np.ones(node_count, dtype=bool)
+        for _ in range(node_count + 1):
+            e = np.nonzero(frontier[s_src])[0]
+            frontier[:] = False
+            cand = dist[s_src[e]] + weight[e]
+            better = cand < dist[s_dst[e]] - EPS
+            e, cand = e[better], cand[better]
+            if not len(e):
+                return []
+            order = np.argsort(cand, kind="stable")
+            e, cand = e[order], cand[order]
+            nodes, first = np.unique(s_dst[e], return_index=True)
+            dist[nodes] = cand[first]
+            pred[nodes] = e[first]
+            frontier[nodes] = True
+            # Ein neuer Zyklus läuft durch einen gerade aktualisierten Knoten
+            walks = self._pred_cycles(pred, s_src, nodes)
+            if walks:
+                return [[int(s_edge[x]) for x in walk] for walk in walks]
+        return []
+
+    @staticmethod
+    def _pred_cycles(pred, s_src, start):
+        n = len(pred)
+        # Pointer-Jumping: nach >= n Schritten steht jeder Knoten in einem Zyklus oder an einer Wurzel
+        parent = np.where(pred >= 0, s_src[np.maximum(pred, 0)], np.arange(n))
+        x, steps = start, 1
+        while steps < n:
+            parent = parent[parent]
+            steps *= 2
+        x = np.unique(parent[x])
+        cycles, seen = [], set()
+        for node in x[pred[x] >= 0].tolist():
+            walk, v = [], node
+            while True:
+                e = int(pred[v])
+                walk.append(e)
+                v = int(s_src[e])
+                if v == node or len(walk) > n:
+                    break
+            key = frozenset(walk)
+            if v != node or key in seen:
+                continue
+            seen.add(key)
+            walk.reverse()
+            cycles.append(walk)
+        return cycles
+
+    def _split(self, walk):
+        # Geschlossenen Weg an wiederholten Tokens in einfache Zyklen zerlegen
+        cycles, path, tokens = [], [], [int(self.src[walk[0]])]
+        for e in walk:
+            v = int(self.dst[e])
+            path.append(e)
+            if v in tokens:
+                i = tokens.index(v)
+                cycles.append(path[i:])
+                del path[i:], tokens[i + 1:]
+            else:
+                tokens.append(v)
+        return cycles
+
+    def _describe(self, edges):
+        pools = [int(self.pool[e]) for e in edges]
+        tokens = [self.token_list[self.src[e]] for e in edges] + [self.token_list[self.dst[edges[-1]]]]
+        rate = math.exp(-float(self.weight[edges].sum()))
+        return {
+            "tokens": tokens,
+            "pairs": [self.pairs[i] for i in pools],
+            "dexes": [self.pool_dex[i] for i in pools],
+            "rate": rate,
+            "profit_pct": (rate - 1) * 100,
+        }
+
+    def has_cycle(self):
+        """
+        Inkrementelle Prüfung, ob der Gesamtgraph irgendeinen profitablen Zyklus enthält.
+        Ohne Zyklus im Gesamtgraph hat auch kein Teilgraph einen – find_cycles kann entfallen.
+        """
+        if not len(self.pairs):
+            return False
+        if not self._relax(max_rounds=len(self.token_list) + 1):
+            return False
+        # Zyklen machen die Distanzen unbrauchbar -> nächster Lauf startet frisch
+        self._reset()
+        return True
+
+    def find_cycles(self, min_hops=2, dexes=None, tokens=None, max_searches=DEFAULT_MAX_SEARCHES):
+        """
+        :param min_hops: kürzere Zyklen werden gar nicht erst gesucht (ab 3: Suche ohne Rückweg)
+        :param dexes: erlaubte DEX-Namen (None = alle)
+        :param tokens: erlaubte Token-Adressen (None = alle)
+        :returns: Liste profitabler Zyklen (Grenzkurs, vor Slippage), jeder als dict mit
+                  tokens, pairs, dexes, rate, profit_pct
+        """
+        if not len(self.pairs):
+            return []
+        allowed = np.isfinite(self.weight)
+        if dexes is not None:
+            dexes = set(dexes)
+            allowed &= np.array([dex in dexes for dex in self.pool_dex], dtype=bool)[self.pool]
+        if tokens is not None:
+            tokens = {t.lower() for t in tokens}
+            known = np.array([t in tokens for t in self.token_list], dtype=bool)
+            allowed &= known[self.src] & known[self.dst]
+
+        cycles, seen = [], set()
+        for _ in range(max_searches):
+            if min_hops >= 3:
+                active = allowed[self.turn_src] & allowed[self.turn_dst]
+                s_src, s_dst = self.turn_src[active], self.turn_dst[active]
+                walks = self._negative_cycles(len(self.src), s_src, s_dst, s_dst)
+            else:
+                active = np.nonzero(allowed)[0]
+                walks = self._negative_cycles(len(self.token_list), self.src[active], self.dst[active], active)
+            if not walks:
+                break
+            for walk in walks:
+                allowed[walk] = False
+                for edges in self._split(walk):
+                    key = frozenset(edges)
+                    if len(edges) < min_hops or key in seen:
+                        continue
+                    seen.add(key)
+                    cycle = self._describe(edges)
+                    if cycle["rate"] > 1:
+                        cycles.append(cycle)
+        return cycles
+
+    def simulate(self, cycle, amount_in):
+        """
+        Exakter Durchlauf eines Zyklus mit Router-Mathe aus dem ReserveCache
+        :returns: amount_out (im Start-Token) oder None
+        """
+        amount = amount_in
+        for pair, token_in in zip(cycle["pairs"], cycle["tokens"]):
+            amount = self.cache.quote(pair, token_in, amount)
+            if not amount:
+                return None
+        return amount
+
+class RouteAlerts:
+    """
+    Dedup der Routen-Meldungen: pro (User, Pool-Set) nur bei neuer Route oder deutlich
+    geändertem Profit. Verschwindet eine Route, gilt sie beim nächsten Auftauchen wieder als neu.
+    """
+    def __init__(self, realert_pct=DEFAULT_REALERT_PCT):
+        self.realert_pct = realert_pct
+        self.alerted = {}  # (user_id, frozenset(pairs)) -> zuletzt gemeldeter profit_pct
+
+    def filter(self, matches):
+        """
+        :param matches: [(watch, cycle)] des aktuellen Ticks
+        :returns: die davon zu meldenden Treffer
+        """
+        alerted, fresh = {}, []
+        for watch, cycle in matches:
+            key = (watch["user_id"], frozenset(cycle["pairs"]))
+            if key in alerted:
+                continue
+            last = self.alerted.get(key)
+            if last is None or abs(cycle["profit_pct"] - last) >= self.realert_pct:
+                fresh.append((watch, cycle))
+                last = cycle["profit_pct"]
+            alerted[key] = last
+        self.alerted = alerted
+        return fresh
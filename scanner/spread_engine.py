@@ -0,0 +1,99 @@
+"""
+SpreadEngine: alle Preise als (Paare × DEXe)-Matrix, Spreads vektorisiert in einem Durchlauf
+
+Spread wie calculate_spread: |a - b| / min(a, b) * 100. Der beste Spread eines
+DEX-Sets ist damit (max - min) / min – Sell-Venue = teuerster, Buy-Venue = günstigster DEX.
+"""
+
+import numpy as np
+
+class SpreadEngine:
+    def __init__(self, pair_count, dex_names):
+        """
+        :param pair_count: Anzahl Paare (Zeilen, Index = CONFIG['pairs']-Index)
+        :param dex_names: DEX-Namen (Spalten)
+        """
+        self.dex_names = list(dex_names)
+        self.dex_index = {name: i for i, name in enumerate(self.dex_names)}
+        self.prices = np.full((pair_count, len(self.dex_names)), np.nan)
+        self._last = None  # Preise beim letzten moved()-Aufruf
+
+    def clear(self):
+        self.prices.fill(np.nan)
+
+    def moved(self):
+        """
+        Paare, deren Preiszeile sich seit dem letzten Aufruf geändert hat (NaN = kein Preis)
+        :returns: Array der Paar-Indizes (beim ersten Aufruf alle)
+        """
+        last, self._last = self._last, self.prices.copy()
+        if last is None or last.shape != self.prices.shape:
+            return np.arange(self.prices.shape[0])
+        same = (last == self.prices) | (np.isnan(last) & np.isnan(self.prices))
+        return np.nonzero(~same.all(axis=1))[0]
+
+    def set_prices(self, pair_idx, dex_idx, values):
+        # Vektorisiertes Setzen: drei gleich lange Sequenzen
+        self.prices[np.asarray(pair_idx, dtype=np.intp), np.asarray(dex_idx, dtype=np.intp)] = np.asarray(values, dtype=float)
+
+    def pairwise(self):
+        """
+        :returns: (P, D, D)-Array aller paarweisen Spreads in % (NaN wo ein Preis fehlt)
+        """
+        a = self.prices[:, :, None]
+        b = self.prices[:, None, :]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.abs(a - b) / np.minimum(a, b) * 100
+
+    def best(self, dex_masks):
+        """
+        Bester Spread pro DEX-Set und Paar
+        :param dex_masks: (S, D) bool – welche DEXe ein Set enthält
+        :returns: spread (S, P) in %
+        """
+        # Layout (D, S, P): Reduktionen laufen über die erste Achse (schnell, zusammenhängend)
+        dex_masks = np.asarray(dex_masks, dtype=bool)
+        prices = np.ascontiguousarray(self.prices.T)
+        has_price = prices > 0  # NaN > 0 ist False
+        valid = dex_masks.T[:, :, None] & has_price[:, None, :]
+        hi = np.where(valid, prices[:, None, :], -np.inf).max(axis=0)
+        lo = np.where(valid, prices[:, None, :], np.inf).min(axis=0)
+        count = dex_masks.astype(np.int16) @ has_price.astype(np.int16)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(count >= 2, (hi - lo) / lo * 100, 0.0)
+
+    def venues(self, dex_masks, pair_idx):
+        """
+        Sell-/Buy-Venue (teuerster / günstigster DEX) – nur für die Treffer berechnet
+        :param dex_masks: (H, D) bool, ein DEX-Set pro Treffer
+        :param pair_idx: (H,) Paar-Index pro Treffer
+        :returns: sell_idx (H,), buy_idx (H,)
+        """
+        prices = self.prices[np.asarray(pair_idx, dtype=np.intp)]
+        valid = np.asarray(dex_masks, dtype=bool) & (prices > 0)
+        sell = np.where(valid, prices, -np.inf).argmax(axis=-1)
+        buy = np.where(valid, prices, np.inf).argmin(axis=-1)
+        return sell, buy
+
+    def scan(self, dex_masks, pair_masks, thresholds):
+        """
+        Ein Durchlauf für alle User: gleiche DEX-Sets werden nur einmal gerechnet,
+        Spread-Limits als Threshold-Vektor gebroadcastet.
+        :param dex_masks: (U, D) bool
+        :param pair_masks: (U, P) bool
+        :param thresholds: (U,) Spread-Limits in %
+        :returns: Liste [(user_idx, pair_idx, spread, sell_idx, buy_idx)] aller Treffer
+        """
+        dex_masks = np.asarray(dex_masks, dtype=bool)
+        if not len(dex_masks):
+            return []
+        # DEX-Sets als Bitmaske -> eindeutige Sets nur einmal rechnen
+        keys = dex_masks @ (1 << np.arange(dex_masks.shape[1], dtype=np.int64))
+        _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        spread = self.best(dex_masks[first])[inverse.reshape(-1)]
+
+        thresholds = np.asarray(thresholds, dtype=float)[:, None]
+        hits = np.asarray(pair_masks, dtype=bool) & (spread > 0) & (spread >= thresholds)
+        users, pairs = np.nonzero(hits)
+        sell, buy = self.venues(dex_masks[users], pairs)
+        return list(zip(users.tolist(), pairs.tolist(), spread[users, pairs].tolist(), sell.tolist(), buy.tolist()))
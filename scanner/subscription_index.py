@@ -0,0 +1,132 @@
+"""
+SubscriptionIndex: invertierter Index Markt -> abonnierte User für den Spread-Check
+
+Ein Markt ist (pair_id, DEX-Set). Pro Markt liegen die Spread-Limits seiner User
+aufsteigend sortiert; nach einem Preis-Update liefert ein bisect alle User, deren Limit
+überschritten ist. Neu berechnet werden nur Märkte, deren Paar sich bewegt hat oder deren
+Abos sich geändert haben – die Arbeit pro Tick skaliert mit bewegten Märkten, nicht mit Usern.
+
+    index.add(watch)                      # watch: user_id, pairs, dex_idx, spread_limit
+    hits = index.match(SPREADS.prices, SPREADS.moved())
+"""
+
+from bisect import bisect_left, bisect_right, insort
+
+class Market:
+    __slots__ = ("pair_id", "dex_idx", "thresholds", "watches", "count", "spread", "sell", "buy")
+
+    def __init__(self, pair_id, dex_idx):
+        self.pair_id = pair_id
+        self.dex_idx = dex_idx   # sortierte DEX-Spalten
+        self.thresholds = []     # Spread-Limits, aufsteigend
+        self.watches = []        # parallel zu thresholds
+        self.count = 0           # Anzahl User mit Limit <= spread (Präfix von watches)
+        self.spread = 0.0
+        self.sell = self.buy = None
+
+    def subscribe(self, limit, watch):
+        i = bisect_right(self.thresholds, limit)
+        self.thresholds.insert(i, limit)
+        self.watches.insert(i, watch)
+
+    def unsubscribe(self, limit, watch):
+        i = bisect_left(self.thresholds, limit)
+        while self.watches[i] is not watch:
+            i += 1
+        del self.thresholds[i]
+        del self.watches[i]
+
+    def evaluate(self, row):
+        """
+        Bester Spread des DEX-Sets wie SpreadEngine.best (teuerster vs. günstigster DEX)
+        :param row: Preise des Paars pro DEX (NaN = kein Preis)
+        """
+        hi, lo, sell, buy, priced = float("-inf"), float("inf"), None, None, 0
+        for d in self.dex_idx:
+            price = row[d]
+            if not price > 0:  # NaN oder 0
+                continue
+            priced += 1
+            if price > hi:
+                hi, sell = price, d
+            if price < lo:
+                lo, buy = price, d
+        self.spread = (hi - lo) / lo * 100 if priced >= 2 else 0.0
+        self.sell, self.buy = sell, buy
+        self.count = bisect_right(self.thresholds, self.spread) if self.spread > 0 else 0
+
+class SubscriptionIndex:
+    def __init__(self):
+        self.markets = {}  # (pair_id, dex_idx) -> Market
+        self.by_pair = {}  # pair_id -> {Markt-Keys}
+        self.by_user = {}  # user_id -> [(Markt-Key, limit, watch)]
+        self.dirty = set() # Märkte mit geänderten Abos (beim nächsten match neu bewerten)
+        self.active = set()  # Märkte mit mindestens einem Treffer
+
+    def __len__(self):
+        return len(self.markets)
+
+    def add(self, watch):
+        """
+        :param watch: dict mit user_id, pairs, dex_idx (Spalten der Spread-Matrix), spread_limit
+        """
+        dex_idx = tuple(sorted(set(watch["dex_idx"])))
+        limit = watch["spread_limit"]
+        subscriptions = self.by_user.setdefault(watch["user_id"], [])
+        for pair_id in watch["pairs"]:
+            key = (pair_id, dex_idx)
+            market = self.markets.get(key)
+            if market is None:
+                market = self.markets[key] = Market(pair_id, dex_idx)
+                self.by_pair.setdefault(pair_id, set()).add(key)
+            market.subscribe(limit, watch)
+            subscriptions.append((key, limit, watch))
+            self.dirty.add(key)
+
+    def remove(self, user_id):
+        for key, limit, watch in self.by_user.pop(user_id, ()):
+            market = self.markets[key]
+            market.unsubscribe(limit, watch)
+            self.dirty.add(key)
+            if not market.watches:
+                del self.markets[key]
+                keys = self.by_pair[key[0]]
+                keys.discard(key)
+                if not keys:
+                    del self.by_pair[key[0]]
+
+    def clear(self):
+        self.markets.clear()
+        self.by_pair.clear()
+        self.by_user.clear()
+        self.dirty.clear()
+        self.active.clear()
+
+    def match(self, prices, moved):
+        """
+        :param prices: (P, D)-Preismatrix (SpreadEngine.prices)
+        :param moved: Paar-Indizes mit geänderten Preisen seit dem letzten match
+        :returns: [(watch, pair_id, spread, sell_idx, buy_idx)] aller überschrittenen Limits
+        """
+        for pair_id in moved:
+            self.dirty.update(self.by_pair.get(int(pair_id), ()))
+        rows = {}
+        for key in self.dirty:
+            market = self.markets.get(key)
+            if market is None:
+                self.active.discard(key)
+                continue
+            if market.pair_id not in rows:
+                rows[market.pair_id] = prices[market.pair_id].tolist()
+            market.evaluate(rows[market.pair_id])
+            if market.count:
+                self.active.add(key)
+            else:
+                self.active.discard(key)
+        self.dirty.clear()
+
+        return [
+            (watch, market.pair_id, market.spread, market.sell, market.buy)
+            for market in map(self.markets.__getitem__, self.active)
+            for watch in market.watches[:market.count]
+        ]
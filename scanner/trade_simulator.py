@@ -0,0 +1,129 @@
+"""
+TradeSimulator: spielt approve + swap (A) + approve + swap (B) vor dem Senden durch
+
+Zwei Backends:
+- "simulate": eth_simulateV1 – alle Calls in einem simulierten Block, optional mit
+  State-Overrides, auf jedem Node mit Multi-Call-Simulation (Geth, Reth, Anvil)
+- "fork": lokaler Hardhat-/Anvil-Node (z.B. aus dex_testnet) – Snapshot, Calls als
+  impersonierter Sender, Balance-Diff, Revert. Seriell, da der Fork-State global ist.
+
+Simulationen laufen async; simulate_many() startet alle Kandidaten eines Ticks parallel.
+"""
+
+import asyncio
+import logging
+import time
+from eth_abi import decode, encode
+from web3 import Web3
+
+APPROVE_SELECTOR = Web3.keccak(text="approve(address,uint256)")[:4]
+BALANCE_OF_SELECTOR = Web3.keccak(text="balanceOf(address)")[:4]
+SWAP_EXACT_TOKENS_SELECTOR = Web3.keccak(text="swapExactTokensForTokens(uint256,uint256,address[],address,uint256)")[:4]
+DEFAULT_DEADLINE = 300  # Sekunden
+
+# --- Calldata ---
+def encode_approve(spender, amount):
+    return APPROVE_SELECTOR + encode(["address", "uint256"], [spender, amount])
+
+def encode_balance_of(owner):
+    return BALANCE_OF_SELECTOR + encode(["address"], [owner])
+
+def encode_swap_exact_tokens(amount_in, amount_out_min, path, to, deadline):
+    return SWAP_EXACT_TOKENS_SELECTOR + encode(
+        ["uint256", "uint256", "address[]", "address", "uint256"],
+        [amount_in, amount_out_min, path, to, deadline]
+    )
+
+def _to_int(value):
+    return value if isinstance(value, int) else int(value, 16)
+
+class TradeSimulator:
+    def __init__(self, rpc, mode="simulate", deadline=DEFAULT_DEADLINE):
+        """
+        :param rpc: AsyncRpcClient – Mainnet-/Sepolia-Node ("simulate") oder lokaler Fork ("fork")
+        :param mode: "simulate" (eth_simulateV1) oder "fork" (Snapshot/Impersonation)
+        """
+        if mode not in ("simulate", "fork"):
+            raise ValueError(f"Unbekannter Simulationsmodus: {mode}")
+        self.rpc = rpc
+        self.mode = mode
+        self.deadline = deadline
+        self._fork_lock = asyncio.Lock()
+
+    def build_calls(self, sender, token0, token1, router_a, router_b, amount_in, amount_mid):
+        """
+        :param amount_mid: erwarteter token1-Output von Pool A (Min-Out für Hop 1, Input für Hop 2)
+        :returns: Liste von Call-Dicts (from, to, data) in Ausführungsreihenfolge
+        """
+        sender, token0, token1, router_a, router_b = (
+            Web3.to_checksum_address(a) for a in (sender, token0, token1, router_a, router_b)
+        )
+        deadline = int(time.time()) + self.deadline
+        calls = [
+            (token0, encode_approve(router_a, amount_in)),
+            (router_a, encode_swap_exact_tokens(amount_in, amount_mid, [token0, token1], sender, deadline)),
+            (token1, encode_approve(router_b, amount_mid)),
+            (router_b, encode_swap_exact_tokens(amount_mid, 0, [token1, token0], sender, deadline)),
+        ]
+        return [{"from": sender, "to": to, "data": Web3.to_hex(data)} for to, data in calls]
+
+    async def simulate(self, sender, token0, token1, router_a, router_b, amount_in, amount_mid, state_overrides=None):
+        """
+        :returns: dict mit ok, amount_out (token0), profit (brutto, token0), gas_used, error
+        """
+        calls = self.build_calls(sender, token0, token1, router_a, router_b, amount_in, amount_mid)
+        try:
+            if self.mode == "fork":
+                return await self._simulate_fork(calls, sender, token0, amount_in)
+            return await self._simulate_v1(calls, amount_in, state_overrides)
+        except Exception as e:
+            return {"ok": False, "amount_out": 0, "profit": None, "gas_used": 0, "error": str(e)}
+
+    async def simulate_many(self, requests):
+        """
+        :param requests: Liste aus Argument-Tupeln für simulate()
+        :returns: Ergebnisse in gleicher Reihenfolge
+        """
+        return await asyncio.gather(*[self.simulate(*r) for r in requests])
+
+    # --- eth_simulateV1: ein simulierter Block mit allen Calls ---
+    async def _simulate_v1(self, calls, amount_in, state_overrides=None):
+        block = {"calls": calls}
+        if state_overrides:
+            block["stateOverrides"] = state_overrides
+        result = await self.rpc.request("eth_simulateV1", [{"blockStateCalls": [block], "validation": False}, "latest"])
+        results = result[0]["calls"]
+        gas_used = sum(_to_int(r["gasUsed"]) for r in results)
+        for call, r in zip(calls, results):
+            if _to_int(r["status"]) != 1:
+                error = (r.get("error") or {}).get("message", "reverted")
+                return {"ok": False, "amount_out": 0, "profit": None, "gas_used": gas_used, "error": f"{call['to']}: {error}"}
+        amount_out = decode(["uint256[]"], Web3.to_bytes(hexstr=results[-1]["returnData"]))[0][-1]
+        return {"ok": True, "amount_out": amount_out, "profit": amount_out - amount_in, "gas_used": gas_used, "error": None}
+
+    # --- Lokaler Fork: Snapshot -> Transaktionen -> Balance-Diff -> Revert ---
+    async def _balance(self, token, owner):
+        data = await self.rpc.request("eth_call", [{"to": token, "data": Web3.to_hex(encode_balance_of(owner))}, "latest"])
+        return decode(["uint256"], Web3.to_bytes(hexstr=data))[0]
+
+    async def _simulate_fork(self, calls, sender, token0, amount_in):
+        sender, token0 = Web3.to_checksum_address(sender), Web3.to_checksum_address(token0)
+        async with self._fork_lock:
+            snapshot = await self.rpc.request("evm_snapshot")
+            try:
+                await self.rpc.request("hardhat_impersonateAccount", [sender])
+                before = await self._balance(token0, sender)
+                gas_used = 0
+                for call in calls:
+                    tx_hash = await self.rpc.request("eth_sendTransaction", [call])
+                    receipt = await self.rpc.request("eth_getTransactionReceipt", [tx_hash])
+                    gas_used += _to_int(receipt["gasUsed"])
+                    if _to_int(receipt["status"]) != 1:
+                        return {"ok": False, "amount_out": 0, "profit": None, "gas_used": gas_used, "error": f"{call['to']}: reverted"}
+                profit = await self._balance(token0, sender) - before
+                return {"ok": True, "amount_out": amount_in + profit, "profit": profit, "gas_used": gas_used, "error": None}
+            finally:
+                try:
+                    await self.rpc.request("evm_revert", [snapshot])
+                except Exception as e:
+                    logging.warning(f"Fork-Snapshot {snapshot} nicht zurückgesetzt: {e}")
@@ -0,0 +1,69 @@
+"""
+Trade-Sizing: profit-maximierende Input-Menge für eine Arbitrage über zwei Uniswap-V2-Pools
+
+Route: token0 -> token1 auf Pool A (Sell-Venue), token1 -> token0 auf Pool B (Buy-Venue).
+Beide Hops zusammen verhalten sich wie ein einzelner virtueller V2-Pool mit
+  Ea = a_in * b_in / (b_in + γ a_out),  Eb = γ a_out * b_out / (b_in + γ a_out),  γ = 0.997
+und der Profit x -> out(x) - x ist maximal bei x* = (sqrt(γ Ea Eb) - Ea) / γ.
+"""
+
+from math import isqrt
+import numpy as np
+from scanner.reserve_cache import get_amount_out
+
+FEE_NUM, FEE_DEN = 997, 1000
+DEFAULT_TRADE_GAS = 350_000  # approve (100k) + swap (250k), wie im Executor
+
+# --- Exakt (Integer), für die tatsächlich gehandelte Menge ---
+def optimal_amount_in(a_in, a_out, b_in, b_out):
+    """
+    :param a_in, a_out: Reserves Pool A (token0, token1)
+    :param b_in, b_out: Reserves Pool B (token1, token0)
+    :returns: optimale token0-Menge (0 wenn keine Arbitrage möglich)
+    """
+    if min(a_in, a_out, b_in, b_out) <= 0:
+        return 0
+    d = FEE_DEN * b_in + FEE_NUM * a_out
+    num = FEE_NUM * isqrt(a_in * a_out * b_in * b_out) - FEE_DEN * a_in * b_in
+    if num <= 0:
+        return 0
+    return FEE_DEN * num // (FEE_NUM * d)
+
+def round_trip(amount_in, a_in, a_out, b_in, b_out):
+    # token0 -> token1 (A) -> token0 (B), exakte Router-Mathe
+    return get_amount_out(get_amount_out(amount_in, a_in, a_out), b_in, b_out)
+
+def optimal_trade(a_in, a_out, b_in, b_out, gas_cost=0):
+    """
+    :param gas_cost: Gaskosten in token0-Einheiten
+    :returns: (amount_in, expected_profit netto Gas) – (0, 0) wenn nicht profitabel
+    """
+    amount_in = optimal_amount_in(a_in, a_out, b_in, b_out)
+    if amount_in <= 0:
+        return 0, 0
+    try:
+        profit = round_trip(amount_in, a_in, a_out, b_in, b_out) - amount_in
+    except ValueError:
+        return 0, 0
+    if profit <= gas_cost:
+        return 0, 0
+    return amount_in, profit - gas_cost
+
+# --- Vektorisiert (float64) über viele Kandidaten, zum Screenen ---
+def optimal_trades(a_in, a_out, b_in, b_out, gas_cost=0.0):
+    """
+    Alle Argumente als gleich lange Arrays (oder Skalare zum Broadcasten)
+    :returns: amount_in (N,), expected_profit netto Gas (N,) – 0 wo nicht profitabel
+    """
+    a_in, a_out, b_in, b_out = (np.asarray(v, dtype=float) for v in (a_in, a_out, b_in, b_out))
+    g = FEE_NUM / FEE_DEN
+    d = b_in + g * a_out
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ea = a_in * b_in / d
+        eb = g * a_out * b_out / d
+        x = np.maximum((np.sqrt(g * ea * eb) - ea) / g, 0.0)
+        out = g * x * eb / (ea + g * x)
+    x = np.nan_to_num(x)
+    profit = np.nan_to_num(out - x) - gas_cost
+    profitable = (x > 0) & (profit > 0)
+    return np.where(profitable, x, 0.0), np.where(profitable, profit, 0.0)
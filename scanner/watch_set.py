@@ -0,0 +1,74 @@
+"""
+WatchSet: Tick-Plan aller User, inkrementell gepflegt
+
+Statt pro Tick alle User zu durchlaufen, wird ein User nur neu geplant, wenn sich seine
+Einstellungen ändern (StateStore.subscribe -> update). Quotes werden über alle User
+referenzgezählt: eine Quote verschwindet erst, wenn kein User sie mehr braucht.
+Parallel dazu hält index (SubscriptionIndex) die Zuordnung Markt -> User für den Spread-Check.
+
+    WATCHES = WatchSet(plan_user)
+    STATE.subscribe(WATCHES.update)
+    quotes, watches = WATCHES.plan()
+"""
+
+from scanner.subscription_index import SubscriptionIndex
+
+class WatchSet:
+    def __init__(self, plan_fn):
+        """
+        :param plan_fn: (user_id, state) -> ([(quote, slot)], watch) bzw. ([], None) ohne Watch
+        """
+        self.plan_fn = plan_fn
+        self.plans = {}    # user_id -> [(quote, slot)]
+        self.watches = {}  # user_id -> watch
+        self.quotes = {}   # quote -> {slot: Anzahl User}
+        self.index = SubscriptionIndex()
+        self.version = 0   # zählt Änderungen (für abgeleitete Caches)
+
+    def __len__(self):
+        return len(self.watches)
+
+    def update(self, user_id, state):
+        """
+        :param state: neuer State des Users, None wenn gelöscht
+        """
+        self._remove(user_id)
+        self.version += 1
+        if state is None:
+            return
+        entries, watch = self.plan_fn(user_id, state)
+        if watch is None:
+            return
+        self.plans[user_id] = entries
+        self.watches[user_id] = watch
+        self.index.add(watch)
+        for quote, slot in entries:
+            slots = self.quotes.setdefault(quote, {})
+            slots[slot] = slots.get(slot, 0) + 1
+
+    def _remove(self, user_id):
+        self.watches.pop(user_id, None)
+        self.index.remove(user_id)
+        for quote, slot in self.plans.pop(user_id, ()):
+            slots = self.quotes[quote]
+            slots[slot] -= 1
+            if not slots[slot]:
+                del slots[slot]
+                if not slots:
+                    del self.quotes[quote]
+
+    def rebuild(self, states):
+        # Alles neu planen, z.B. nach Config-Änderung
+        self.plans.clear()
+        self.watches.clear()
+        self.quotes.clear()
+        self.index.clear()
+        for user_id, state in list(states.items()):
+            self.update(user_id, state)
+
+    def plan(self):
+        """
+        :returns: (quotes, watches) wie build_quote_plan; quotes[q] iteriert die Slots (pair_id, dex_idx),
+                  watches ist eine View (keine Kopie pro Tick)
+        """
+        return self.quotes, self.watches.values()
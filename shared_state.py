@@ -1,5 +1,13 @@
 # shared_state.py
 
-# Dieses Modul macht user_state global zugänglich für Scanner und andere Module
+# Dieses Modul macht den User-State global zugänglich für Scanner und andere Module.
+# Gespeichert in SQLite (WAL), damit Bot- und Scanner-Container dieselben Einstellungen sehen;
+# Pfad per ENV STATE_DB (Standard: data/user_state.sqlite).
 
-user_state = {}
+import os
+from state_store import StateStore, DEFAULT_PATH
+
+STATE = StateStore(os.getenv("STATE_DB", DEFAULT_PATH))
+
+# Lesesicht user_id -> State (In-Memory-Snapshot); schreiben nur über STATE.put()
+user_state = STATE.snapshot
@@ -0,0 +1,73 @@
+"""
+SignerRegistry: ein LocalAccount pro User, einmal pro Prozess geladen, plus gecachte chain_id
+
+Statt pro Trade die Wallet-JSON zu lesen und chain_id in jedem TX-Dict neu abzufragen,
+signiert sign_and_send() direkt mit dem gecachten Account und vergibt die Nonce über den
+NonceManager – der einzige RPC-Call pro Transaktion ist eth_sendRawTransaction.
+"""
+
+import threading
+from eth_account import Account
+from gas_oracle import bump_fees
+
+class SignerRegistry:
+    def __init__(self, web3, nonces, load_fn):
+        """
+        :param nonces: NonceManager für Nonce-Vergabe und Senden
+        :param load_fn: user_id -> (address, private_key), z.B. get_or_create_wallet
+        """
+        self.web3 = web3
+        self.nonces = nonces
+        self.load_fn = load_fn
+        self.accounts = {}  # user_id -> LocalAccount
+        self._chain_id = None
+        self._lock = threading.Lock()
+
+    @property
+    def chain_id(self):
+        # Einmal pro Prozess; die Chain wechselt zur Laufzeit nicht
+        if self._chain_id is None:
+            self._chain_id = self.web3.eth.chain_id
+        return self._chain_id
+
+    def account(self, user_id):
+        """
+        :returns: LocalAccount oder None, wenn der User keine Wallet hat
+        """
+        acct = self.accounts.get(user_id)
+        if acct is not None:
+            return acct
+        with self._lock:
+            if user_id not in self.accounts:
+                address, private_key = self.load_fn(user_id)
+                if not address or not private_key:
+                    return None
+                self.accounts[user_id] = Account.from_key(private_key)
+            return self.accounts[user_id]
+
+    def forget(self, user_id):
+        # z.B. nach Wallet-Wechsel
+        with self._lock:
+            self.accounts.pop(user_id, None)
+
+    def sign(self, account, tx, nonce):
+        return account.sign_transaction({**tx, "nonce": nonce, "chainId": self.chain_id}).raw_transaction
+
+    def sign_next(self, account, tx):
+        """
+        Nächste Nonce vergeben und nur signieren (z.B. für Bundles)
+        :returns: signierte Raw-Transaktion
+        """
+        nonce = self.nonces.allocate(account.address)
+        try:
+            return self.sign(account, tx, nonce)
+        except Exception:
+            self.nonces.release(account.address, nonce)
+            raise
+
+    def sign_and_send(self, account, tx):
+        """
+        :param tx: TX-Dict ohne nonce/chainId (werden hier gesetzt)
+        :returns: TX-Hash
+        """
+        return self.nonces.send(account.address, lambda nonce, bump: self.sign(account, bump_fees(tx, bump), nonce))
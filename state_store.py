@@ -0,0 +1,172 @@
+"""
+StateStore: User-Einstellungen (dexes, pairs, spread, autotrade) prozessübergreifend in SQLite
+
+- eine Datei im WAL-Modus für Bot, Scanner und Executor (docker-compose: gemeinsames Volume);
+  Leser blockieren den schreibenden Bot nicht
+- Lesen aus einem In-Memory-Snapshot (user_id -> State), ohne SQL auf dem Hot-Path
+- jede Änderung landet zusätzlich in einem Change-Log (fortlaufende seq); poll() lädt nur
+  die seit dem letzten Aufruf geänderten User nach und meldet sie an die Abonnenten
+  -> der Scanner aktualisiert seinen Watch-Set inkrementell statt alle User pro Tick
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_PATH = os.path.join("data", "user_state.sqlite")
+CHANGE_LOG_SIZE = 10_000  # ältere Change-Log-Einträge werden gelöscht
+
+def default_state():
+    return {"dexes": set(), "pairs": set(), "autotrade": False, "spread": "1.0"}
+
+def _encode(state):
+    return json.dumps({k: sorted(v) if isinstance(v, set) else v for k, v in state.items()})
+
+def _decode(data):
+    state = json.loads(data)
+    for key in ("dexes", "pairs"):
+        state[key] = set(state.get(key, ()))
+    return state
+
+def _copy(state):
+    # Sets kopieren, damit Änderungen des Aufrufers erst mit put() sichtbar werden
+    return {k: set(v) if isinstance(v, set) else v for k, v in state.items()}
+
+class StateStore:
+    def __init__(self, path=DEFAULT_PATH):
+        """
+        :param path: SQLite-Datei (":memory:" für Tests, dann ohne Prozess-Sharing)
+        """
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("PRAGMA busy_timeout=5000")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS users (
+                user_id INTEGER PRIMARY KEY,
+                state TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS changes (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                changed_at REAL NOT NULL
+            );
+        """)
+        self._lock = threading.Lock()
+        self._subscribers = []
+        with self._lock:
+            self.seq = self._max_seq()
+            self.snapshot = {user_id: _decode(state) for user_id, state in self.db.execute("SELECT user_id, state FROM users")}
+
+    def close(self):
+        self.db.close()
+
+    def _max_seq(self):
+        return self.db.execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()[0]
+
+    # --- Lesen (Snapshot) ---
+    def get(self, user_id, default=None):
+        """
+        :returns: Kopie des States oder default
+        """
+        state = self.snapshot.get(user_id)
+        return _copy(state) if state is not None else default
+
+    def __contains__(self, user_id):
+        return user_id in self.snapshot
+
+    def __len__(self):
+        return len(self.snapshot)
+
+    # --- Schreiben ---
+    def put(self, user_id, state):
+        state = _copy(state)
+        now = time.time()
+        with self._lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                self.db.execute("INSERT OR REPLACE INTO users VALUES (?, ?, ?)", (user_id, _encode(state), now))
+                seq = self.db.execute("INSERT INTO changes (user_id, changed_at) VALUES (?, ?)", (user_id, now)).lastrowid
+                if seq % 1000 == 0:
+                    self.db.execute("DELETE FROM changes WHERE seq <= ?", (seq - CHANGE_LOG_SIZE,))
+                self.db.execute("COMMIT")
+            except Exception:
+                self.db.execute("ROLLBACK")
+                raise
+            self.snapshot[user_id] = state
+
+    def setdefault(self, user_id, state=None):
+        """
+        :returns: Kopie des gespeicherten States; legt state (bzw. default_state()) an, falls keiner existiert
+        """
+        current = self.get(user_id)
+        if current is not None:
+            return current
+        state = state if state is not None else default_state()
+        self.put(user_id, state)
+        return _copy(state)
+
+    def delete(self, user_id):
+        now = time.time()
+        with self._lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                self.db.execute("DELETE FROM users WHERE user_id = ?", (user_id,))
+                self.db.execute("INSERT INTO changes (user_id, changed_at) VALUES (?, ?)", (user_id, now))
+                self.db.execute("COMMIT")
+            except Exception:
+                self.db.execute("ROLLBACK")
+                raise
+            self.snapshot.pop(user_id, None)
+
+    # --- Änderungen abonnieren ---
+    def subscribe(self, callback, replay=True):
+        """
+        :param callback: (user_id, state oder None wenn gelöscht) -> None, aufgerufen aus poll()
+        :param replay: einmal für alle bekannten User aufrufen (Initialbefüllung)
+        """
+        self._subscribers.append(callback)
+        if replay:
+            for user_id, state in list(self.snapshot.items()):
+                callback(user_id, state)
+
+    def poll(self):
+        """
+        Änderungen anderer Prozesse (und eigene) seit dem letzten Aufruf übernehmen
+        :returns: Menge der geänderten user_ids
+        """
+        with self._lock:
+            rows = self.db.execute("SELECT seq, user_id FROM changes WHERE seq > ? ORDER BY seq", (self.seq,)).fetchall()
+            if not rows:
+                return set()
+            truncated = rows[0][0] != self.seq + 1 and not self.db.execute(
+                "SELECT 1 FROM changes WHERE seq <= ? LIMIT 1", (self.seq,)
+            ).fetchone()
+            self.seq = rows[-1][0]
+            if truncated:
+                # Change-Log wurde über unseren Stand hinaus gekürzt: alles neu laden
+                loaded = {user_id: _decode(state) for user_id, state in self.db.execute("SELECT user_id, state FROM users")}
+                changed = set(self.snapshot) | set(loaded)
+            else:
+                changed = {user_id for _, user_id in rows}
+                marks = ",".join("?" * len(changed))
+                loaded = {
+                    user_id: _decode(state)
+                    for user_id, state in self.db.execute(f"SELECT user_id, state FROM users WHERE user_id IN ({marks})", tuple(changed))
+                }
+            for user_id in changed:
+                if user_id in loaded:
+                    self.snapshot[user_id] = loaded[user_id]
+                else:
+                    self.snapshot.pop(user_id, None)
+
+        for user_id in changed:
+            state = self.snapshot.get(user_id)
+            for callback in self._subscribers:
+                callback(user_id, state)
+        return changed
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Module liegen im Repo-Root (wie in benchmarks/): scanner.x, nonce_manager, ...
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,63 @@
+import pytest
+from eth_account import Account
+from web3 import Web3
+
+from bundle_submitter import BundleSubmitter
+from mock_relay import MockRelay
+from rpc_client import RpcError
+
+CHAIN_ID = 11155111
+
+@pytest.fixture
+def relay_factory():
+    relays = []
+
+    def start(**kwargs):
+        relay = MockRelay(block_time=0.3, chain_id=CHAIN_ID, **kwargs).start()
+        relays.append(relay)
+        submitter = BundleSubmitter(relay.url, Web3(Web3.HTTPProvider(relay.url)), max_blocks=3, poll_interval=0.01)
+        return relay, submitter
+
+    yield start
+    for relay in relays:
+        relay.stop()
+
+def signed_txs(n=2):
+    account = Account.create()
+    return [
+        account.sign_transaction({
+            "to": "0x" + "22" * 20, "value": 1, "gas": 21_000, "nonce": nonce,
+            "maxFeePerGas": 2 * 10**9, "maxPriorityFeePerGas": 10**9, "chainId": CHAIN_ID,
+        }).raw_transaction
+        for nonce in range(n)
+    ]
+
+def methods(relay):
+    return [method for method, _ in relay.requests]
+
+def test_bundle_lands(relay_factory):
+    relay, submitter = relay_factory()
+    raw_txs = signed_txs()
+    receipts = submitter.submit(raw_txs)
+    assert [r.transactionHash for r in receipts] == [Web3.keccak(raw) for raw in raw_txs]
+    assert all(r.status == 1 for r in receipts)
+    assert methods(relay) == ["eth_callBundle", "eth_sendBundle"]
+    # Relay-Calls sind mit dem Auth-Key signiert (MockRelay prüft die Signatur)
+    assert {signer for _, signer in relay.requests} == {submitter.auth_account.address}
+
+def test_missed_block_is_resubmitted(relay_factory):
+    relay, submitter = relay_factory(miss_blocks=1)
+    receipts = submitter.submit(signed_txs())
+    assert receipts is not None
+    assert methods(relay).count("eth_sendBundle") == 2
+
+def test_gives_up_after_max_blocks(relay_factory):
+    relay, submitter = relay_factory(miss_blocks=10)
+    assert submitter.submit(signed_txs()) is None
+    assert methods(relay).count("eth_sendBundle") == submitter.max_blocks
+
+def test_call_bundle_revert_is_not_sent(relay_factory):
+    relay, submitter = relay_factory(revert=True)
+    with pytest.raises(RpcError, match="reverted"):
+        submitter.submit(signed_txs())
+    assert methods(relay) == ["eth_callBundle"]
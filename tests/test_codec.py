@@ -0,0 +1,98 @@
+import random
+
+import pytest
+from eth_abi import decode, encode
+from web3 import Web3
+
+from scanner.quote_engine import (
+    AGGREGATE3_SELECTOR, ALLOWANCE_SELECTOR, DECIMALS_SELECTOR, GET_AMOUNTS_OUT_SELECTOR, GET_PAIR_SELECTOR,
+    GET_RESERVES_SELECTOR, decode_aggregate3, decode_allowance, decode_decimals, decode_get_amounts_out,
+    decode_get_pair, decode_get_reserves, encode_aggregate3, encode_allowance, encode_decimals,
+    encode_get_amounts_out, encode_get_pair, encode_get_reserves,
+)
+
+MAX_UINT256 = 2**256 - 1
+MAX_UINT112 = 2**112 - 1
+TOKEN_A = "0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2"
+TOKEN_B = "0xa0b86991c6218b36c1d19d4a2e9eb0ce3606eb48"  # bewusst nicht checksummed
+
+def addresses(rng, n):
+    return ["0x" + rng.randbytes(20).hex() for _ in range(n)]
+
+# --- Encoder: Bit-Gleichheit mit eth_abi ---
+@pytest.mark.parametrize("amount", [0, 1, 10**18, MAX_UINT256])
+@pytest.mark.parametrize("hops", [1, 2, 4])
+def test_encode_get_amounts_out(amount, hops):
+    path = addresses(random.Random(hops), hops)
+    expected = GET_AMOUNTS_OUT_SELECTOR + encode(["uint256", "address[]"], [amount, path])
+    assert encode_get_amounts_out(amount, path) == expected
+
+def test_encode_address_pairs():
+    assert encode_get_pair(TOKEN_A, TOKEN_B) == GET_PAIR_SELECTOR + encode(["address", "address"], [TOKEN_A, TOKEN_B])
+    assert encode_allowance(TOKEN_B, TOKEN_A) == ALLOWANCE_SELECTOR + encode(["address", "address"], [TOKEN_B, TOKEN_A])
+    assert encode_get_reserves() == GET_RESERVES_SELECTOR
+    assert encode_decimals() == DECIMALS_SELECTOR
+
+@pytest.mark.parametrize("sizes", [[], [0], [4, 68], [31, 32, 33, 132]])
+def test_encode_aggregate3(sizes):
+    rng = random.Random(len(sizes))
+    calls = [(target, rng.randbytes(size)) for target, size in zip(addresses(rng, len(sizes)), sizes)]
+    expected = AGGREGATE3_SELECTOR + encode(
+        ["(address,bool,bytes)[]"], [[(Web3.to_checksum_address(t), True, d) for t, d in calls]]
+    )
+    assert encode_aggregate3(calls) == expected
+
+# --- Decoder: gleiche Werte wie eth_abi, auch an den Rändern ---
+@pytest.mark.parametrize("amounts", [[], [0], [1, MAX_UINT256], [10**18, 3 * 10**15, 7]])
+def test_decode_get_amounts_out(amounts):
+    data = encode(["uint256[]"], [amounts])
+    assert list(decode_get_amounts_out(data)) == list(decode(["uint256[]"], data)[0]) == amounts
+
+@pytest.mark.parametrize("reserves", [(0, 0, 0), (MAX_UINT112, MAX_UINT112, 2**32 - 1), (10**24, 3 * 10**21, 1_700_000_000)])
+def test_decode_get_reserves(reserves):
+    data = encode(["uint112", "uint112", "uint32"], list(reserves))
+    assert tuple(decode_get_reserves(data)) == decode(["uint112", "uint112", "uint32"], data) == reserves
+
+def test_decode_scalars():
+    assert decode_get_pair(encode(["address"], [TOKEN_B])) == Web3.to_checksum_address(TOKEN_B)
+    assert decode_get_pair(bytes(32)) == "0x" + "0" * 40
+    for decimals in (0, 6, 18, 255):
+        assert decode_decimals(encode(["uint8"], [decimals])) == decimals
+    for value in (0, 1, MAX_UINT256):
+        assert decode_allowance(encode(["uint256"], [value])) == value
+
+@pytest.mark.parametrize("results", [[], [(True, b"")], [(False, b"\x08\xc3\x79\xa0")], [(True, b"x" * 33), (False, b""), (True, bytes(64))]])
+def test_decode_aggregate3(results):
+    data = encode(["(bool,bytes)[]"], [results])
+    expected = [tuple(r) for r in decode(["(bool,bytes)[]"], data)[0]]
+    assert [tuple(r) for r in decode_aggregate3(data)] == expected == results
+
+# --- Round trip: Encoder-Ausgabe zurück durch eth_abi, Antworten durch den Roh-Decoder ---
+def test_round_trip_random():
+    rng = random.Random(1)
+    for _ in range(200):
+        amount, path = rng.getrandbits(rng.randint(1, 256)), addresses(rng, rng.randint(1, 4))
+        decoded_amount, decoded_path = decode(["uint256", "address[]"], encode_get_amounts_out(amount, path)[4:])
+        assert decoded_amount == amount and [a.lower() for a in decoded_path] == path
+
+        calls = [(t, rng.randbytes(rng.randint(0, 100))) for t in addresses(rng, rng.randint(0, 5))]
+        decoded = decode(["(address,bool,bytes)[]"], encode_aggregate3(calls)[4:])[0]
+        assert [(t.lower(), d) for t, _, d in decoded] == calls
+        assert all(allow_failure for _, allow_failure, _ in decoded)
+
+        amounts = [rng.getrandbits(256) for _ in range(rng.randint(0, 5))]
+        results = [(rng.random() < 0.8, encode(["uint256[]"], [amounts])) for _ in range(rng.randint(0, 5))]
+        assert [(ok, list(decode_get_amounts_out(r))) for ok, r in decode_aggregate3(encode(["(bool,bytes)[]"], [results]))] == [
+            (ok, amounts) for ok, _ in results
+        ]
+
+# --- Abgeschnittene Antworten werden abgelehnt, nicht still falsch dekodiert ---
+@pytest.mark.parametrize("decoder,data", [
+    (decode_get_amounts_out, encode(["uint256[]"], [[1, 2, 3]])[:-1]),
+    (decode_get_reserves, bytes(64)),
+    (decode_aggregate3, encode(["(bool,bytes)[]"], [[(True, b"x" * 40)]])[:-20]),
+    (decode_allowance, b""),
+])
+def test_truncated_data_is_rejected(decoder, data):
+    with pytest.raises(Exception):
+        decoder(data)
@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+
+from scanner.mock_chain import ZERO_ADDRESS, MockChain, MockRevert, v2_amount_out
+from scanner.quote_engine import (
+    MulticallQuoter, decode_decimals, decode_get_amounts_out, decode_get_pair, decode_get_reserves,
+    encode_decimals, encode_get_amounts_out, encode_get_pair, encode_get_reserves,
+)
+from scanner.reserve_cache import ReserveCache
+
+ROUTER = "0x" + "11" * 20
+ROUTER_B = "0x" + "55" * 20
+FACTORY = "0x" + "22" * 20
+PAIR = "0x" + "33" * 20
+OTHER_PAIR = "0x" + "44" * 20
+WETH = "0x" + "aa" * 20
+USDC = "0x" + "bb" * 20
+DAI = "0x" + "cc" * 20
+
+@pytest.fixture
+def chain():
+    chain = MockChain()
+    chain.add_pool(ROUTER, PAIR, WETH, USDC, 10**21, 3 * 10**9, ts=7, factory=FACTORY)
+    chain.add_pool(ROUTER, OTHER_PAIR, USDC, DAI, 5 * 10**9, 5 * 10**21, factory=FACTORY)
+    chain.add_pool(ROUTER_B, OTHER_PAIR, USDC, DAI, 5 * 10**9, 5 * 10**21)
+    chain.add_token(WETH)
+    chain.add_token(USDC, decimals=6)
+    return chain
+
+# --- Direkte eth_calls ---
+def test_get_amounts_out_follows_v2_math(chain):
+    amounts = decode_get_amounts_out(chain.call(ROUTER, encode_get_amounts_out(10**18, [WETH, USDC, DAI])))
+    mid = v2_amount_out(10**18, 10**21, 3 * 10**9)
+    assert list(amounts) == [10**18, mid, v2_amount_out(mid, 5 * 10**9, 5 * 10**21)]
+
+    # Gegenrichtung nutzt die Reserves vertauscht
+    assert decode_get_amounts_out(chain.call(ROUTER, encode_get_amounts_out(10**6, [USDC, WETH])))[-1] == v2_amount_out(10**6, 3 * 10**9, 10**21)
+
+def test_reverts(chain):
+    with pytest.raises(MockRevert, match="PAIR_NOT_FOUND"):
+        chain.call(ROUTER, encode_get_amounts_out(10**18, [WETH, DAI]))
+    with pytest.raises(MockRevert):
+        chain.call(ROUTER, encode_get_amounts_out(0, [WETH, USDC]))  # INSUFFICIENT_INPUT_AMOUNT
+    with pytest.raises(MockRevert, match="unbekannter Call"):
+        chain.call(DAI, encode_decimals())
+
+def test_reserves_pair_and_decimals(chain):
+    assert decode_get_reserves(chain.call(PAIR, encode_get_reserves())) == (10**21, 3 * 10**9, 7)
+    assert decode_get_pair(chain.call(FACTORY, encode_get_pair(USDC, WETH))).lower() == PAIR
+    assert decode_get_pair(chain.call(FACTORY, encode_get_pair(WETH, DAI))) == ZERO_ADDRESS
+    assert decode_decimals(chain.call(USDC, encode_decimals())) == 6
+
+def test_block_tag_beyond_head_is_unknown(chain):
+    chain.mine()
+    assert decode_get_reserves(chain.call(PAIR, encode_get_reserves(), hex(1)))[0] == 10**21
+    with pytest.raises(ValueError, match="header not found"):
+        chain.call(PAIR, encode_get_reserves(), hex(2))
+
+# --- MulticallQuoter über aggregate3 ---
+def test_aggregate_batches_and_isolates_failures(chain):
+    quoter = MulticallQuoter(call_fn=chain.call, batch_size=2)
+    chain.fail(ROUTER_B)
+    chain.fail(OTHER_PAIR)
+    quotes = [(ROUTER, WETH, USDC, 10**18), (ROUTER, WETH, DAI, 10**18), (ROUTER_B, USDC, DAI, 10**6), (ROUTER, USDC, DAI, 10**6)]
+    result = quoter.amounts_out(quotes)
+    assert chain.calls == 2  # 4 Quotes, batch_size 2 -> 2 Roundtrips
+    assert result[quotes[0]] == v2_amount_out(10**18, 10**21, 3 * 10**9)
+    assert result[quotes[1]] is None  # kein Pool
+    assert result[quotes[2]] is None  # Router revertet, die anderen Sub-Calls im Batch nicht
+    assert result[quotes[3]] == v2_amount_out(10**6, 5 * 10**9, 5 * 10**21)
+
+    assert quoter.reserves([PAIR, OTHER_PAIR]) == {PAIR: (10**21, 3 * 10**9, 7), OTHER_PAIR: None}
+
+def test_failing_multicall_fails_whole_batch(chain):
+    chain.fail(chain.multicall)
+    quoter = MulticallQuoter(call_fn=chain.call)
+    assert quoter.reserves([PAIR]) == {PAIR: None}
+
+def test_async_lookups_pinned_to_block(chain):
+    quoter = MulticallQuoter(async_call_fn=chain.call_async)
+    chain.mine()
+
+    async def run():
+        return (
+            await quoter.reserves_async([PAIR], block=chain.block),
+            await quoter.reserves_async([PAIR], block=chain.block + 1),
+            await quoter.pair_addresses_async([(FACTORY, WETH, USDC), (FACTORY, WETH, DAI)]),
+            await quoter.decimals_async([WETH, USDC, DAI]),
+        )
+
+    pinned, ahead, pairs, decimals = asyncio.run(run())
+    assert pinned == {PAIR: (10**21, 3 * 10**9, 7)}
+    assert ahead == {PAIR: None}
+    assert pairs[(FACTORY, WETH, USDC)].lower() == PAIR
+    assert pairs[(FACTORY, WETH, DAI)] == ZERO_ADDRESS
+    assert decimals == {WETH: 18, USDC: 6, DAI: None}
+
+# --- Sync-Logs ---
+def test_set_reserves_emits_sync_logs(chain):
+    cache = ReserveCache()
+    cache.set_pool(PAIR, WETH, USDC, 10**21, 3 * 10**9)
+    cache.set_pool(OTHER_PAIR, USDC, DAI, 5 * 10**9, 5 * 10**21)
+
+    chain.mine()
+    chain.set_reserves(PAIR, 2 * 10**21, 6 * 10**9)
+    chain.mine()
+    chain.set_reserves(OTHER_PAIR, 10**9, 10**21)
+
+    assert len(chain.get_logs({"fromBlock": hex(2)})) == 1
+    assert len(chain.get_logs({"address": [PAIR], "fromBlock": hex(0)})) == 1
+    assert cache.apply_logs(chain.get_logs(cache.filter_params(1, chain.block))) == {PAIR, OTHER_PAIR}
+    assert cache.reserves(PAIR, WETH) == (2 * 10**21, 6 * 10**9)
+    assert decode_get_reserves(chain.call(OTHER_PAIR, encode_get_reserves()))[:2] == (10**9, 10**21)
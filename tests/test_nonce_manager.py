@@ -0,0 +1,115 @@
+from types import SimpleNamespace
+
+import pytest
+from web3 import Web3
+
+from gas_oracle import bump_fees
+from nonce_manager import NonceManager
+
+ADDRESS = "0x" + "11" * 20
+
+class FakeEth:
+    """
+    Node-Stand-in: replies ist eine Liste aus Fehlertexten bzw. None (= angenommen), eine pro Send
+    """
+    def __init__(self, pending=5, replies=()):
+        self.pending = pending
+        self.replies = list(replies)
+        self.sent = []
+
+    def get_transaction_count(self, address, block):
+        return self.pending
+
+    def send_raw_transaction(self, raw):
+        self.sent.append(raw)
+        error = self.replies.pop(0) if self.replies else None
+        if error:
+            raise ValueError({"code": -32000, "message": error})
+        return Web3.keccak(raw)
+
+def manager(**kwargs):
+    eth = FakeEth(**kwargs)
+    return NonceManager(SimpleNamespace(eth=eth)), eth
+
+def signer(calls):
+    def sign(nonce, bump):
+        calls.append((nonce, bump))
+        return f"{nonce}:{bump}".encode()
+    return sign
+
+def test_sequential_nonces_without_rpc_per_send():
+    nonces, eth = manager(pending=7)
+    calls = []
+    for _ in range(3):
+        nonces.send(ADDRESS, signer(calls))
+    assert [n for n, _ in calls] == [7, 8, 9]
+
+def test_already_known_is_success_without_resigning():
+    nonces, eth = manager(replies=["already known"])
+    calls = []
+    tx_hash = nonces.send(ADDRESS, signer(calls))
+    assert calls == [(5, 0)]
+    assert tx_hash == Web3.keccak(b"5:0")
+    assert nonces.allocate(ADDRESS) == 6  # Nonce bleibt verbraucht
+
+def test_nonce_too_low_resyncs_and_resigns():
+    nonces, eth = manager(pending=5, replies=["nonce too low"])
+    nonces.allocate(ADDRESS)  # lokaler Zähler läuft dem Node davon ...
+    eth.pending = 9           # ... bzw. ein anderer Sender hat Nonces verbraucht
+    calls = []
+    nonces.send(ADDRESS, signer(calls))
+    assert calls == [(6, 0), (9, 0)]
+
+def test_replacement_underpriced_bumps_fee_on_same_nonce():
+    nonces, eth = manager(replies=["replacement transaction underpriced"])
+    calls = []
+    nonces.send(ADDRESS, signer(calls))
+    assert calls == [(5, 0), (5, 1)]
+
+def test_other_errors_release_the_nonce():
+    nonces, eth = manager(replies=["insufficient funds for gas * price + value"])
+    with pytest.raises(ValueError):
+        nonces.send(ADDRESS, signer([]))
+    assert nonces.allocate(ADDRESS) == 5
+
+def test_bump_fees_meets_replacement_minimum():
+    fees = {"maxFeePerGas": 100, "maxPriorityFeePerGas": 10, "gas": 21_000}
+    bumped = bump_fees(fees, 1)
+    assert bumped["maxFeePerGas"] >= 110 and bumped["maxPriorityFeePerGas"] >= 11
+    assert bumped["gas"] == 21_000
+    assert bump_fees(fees, 0) is fees
+
+def test_shared_counters_across_managers(tmp_path):
+    # Zwei Prozesse (Bot & Scanner) mit eigener NonceManager-Instanz auf derselben Datei
+    eth = FakeEth(pending=3)
+    path = str(tmp_path / "nonces.sqlite")
+    bot = NonceManager(SimpleNamespace(eth=eth), path=path)
+    scanner = NonceManager(SimpleNamespace(eth=eth), path=path)
+    assert [bot.allocate(ADDRESS), scanner.allocate(ADDRESS), bot.allocate(ADDRESS)] == [3, 4, 5]
+    scanner.release(ADDRESS, 5)
+    assert bot.allocate(ADDRESS) == 5
+    bot.resync(ADDRESS)
+    eth.pending = 8
+    assert scanner.allocate(ADDRESS) == 8
+
+def test_reservation_blocks_other_threads_and_releases_bundle_nonces():
+    import threading
+    nonces, eth = manager(pending=5)
+    reservation = nonces.reserve(ADDRESS)
+    bundle = [nonces.allocate(ADDRESS), nonces.allocate(ADDRESS)]  # approve + swap signiert
+
+    dev_cut = []
+    worker = threading.Thread(target=lambda: dev_cut.append(nonces.allocate(ADDRESS)))
+    worker.start()
+    worker.join(0.1)
+    assert worker.is_alive()  # wartet auf das Bundle statt Nonce 7 hinter eine mögliche Lücke zu legen
+
+    reservation.release()  # Bundle nicht inkludiert
+    worker.join(1)
+    assert bundle == [5, 6] and dev_cut == [5]
+
+def test_reservation_close_keeps_landed_nonces():
+    nonces, eth = manager(pending=5)
+    with nonces.reserve(ADDRESS):
+        nonces.allocate(ADDRESS)
+    assert nonces.allocate(ADDRESS) == 6
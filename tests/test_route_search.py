@@ -0,0 +1,108 @@
+import math
+import random
+
+from scanner.reserve_cache import ReserveCache
+from scanner.route_search import RouteAlerts, RouteGraph
+
+A, B, P = "0x" + "aa" * 20, "0x" + "bb" * 20, "0x" + "cc" * 20
+UNIT = 10**24
+
+def graph(pools, cache):
+    """
+    :param pools: Liste aus (pair, dex, token0, token1, Preis token0 in token1)
+    """
+    for pair, _, token0, token1, price in pools:
+        cache.set_pool(pair, token0, token1, UNIT, int(UNIT * price))
+    g = RouteGraph(cache)
+    g.set_pools([pool[:4] for pool in pools])
+    return g
+
+def routes(cycles):
+    return sorted((tuple(c["pairs"]), round(c["profit_pct"], 6)) for c in cycles)
+
+# Zwei A/B-Pools mit 10 % Spread plus ein Dreieck A→P→B→A über p1 (~ +4.1 %)
+TRIANGLE = [
+    ("0x01", "dex1", A, B, 1.00),
+    ("0x02", "dex2", A, B, 1.10),
+    ("0x03", "dex1", B, P, 1.00),
+    ("0x04", "dex1", A, P, 1.05),
+]
+
+def test_two_hop_arb_does_not_hide_triangle():
+    g = graph(TRIANGLE, ReserveCache())
+    assert g.has_cycle()
+    assert [c["pairs"] for c in g.find_cycles()] == [["0x02", "0x01"]]
+
+    cycles = g.find_cycles(min_hops=3)
+    assert {frozenset(c["pairs"]) for c in cycles} == {frozenset({"0x01", "0x03", "0x04"}), frozenset({"0x02", "0x03", "0x04"})}
+    for c in cycles:
+        assert len(c["pairs"]) == 3 and c["tokens"][0] == c["tokens"][-1]
+        rate = 1.0
+        for pair, token_in in zip(c["pairs"], c["tokens"]):
+            r_in, r_out = g.cache.reserves(pair, token_in)
+            rate *= 0.997 * r_out / r_in
+        assert math.isclose(c["rate"], rate)
+    triangle = next(c for c in cycles if "0x01" in c["pairs"])
+    assert math.isclose(triangle["profit_pct"], (1.05 * 0.997**3 - 1) * 100)
+
+def test_filters_restrict_the_search():
+    g = graph(TRIANGLE, ReserveCache())
+    # Ohne dex2 bleibt nur das Dreieck über p1
+    assert [set(c["pairs"]) for c in g.find_cycles(min_hops=3, dexes={"dex1"})] == [{"0x01", "0x03", "0x04"}]
+    # Zwei Tokens reichen für keinen 3-Hop-Zyklus, der 2-Hop-Arb über A/B bleibt
+    assert g.find_cycles(min_hops=3, tokens={A, B}) == []
+    assert len(g.find_cycles(tokens={A.upper().replace("0X", "0x"), B})) == 1
+
+def test_no_cycle_without_price_gap():
+    g = graph([(pair, dex, t0, t1, 1.0) for pair, dex, t0, t1, _ in TRIANGLE], ReserveCache())
+    assert not g.has_cycle()
+    assert g.find_cycles() == g.find_cycles(min_hops=3) == []
+
+def test_update_matches_fresh_set_pools():
+    rng = random.Random(3)
+    tokens = ["0x" + f"{i:02x}" * 20 for i in range(1, 7)]
+    pools = [
+        (f"0x{k}{len(tokens) * i + j:039x}", f"dex{k}", a, b, 1.0)
+        for i, a in enumerate(tokens) for j, b in enumerate(tokens) if a < b for k in range(2)
+    ]
+    cache = ReserveCache()
+    g = graph(pools, cache)
+    for _ in range(60):
+        changed = rng.sample([p[0] for p in pools], 4)
+        for pair in changed:
+            # Meist Kurse innerhalb der Fee (kein Zyklus), ab und zu ein Sprung
+            price = rng.uniform(0.998, 1.002) if rng.random() < 0.97 else rng.uniform(0.95, 1.05)
+            p = cache.pools[pair]
+            cache.set_pool(pair, p["token0"], p["token1"], UNIT, int(UNIT * price))
+        g.update(changed)
+
+        fresh = RouteGraph(cache)
+        fresh.set_pools([pool[:4] for pool in pools])
+        assert g.has_cycle() == fresh.has_cycle()
+        for min_hops in (2, 3):
+            assert routes(g.find_cycles(min_hops)) == routes(fresh.find_cycles(min_hops))
+
+def test_simulate_follows_router_math():
+    g = graph(TRIANGLE, ReserveCache())
+    triangle = next(c for c in g.find_cycles(min_hops=3) if "0x01" in c["pairs"])
+    amount = 10**18
+    for pair, token_in in zip(triangle["pairs"], triangle["tokens"]):
+        amount = g.cache.quote(pair, token_in, amount)
+    assert g.simulate(triangle, 10**18) == amount > 10**18
+
+def test_route_alerts_only_new_or_moved_routes():
+    alerts = RouteAlerts(realert_pct=0.5)
+    user, other = {"user_id": 1}, {"user_id": 2}
+    route = {"pairs": ["0x01", "0x03", "0x04"], "profit_pct": 4.0}
+    rotated = {"pairs": ["0x04", "0x01", "0x03"], "profit_pct": 4.1}
+
+    assert alerts.filter([(user, route), (other, route)]) == [(user, route), (other, route)]
+    # Gleiche Pools (auch rotiert), kleine Änderung: keine erneute Meldung pro Block
+    assert alerts.filter([(user, rotated), (other, route)]) == []
+    assert alerts.filter([(user, {**route, "profit_pct": 4.4}), (other, route)]) == []
+    moved = {**route, "profit_pct": 4.6}
+    assert alerts.filter([(user, moved), (other, route)]) == [(user, moved)]
+
+    # Route verschwindet und taucht wieder auf -> neu
+    assert alerts.filter([(other, route)]) == []
+    assert alerts.filter([(user, moved), (other, route)]) == [(user, moved)]
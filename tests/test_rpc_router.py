@@ -0,0 +1,133 @@
+import asyncio
+
+import pytest
+
+from rpc_client import RpcError
+from rpc_router import RpcRouter, RouterHTTPProvider, pinned_block
+
+class FakeNode:
+    """
+    Endpoint-Stand-in mit eigenem Head; rejects: Fehlertext für eth_sendRawTransaction
+    """
+    def __init__(self, head, rejects=None):
+        self.head = head
+        self.rejects = rejects
+        self.calls = []
+
+    def reply(self, method, params):
+        self.calls.append(method)
+        if method == "eth_blockNumber":
+            return {"result": hex(self.head)}
+        if method == "eth_sendRawTransaction" and self.rejects:
+            return {"error": {"code": -32000, "message": self.rejects}}
+        return {"result": "0x"}
+
+class FakeAsyncClient:
+    def __init__(self, node):
+        self.node = node
+
+    async def request(self, method, params=()):
+        reply = self.node.reply(method, params)
+        if "error" in reply:
+            raise RpcError(method, reply["error"])
+        return reply["result"]
+
+    async def batch(self, calls):
+        return [await self.request(method, params) for method, params in calls]
+
+    async def close(self):
+        pass
+
+class FakeProvider:
+    def __init__(self, node):
+        self.node = node
+
+    def make_request(self, method, params):
+        return {"jsonrpc": "2.0", "id": 1, **self.node.reply(method, params)}
+
+    def is_connected(self, show_traceback=False):
+        return True
+
+def async_router(nodes):
+    by_url = {f"http://node{i}:8545": node for i, node in enumerate(nodes)}
+    return RpcRouter(list(by_url), hedge=False, client_factory=lambda url: FakeAsyncClient(by_url[url]))
+
+def sync_router(nodes):
+    by_url = {f"http://node{i}:8545": node for i, node in enumerate(nodes)}
+    return RouterHTTPProvider(list(by_url), hedge=False, provider_factory=lambda url: FakeProvider(by_url[url]))
+
+def test_pinned_block():
+    assert pinned_block("eth_call", [{"to": "0x"}, "0x64"]) == 100
+    assert pinned_block("eth_call", [{"to": "0x"}, "latest"]) is None
+    assert pinned_block("eth_getLogs", [{"fromBlock": "0x5", "toBlock": "0x9"}]) == 9
+    assert pinned_block("eth_getLogs", [{"fromBlock": "0x5", "toBlock": "latest"}]) == 5
+    assert pinned_block("eth_getStorageAt", ["0x1", "0xffff", "0xa"]) == 10
+    assert pinned_block("eth_blockNumber", []) is None
+
+def test_pinned_read_skips_lagging_endpoint():
+    behind, ahead = FakeNode(100), FakeNode(105)
+
+    async def run():
+        router = async_router([behind, ahead])
+        router.endpoints[0].observe(0.001)  # bester Score, aber 5 Blöcke zurück
+        router.endpoints[1].observe(0.5)
+        await router.sync_heads()
+        for _ in range(5):
+            await router.request("eth_getLogs", [{"fromBlock": "0x65", "toBlock": hex(105)}])
+        await router.eth_call("0x" + "00" * 20, b"", hex(105))
+        await router.request("eth_call", [{"to": "0x"}, "latest"])  # ungepinnt: bester Score
+        return router
+
+    router = asyncio.run(run())
+    assert behind.calls.count("eth_getLogs") == 0
+    assert ahead.calls.count("eth_getLogs") == 5
+    assert ahead.calls.count("eth_call") == 1 and behind.calls.count("eth_call") == 1
+    assert [e.head for e in router.endpoints] == [100, 105]
+
+def test_unknown_heads_are_synced_once():
+    nodes = [FakeNode(100), FakeNode(105)]
+
+    async def run():
+        router = async_router(nodes)
+        await router.request("eth_getLogs", [{"fromBlock": "0x64", "toBlock": hex(104)}])
+        with pytest.raises(RpcError, match="Block 106"):
+            await router.request("eth_getLogs", [{"fromBlock": "0x64", "toBlock": hex(106)}])
+
+    asyncio.run(run())
+    assert nodes[1].calls.count("eth_getLogs") == 1 and nodes[0].calls.count("eth_getLogs") == 0
+
+def test_broadcast_rejection_counts_against_endpoint():
+    good, full = FakeNode(100), FakeNode(100, rejects="txpool is full")
+
+    async def run():
+        router = async_router([good, full])
+        await router.send_raw_transaction(b"\x02")
+        await asyncio.sleep(0.01)  # Broadcast an den zweiten Endpoint läuft im Hintergrund zu Ende
+        return router
+
+    router = asyncio.run(run())
+    assert router.endpoints[0].error_rate() == 0
+    assert router.endpoints[1].error_rate() > 0
+
+def test_broadcast_already_known_is_not_a_failure():
+    nodes = [FakeNode(100, rejects="already known"), FakeNode(100, rejects="already known")]
+
+    async def run():
+        router = async_router(nodes)
+        with pytest.raises(RpcError, match="already known"):
+            await router.send_raw_transaction(b"\x02")
+        return router
+
+    router = asyncio.run(run())
+    assert all(e.error_rate() == 0 for e in router.endpoints)
+
+def test_sync_provider_pins_and_scores_broadcasts():
+    behind, ahead = FakeNode(100, rejects="txpool is full"), FakeNode(105)
+    provider = sync_router([behind, ahead])
+    provider.endpoints[0].observe(0.001)
+    provider.endpoints[1].observe(0.5)
+    provider.make_request("eth_call", [{"to": "0x"}, hex(105)])
+    assert ahead.calls == ["eth_blockNumber", "eth_call"]  # Heads einmal geholt, dann gepinnt
+    assert provider.make_request("eth_sendRawTransaction", ["0x02"])["result"] == "0x"
+    provider._pool.shutdown(wait=True)
+    assert provider.endpoints[0].error_rate() > 0 and provider.endpoints[1].error_rate() == 0
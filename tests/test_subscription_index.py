@@ -0,0 +1,99 @@
+import numpy as np
+
+from scanner.spread_engine import SpreadEngine
+from scanner.subscription_index import SubscriptionIndex
+
+def watch(user_id, pairs, dex_idx, spread_limit):
+    return {"user_id": user_id, "pairs": pairs, "dex_idx": dex_idx, "spread_limit": spread_limit}
+
+def hits(result):
+    return sorted((w["user_id"], pair_id, round(spread, 6), sell, buy) for w, pair_id, spread, sell, buy in result)
+
+def prices(rows):
+    return np.array(rows, dtype=float)
+
+def test_match_reports_limits_at_or_below_spread():
+    index = SubscriptionIndex()
+    index.add(watch(1, [0], [0, 1], 5.0))
+    index.add(watch(2, [0], [1, 0], 10.0))  # gleiches DEX-Set, anderes Limit
+    index.add(watch(3, [0], [0, 1], 20.0))
+    assert len(index) == 1
+
+    # 100 vs. 110 -> 10 %: Sell auf DEX 1, Buy auf DEX 0
+    result = index.match(prices([[100.0, 110.0, np.nan]]), [0])
+    assert hits(result) == [(1, 0, 10.0, 1, 0), (2, 0, 10.0, 1, 0)]
+
+def test_match_ignores_missing_and_zero_prices():
+    index = SubscriptionIndex()
+    index.add(watch(1, [0, 1], [0, 1, 2], 0.1))
+    result = index.match(prices([[100.0, np.nan, 0.0], [100.0, 100.0, 101.0]]), [0, 1])
+    assert hits(result) == [(1, 1, 1.0, 2, 0)]
+
+def test_only_moved_pairs_are_reevaluated():
+    index = SubscriptionIndex()
+    index.add(watch(1, [0, 1], [0, 1], 5.0))
+    matrix = prices([[100.0, 110.0], [100.0, 100.0]])
+    assert [h[1] for h in hits(index.match(matrix, [0, 1]))] == [0]
+
+    # Paar 1 ändert sich, wird aber nicht als bewegt gemeldet -> alter Stand bleibt
+    matrix[1] = [100.0, 120.0]
+    assert [h[1] for h in hits(index.match(matrix, []))] == [0]
+    assert [h[1] for h in hits(index.match(matrix, [1]))] == [0, 1]
+
+    # Paar 0 fällt unter das Limit -> Markt ist nicht mehr aktiv
+    matrix[0] = [100.0, 101.0]
+    assert [h[1] for h in hits(index.match(matrix, [0]))] == [1]
+
+def test_add_and_remove_mark_markets_dirty():
+    index = SubscriptionIndex()
+    matrix = prices([[100.0, 110.0]])
+    index.add(watch(1, [0], [0, 1], 5.0))
+    assert hits(index.match(matrix, [0])) == [(1, 0, 10.0, 1, 0)]
+
+    # Neues Abo ohne Preisbewegung wird trotzdem beim nächsten match bewertet
+    index.add(watch(2, [0], [0, 1], 8.0))
+    assert [h[0] for h in hits(index.match(matrix, []))] == [1, 2]
+
+    index.remove(1)
+    assert [h[0] for h in hits(index.match(matrix, []))] == [2]
+    index.remove(2)
+    assert len(index) == 0 and not index.by_pair and not index.by_user
+    assert index.match(matrix, [0]) == []
+
+def test_remove_keeps_other_users_with_equal_limit():
+    index = SubscriptionIndex()
+    first, second = watch(1, [0], [0, 1], 5.0), watch(2, [0], [0, 1], 5.0)
+    index.add(first)
+    index.add(second)
+    index.remove(1)
+    market = index.markets[(0, (0, 1))]
+    assert market.watches == [second] and market.thresholds == [5.0]
+    index.remove(99)  # unbekannter User ist kein Fehler
+
+def test_matches_spread_engine_scan():
+    rng = np.random.default_rng(7)
+    pair_count, dex_count = 12, 4
+    engine = SpreadEngine(pair_count, [f"dex{i}" for i in range(dex_count)])
+    index = SubscriptionIndex()
+    watches = []
+    for user_id in range(30):
+        dex_idx = sorted(rng.choice(dex_count, size=rng.integers(2, dex_count + 1), replace=False).tolist())
+        pairs = sorted(rng.choice(pair_count, size=rng.integers(1, 5), replace=False).tolist())
+        watches.append(watch(user_id, pairs, dex_idx, float(rng.uniform(0.5, 8.0))))
+        index.add(watches[-1])
+
+    dex_masks = np.zeros((len(watches), dex_count), dtype=bool)
+    pair_masks = np.zeros((len(watches), pair_count), dtype=bool)
+    for i, w in enumerate(watches):
+        dex_masks[i, w["dex_idx"]] = True
+        pair_masks[i, w["pairs"]] = True
+    thresholds = [w["spread_limit"] for w in watches]
+
+    for _ in range(5):
+        engine.prices[:] = rng.uniform(95.0, 105.0, size=(pair_count, dex_count))
+        engine.prices[rng.random((pair_count, dex_count)) < 0.2] = np.nan
+        expected = sorted(
+            (user, pair, round(spread, 6), sell, buy)
+            for user, pair, spread, sell, buy in engine.scan(dex_masks, pair_masks, thresholds)
+        )
+        assert hits(index.match(engine.prices, engine.moved())) == expected
@@ -0,0 +1,42 @@
+import multiprocessing
+
+from trade_journal import TradeJournal
+
+USER = 42
+
+def write_trades(directory, n, profit):
+    journal = TradeJournal(directory, fsync="never")
+    for _ in range(n):
+        journal.append(USER, {"status": "SUCCESS", "profit": profit, "dev_cut": profit * 0.35})
+        journal.flush()  # ein Batch pro Trade: möglichst viele verschränkte Stats-Updates
+
+def test_concurrent_processes_do_not_lose_stats_updates(tmp_path):
+    ctx = multiprocessing.get_context("fork")
+    workers = [ctx.Process(target=write_trades, args=(str(tmp_path), 50, profit)) for profit in (1.0, 2.0, 3.0)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join(60)
+        assert w.exitcode == 0
+
+    stats = TradeJournal(str(tmp_path)).stats(USER)
+    assert stats["trades"] == 150
+    assert stats["successes"] == 150
+    assert stats["profit_total"] == 50 * (1.0 + 2.0 + 3.0)
+    assert len(list(TradeJournal(str(tmp_path)).iter_entries(USER))) == 150
+
+def test_close_fsyncs_last_batch(tmp_path, monkeypatch):
+    import trade_journal
+    synced = []
+    real_fsync = trade_journal.os.fsync
+    monkeypatch.setattr(trade_journal.os, "fsync", lambda fd: synced.append(fd) or real_fsync(fd))
+
+    journal = TradeJournal(str(tmp_path), fsync="batch", fsync_interval=60)
+    journal.append(USER, {"status": "SUCCESS", "profit": 1.0})
+    journal.flush()
+    assert len(synced) == 1  # erster Batch: Intervall abgelaufen
+    journal.append(USER, {"status": "SUCCESS", "profit": 1.0})
+    journal.flush()
+    assert len(synced) == 1  # zweiter Batch im Intervall: noch ungesynct
+    journal.close()
+    assert len(synced) == 2
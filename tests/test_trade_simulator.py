@@ -0,0 +1,135 @@
+import asyncio
+
+import pytest
+from eth_abi import decode, encode
+from web3 import Web3
+
+from scanner.trade_simulator import (
+    APPROVE_SELECTOR, BALANCE_OF_SELECTOR, SWAP_EXACT_TOKENS_SELECTOR, TradeSimulator,
+)
+
+SENDER = "0x" + "11" * 20
+TOKEN0 = "0x" + "aa" * 20
+TOKEN1 = "0x" + "bb" * 20
+ROUTER_A = "0x" + "0a" * 20
+ROUTER_B = "0x" + "0b" * 20
+TRADE = (SENDER, TOKEN0, TOKEN1, ROUTER_A, ROUTER_B, 10**18, 3000 * 10**6)
+
+def call_result(status=1, gas=50_000, return_data=b"", error=None):
+    result = {"status": hex(status), "gasUsed": hex(gas), "returnData": Web3.to_hex(return_data)}
+    if error:
+        result["error"] = {"message": error}
+    return result
+
+class FakeSimulateRpc:
+    """
+    eth_simulateV1-Node: antwortet mit fertigen Call-Ergebnissen
+    """
+    def __init__(self, results=None, error=None):
+        self.results = results
+        self.error = error
+        self.requests = []
+
+    async def request(self, method, params=()):
+        self.requests.append((method, params))
+        if self.error:
+            raise self.error
+        return [{"calls": self.results}]
+
+class FakeForkRpc:
+    """
+    Lokaler Fork: token0-Balance des Senders steigt nach dem letzten Swap um profit
+    """
+    def __init__(self, profit=0, fail_at=None):
+        self.profit = profit
+        self.fail_at = fail_at
+        self.balance = 5 * 10**18
+        self.sent = []
+        self.methods = []
+
+    async def request(self, method, params=()):
+        self.methods.append(method)
+        if method == "evm_snapshot":
+            self.snapshot, self.sent = self.balance, []
+            return "0x1"
+        if method == "evm_revert":
+            self.balance = self.snapshot
+            return True
+        if method == "eth_call":
+            assert params[0]["data"].startswith(Web3.to_hex(BALANCE_OF_SELECTOR))
+            return Web3.to_hex(encode(["uint256"], [self.balance]))
+        if method == "eth_sendTransaction":
+            self.sent.append(params[0])
+            if len(self.sent) == 4:
+                self.balance += self.profit
+            return Web3.to_hex(len(self.sent).to_bytes(32, "big"))
+        if method == "eth_getTransactionReceipt":
+            status = 0 if len(self.sent) == self.fail_at else 1
+            return {"status": hex(status), "gasUsed": hex(100_000)}
+        return True
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        TradeSimulator(FakeSimulateRpc(), mode="trace")
+
+def test_build_calls():
+    calls = TradeSimulator(FakeSimulateRpc()).build_calls(*TRADE)
+    assert [c["to"] for c in calls] == [Web3.to_checksum_address(a) for a in (TOKEN0, ROUTER_A, TOKEN1, ROUTER_B)]
+    assert {c["from"] for c in calls} == {Web3.to_checksum_address(SENDER)}
+
+    data = [Web3.to_bytes(hexstr=c["data"]) for c in calls]
+    assert data[0][:4] == data[2][:4] == APPROVE_SELECTOR
+    assert data[1][:4] == data[3][:4] == SWAP_EXACT_TOKENS_SELECTOR
+    assert decode(["address", "uint256"], data[0][4:])[1] == 10**18
+    assert decode(["address", "uint256"], data[2][4:])[1] == 3000 * 10**6
+
+    # Hop 1: amount_mid als Min-Out, Hop 2: amount_mid als Input, zurück nach token0
+    types = ["uint256", "uint256", "address[]", "address", "uint256"]
+    amount_in, min_out, path, to, _ = decode(types, data[1][4:])
+    assert (amount_in, min_out, [a.lower() for a in path], to.lower()) == (10**18, 3000 * 10**6, [TOKEN0, TOKEN1], SENDER)
+    amount_in, min_out, path, _, _ = decode(types, data[3][4:])
+    assert (amount_in, min_out, [a.lower() for a in path]) == (3000 * 10**6, 0, [TOKEN1, TOKEN0])
+
+def test_simulate_v1_profit():
+    out = encode(["uint256[]"], [[3000 * 10**6, 10**18 + 5 * 10**15]])
+    rpc = FakeSimulateRpc([call_result(), call_result(), call_result(), call_result(gas=120_000, return_data=out)])
+    overrides = {TOKEN0: {"balance": "0x1"}}
+    result = asyncio.run(TradeSimulator(rpc).simulate(*TRADE, state_overrides=overrides))
+    assert result == {"ok": True, "amount_out": 10**18 + 5 * 10**15, "profit": 5 * 10**15, "gas_used": 270_000, "error": None}
+
+    method, params = rpc.requests[0]
+    assert method == "eth_simulateV1" and params[1] == "latest"
+    block = params[0]["blockStateCalls"][0]
+    assert len(block["calls"]) == 4 and block["stateOverrides"] == overrides
+
+def test_simulate_v1_revert_names_call():
+    rpc = FakeSimulateRpc([call_result(), call_result(status=0, error="INSUFFICIENT_OUTPUT_AMOUNT"), call_result(status=0), call_result(status=0)])
+    result = asyncio.run(TradeSimulator(rpc).simulate(*TRADE))
+    assert not result["ok"] and result["profit"] is None
+    assert result["error"] == f"{Web3.to_checksum_address(ROUTER_A)}: INSUFFICIENT_OUTPUT_AMOUNT"
+
+def test_simulate_rpc_error_is_a_result():
+    result = asyncio.run(TradeSimulator(FakeSimulateRpc(error=RuntimeError("method not found"))).simulate(*TRADE))
+    assert result == {"ok": False, "amount_out": 0, "profit": None, "gas_used": 0, "error": "method not found"}
+
+def test_fork_balance_diff_and_revert():
+    rpc = FakeForkRpc(profit=7 * 10**15)
+    result = asyncio.run(TradeSimulator(rpc, mode="fork").simulate(*TRADE))
+    assert result == {"ok": True, "amount_out": 10**18 + 7 * 10**15, "profit": 7 * 10**15, "gas_used": 400_000, "error": None}
+    assert rpc.methods[0] == "evm_snapshot" and rpc.methods[-1] == "evm_revert"
+    assert "hardhat_impersonateAccount" in rpc.methods
+
+def test_fork_revert_stops_and_restores_snapshot():
+    rpc = FakeForkRpc(fail_at=2)
+    result = asyncio.run(TradeSimulator(rpc, mode="fork").simulate(*TRADE))
+    assert not result["ok"] and result["gas_used"] == 200_000
+    assert len(rpc.sent) == 2 and rpc.methods[-1] == "evm_revert"
+    assert rpc.balance == 5 * 10**18
+
+def test_simulate_many_keeps_order():
+    rpc = FakeForkRpc(profit=1)
+    sim = TradeSimulator(rpc, mode="fork")
+    results = asyncio.run(sim.simulate_many([TRADE, TRADE[:5] + (2 * 10**18, 1), TRADE]))
+    assert [r["amount_out"] for r in results] == [10**18 + 1, 2 * 10**18 + 1, 10**18 + 1]
+    # Fork-Simulationen laufen seriell: jede in ihrem eigenen Snapshot
+    assert rpc.methods.count("evm_snapshot") == rpc.methods.count("evm_revert") == 3
@@ -1,46 +1,103 @@
 import os
 import json
+import time
 from datetime import datetime
+from decimal import Decimal
 from web3 import Web3
 from dotenv import load_dotenv
 from wallets.wallet_manager import get_or_create_wallet
+from rpc_router import RouterHTTPProvider, rpc_urls, router_options
+from trade_journal import JOURNAL
+from nonce_manager import NonceManager, ConfirmationWatcher, DEFAULT_PATH as NONCE_PATH
+from allowance_cache import AllowanceCache
+from gas_oracle import GasOracle
+from signer_registry import SignerRegistry
+from bundle_submitter import BundleSubmitter, DEFAULT_RELAY_URL, DEFAULT_MAX_BLOCKS
+from eth_account import Account
+from metrics import METRICS, traced
+from config_index import LiveConfig, checksum
+from scanner.quote_engine import MulticallQuoter, MULTICALL3_ADDRESS, DEFAULT_BATCH_SIZE
+from scanner.pair_index import PairIndex, DEFAULT_PATH as PAIR_INDEX_PATH
+
+# --- Approve ABI (ERC20 minimal) ---
+ERC20_ABI = json.loads(
+    '[{"constant":false,"inputs":[{"name":"_spender","type":"address"},{"name":"_value","type":"uint256"}],"name":"approve","outputs":[{"name":"","type":"bool"}],"type":"function"}]'
+)
+
+# Kompilierte Config: Paare/DEXe per Hot-Reload, ERC20-Contracts werden mit web3 vorgebaut (bind)
+CONFIG_INDEX = LiveConfig("config.yaml", erc20_abi=ERC20_ABI)
+CONFIG = CONFIG_INDEX.index.config
 
 # --- ENV & Web3 Init ---
 load_dotenv()
 NETWORK = os.getenv("NETWORK", "sepolia")
-RPC_URL = os.getenv("RPC_URL_MAINNET") if NETWORK == "mainnet" else os.getenv("RPC_URL_SEPOLIA")
-web3 = Web3(Web3.HTTPProvider(RPC_URL))
+# Router über alle Endpoints (RPC_URLS_<NETZ> + RPC_URL_<NETZ>): Reads mit Hedging, TXs an alle
+web3 = Web3(RouterHTTPProvider(rpc_urls(NETWORK), **router_options(CONFIG.get("rpc", {}))))
+CONFIG_INDEX.bind(web3=web3)
+# Nonces der User-Wallets: Bot (manuell) und Scanner (Autotrade) teilen die Zähler über SQLite
+NONCES = NonceManager(web3, path=CONFIG.get("nonces", {}).get("path", NONCE_PATH))
+WATCHER = ConfirmationWatcher(web3)
+GAS = GasOracle(web3)  # feeHistory einmal pro Block, Fees für alle Sender aus dem Cache
+SIGNERS = SignerRegistry(web3, NONCES, get_or_create_wallet)  # Accounts & chain_id einmal pro Prozess
+
+# --- Allowance-Cache: allowance()-Reads gebündelt per Multicall3 ---
+MULTICALL_CFG = CONFIG.get("multicall", {})
+ALLOWANCES = AllowanceCache(MulticallQuoter(
+    call_fn=lambda to, data: web3.eth.call({"to": to, "data": data}),
+    batch_size=MULTICALL_CFG.get("batch_size", DEFAULT_BATCH_SIZE),
+    multicall_address=MULTICALL_CFG.get("address", MULTICALL3_ADDRESS),
+))
+APPROVE_AMOUNT = Web3.to_wei(1000, 'ether')
+
+# --- Token-Beträge: Decimals aus dem Pair-Index, den der Scanner füllt (gemeinsame SQLite-Datei) ---
+PAIR_INDEX = PairIndex(CONFIG.get("pair_index", {}).get("path", PAIR_INDEX_PATH))
+
+def token_decimals(token):
+    decimals = PAIR_INDEX.decimals(token)
+    if decimals is None:
+        PAIR_INDEX.refresh_decimals()
+        decimals = PAIR_INDEX.decimals(token, 18)
+    return decimals
+
+def to_units(amount, token):
+    # Basis-Einheiten (amount_in, expected_profit vom Scanner) -> Token-Einheiten
+    return float(Decimal(amount).scaleb(-token_decimals(token)))
+
+def from_units(value, token):
+    return int(Decimal(str(value)).scaleb(token_decimals(token)))
+
+# --- Private Bundles (Flashbots-Relay): approve/swap/dev-cut atomar, optional ---
+BUNDLE_CFG = CONFIG.get("bundles", {})
+FLASHBOTS_AUTH_KEY = os.getenv("FLASHBOTS_AUTH_KEY")
+BUNDLES = BundleSubmitter(
+    BUNDLE_CFG.get("relay_url", DEFAULT_RELAY_URL),
+    web3,
+    auth_account=Account.from_key(FLASHBOTS_AUTH_KEY) if FLASHBOTS_AUTH_KEY else None,
+    max_blocks=BUNDLE_CFG.get("max_blocks", DEFAULT_MAX_BLOCKS),
+) if BUNDLE_CFG.get("enabled", False) else None
 
 DEV_WALLET = os.getenv("DEV_WALLET")
 DEV_WALLET = Web3.to_checksum_address(DEV_WALLET) if DEV_WALLET else None
 
-# --- Approve ABI (ERC20 minimal) ---
-ERC20_ABI = json.loads(
-    '[{"constant":false,"inputs":[{"name":"_spender","type":"address"},{"name":"_value","type":"uint256"}],"name":"approve","outputs":[{"name":"","type":"bool"}],"type":"function"}]'
-)
+# --- Metriken: Ausführung -> Swap gesendet; Inklusion misst der Watcher bzw. BundleSubmitter ---
+TRADE_SUBMIT = METRICS.histogram("trade_submit_seconds", "execute_trade-Start -> Swap gesendet (bzw. Bundle signiert)")
+TRADES_TOTAL = METRICS.counter("trades_total", "Trades nach Ergebnis", ("status",))
+METRICS.gauge("tx_pending", "Gesendete Transaktionen ohne Receipt", fn=WATCHER.pending)
+METRICS.gauge("journal_queue_depth", "Trade-Log-Einträge, die auf den Writer warten", fn=JOURNAL.pending)
 
 # --- Logger: Schreibe in pro-User-Log ---
+@traced("log_trade")
 def log_trade(user_id, trade_data):
-    log_file = os.path.join("trades", f"tradelog_{user_id}.json")
-    os.makedirs(os.path.dirname(log_file), exist_ok=True)
-    if os.path.exists(log_file):
-        with open(log_file, "r") as f:
-            try:
-                logs = json.load(f)
-            except Exception:
-                logs = []
-    else:
-        logs = []
-    logs.append(trade_data)
-    with open(log_file, "w") as f:
-        json.dump(logs, f, indent=2)
+    # Append-only JSONL, geschrieben vom Hintergrund-Writer (kein Read-Modify-Write mehr)
+    TRADES_TOTAL.labels(trade_data.get("status", "UNKNOWN")).inc()
+    JOURNAL.append(user_id, trade_data)
 
 # --- Dummy-Funktion für Telegram Feedback ---
 def telegram_notify(user_id, message):
     print(f"[TELEGRAM -> {user_id}] {message}")
 
 # --- ETH an DevWallet senden ---
-def send_dev_cut(from_address, private_key, profit_eth, user_id, notify, nonce):
+def send_dev_cut(account, profit_eth, user_id, notify):
     if not DEV_WALLET:
         notify(user_id, "⚠️ DEV_WALLET nicht gesetzt. Dev-Cut wird übersprungen!")
         return None
@@ -51,16 +108,12 @@ def send_dev_cut(from_address, private_key, profit_eth, user_id, notify, nonce):
         return None
 
     try:
-        tx = {
-            'nonce': nonce,
+        tx_hash = SIGNERS.sign_and_send(account, {
             'to': DEV_WALLET,
             'value': Web3.to_wei(cut_amount, "ether"),
             'gas': 21_000,
-            'gasPrice': web3.to_wei('5', 'gwei'),
-            'chainId': web3.eth.chain_id
-        }
-        signed_tx = web3.eth.account.sign_transaction(tx, private_key)
-        tx_hash = web3.eth.send_raw_transaction(signed_tx.rawTransaction)
+            **GAS.fees(),
+        })
         notify(user_id, f"💸 35% Profit-Cut ({cut_amount:.6f} ETH) an Dev gesendet!\nTX: <code>{web3.to_hex(tx_hash)}</code>")
         return web3.to_hex(tx_hash)
     except Exception as e:
@@ -68,134 +121,194 @@ def send_dev_cut(from_address, private_key, profit_eth, user_id, notify, nonce):
         return None
 
 # --- Hauptfunktion für einen Arbitrage-Trade ---
-def execute_trade(user_id, token0, token1, dex_a, dex_b, leverage=1, telegram_callback=None):
-    address, private_key = get_or_create_wallet(user_id)
+@traced("execute_trade")
+def execute_trade(user_id, token0, token1, dex_a, dex_b, leverage=1, telegram_callback=None, amount_in=None, expected_profit=None):
+    """
+    Sendet approve und swap direkt hintereinander (lokale Nonces) und kehrt zurück;
+    Profit, Dev-Cut und Logging laufen, sobald der Watcher das Swap-Receipt sieht.
+    Mit Bundles gehen approve, swap und Dev-Cut (aus expected_profit) atomar an den Relay.
+    """
+    started = time.perf_counter()
+    CONFIG_INDEX.poll()  # ein stat() pro Trade: neue Tokens/Router aus config.yaml ohne Neustart
+    account = SIGNERS.account(user_id)
     notify = telegram_callback or telegram_notify
 
-    if not address or not private_key:
+    if account is None:
         notify(user_id, "❌ Keine Wallet gefunden. Bitte mit /start beginnen.")
         return
+    address = account.address
+
+    def trade_record(status, **fields):
+        return {
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "pair": f"{token0}/{token1}",
+            "dex_a": dex_a,
+            "dex_b": dex_b,
+            "leverage": leverage,
+            "amount_in": trade_amount,
+            **fields,
+            "gas_price_gwei": float(Web3.from_wei(max(fees.values()), 'gwei')) if fees else None,
+            "status": status,
+        }
+
+    tx_hashes = []
+    trade_amount = None
+    fees = None
+    bundle = [] if BUNDLES is not None else None
+    # Bundle-Nonces reservieren: kein Dev-Cut o.ä. dieser Wallet dazwischen, bis das Bundle entschieden ist
+    reservation = NONCES.reserve(address) if bundle is not None else None
+    bundled_cut = None
+
+    def send(tx):
+        # Direkt senden oder (Bundle-Modus) nur signieren und sammeln
+        if bundle is None:
+            return SIGNERS.sign_and_send(account, tx)
+        bundle.append(SIGNERS.sign_next(account, tx))
+        return Web3.keccak(bundle[-1])
 
     try:
-        nonce = web3.eth.get_transaction_count(address)
         is_eth_swap = token0.lower() == "0x4200000000000000000000000000000000000006"  # Sepolia WETH
 
-        gas_price = web3.to_wei('5', 'gwei')
-        trade_amount = 0.001 * leverage  # Minimaler Test-Betrag!
-
-        tx_hashes = []
-        gas_used = None
-        profit = None
-        devcut_tx = None
+        fees = GAS.fees()
+        # Optimale Größe vom Scanner (token0-Basis-Einheiten), sonst minimaler Test-Betrag
+        amount_wei = amount_in if amount_in else from_units(0.001 * leverage, token0)
+        trade_amount = to_units(amount_wei, token0)
 
         # Pre-Balance
         balance_before = web3.eth.get_balance(address)
 
-        # --- Schritt 1: Approve, falls nötig ---
+        # --- Schritt 1: Approve, nur wenn die gecachte Allowance nicht reicht ---
         if not is_eth_swap:
+            ALLOWANCES.prefetch_owner(address, CONFIG_INDEX.index.tokens, CONFIG_INDEX.index.routers)
+        if not is_eth_swap and ALLOWANCES.needs_approve(address, token0, dex_a, amount_wei):
             try:
-                token = web3.eth.contract(address=Web3.to_checksum_address(token0), abi=ERC20_ABI)
-                approve_tx = token.functions.approve(
-                    Web3.to_checksum_address(dex_a),
-                    Web3.to_wei(1000, 'ether')
-                ).build_transaction({
+                approve_fn = CONFIG_INDEX.index.erc20(token0).functions.approve(checksum(dex_a), APPROVE_AMOUNT)
+                approve_gas = GAS.gas_limit((token0.lower(), "approve"), lambda: approve_fn.estimate_gas({'from': address}), 100_000)
+
+                # Nonce & chainId gesetzt, damit build_transaction keinen RPC-Call macht; beide setzt SIGNERS neu
+                approve_tx = approve_fn.build_transaction({
                     'from': address,
-                    'nonce': nonce,
-                    'gas': 100_000,
-                    'gasPrice': gas_price,
-                    'chainId': web3.eth.chain_id
+                    'nonce': 0,
+                    'gas': approve_gas,
+                    **fees,
+                    'chainId': SIGNERS.chain_id
                 })
-                signed_approve = web3.eth.account.sign_transaction(approve_tx, private_key)
-                approve_hash = web3.eth.send_raw_transaction(signed_approve.rawTransaction)
+                approve_hash = send(approve_tx)
+                ALLOWANCES.record_approve(address, token0, dex_a, APPROVE_AMOUNT)
                 tx_hashes.append(web3.to_hex(approve_hash))
                 print(f"✅ Approve TX gesendet: {web3.to_hex(approve_hash)}")
                 notify(user_id, f"✅ Approve gesendet!\nTX: <code>{web3.to_hex(approve_hash)}</code>")
-                # Warte optional auf Approve Bestätigung (kann weg für speed)
-                web3.eth.wait_for_transaction_receipt(approve_hash)
-                nonce += 1
+
+                def on_approve_receipt(receipt):
+                    if receipt.status:
+                        ALLOWANCES.apply_logs(receipt.logs)
+                        return
+                    ALLOWANCES.invalidate(address, token0, dex_a)
+                    notify(user_id, f"❌ Approve revertiert: <code>{web3.to_hex(approve_hash)}</code>")
+
+                WATCHER.watch(approve_hash, on_approve_receipt, lambda _: ALLOWANCES.invalidate(address, token0, dex_a))
             except Exception as e:
                 notify(user_id, f"❌ Approve fehlgeschlagen: {e}")
                 raise
 
-        # --- Schritt 2: Haupt-Trade (simulate swap) ---
+        # --- Schritt 2: Haupt-Trade (simulate swap), Nonce direkt nach dem Approve ---
         try:
-            tx = {
-                'nonce': nonce,
-                'to': Web3.to_checksum_address(dex_a),
-                'value': Web3.to_wei(trade_amount, 'ether') if is_eth_swap else 0,
-                'gas': 250_000,
-                'gasPrice': gas_price,
-                'chainId': web3.eth.chain_id
-            }
-            signed_tx = web3.eth.account.sign_transaction(tx, private_key)
-            tx_hash = web3.eth.send_raw_transaction(signed_tx.rawTransaction)
+            swap_call = {'from': address, 'to': checksum(dex_a), 'value': amount_wei if is_eth_swap else 0}
+            swap_gas = GAS.gas_limit((dex_a.lower(), "swap"), lambda: web3.eth.estimate_gas(swap_call), 250_000)
+
+            tx_hash = send({
+                'to': swap_call['to'],
+                'value': swap_call['value'],
+                'gas': swap_gas,
+                **fees,
+            })
             tx_hashes.append(web3.to_hex(tx_hash))
+            TRADE_SUBMIT.observe(time.perf_counter() - started)
             print(f"✅ Swap TX gesendet: {web3.to_hex(tx_hash)}")
-            receipt = web3.eth.wait_for_transaction_receipt(tx_hash)
-            gas_used = receipt.gasUsed
-            nonce += 1
         except Exception as e:
             notify(user_id, f"❌ Swap fehlgeschlagen: {e}")
             raise
 
-        # --- Schritt 3: Profit berechnen (grob, auf Sepolia oft 0) ---
+        # --- Bundle: Dev-Cut aus dem erwarteten Profit mit ins Bundle (nur bei ETH-Profit) ---
+        if bundle is not None and DEV_WALLET and is_eth_swap and expected_profit and expected_profit > 0:
+            bundled_cut = to_units(expected_profit, token0) * 0.35  # token0 ist WETH
+            devcut_hash = send({
+                'to': DEV_WALLET,
+                'value': Web3.to_wei(bundled_cut, 'ether'),
+                'gas': 21_000,
+                **fees,
+            })
+            tx_hashes.append(web3.to_hex(devcut_hash))
+
+    except Exception as e:
+        if reservation is not None:
+            reservation.release()  # signierte, nie gesendete Bundle-TXs
+        notify(user_id, f"❌ Fehler beim Trade: {e}")
+        log_trade(user_id, trade_record("FAILED", profit=None, dev_cut=None, gas_used=None, tx_hashes=tx_hashes, error=str(e)))
+        return None
+
+    # --- Schritt 3+4: nach Bestätigung Profit berechnen (grob, auf Sepolia oft 0) und DEV CUT (35%) ---
+    def on_swap_receipt(receipt):
+        if not receipt.status:
+            notify(user_id, f"❌ Swap revertiert: <code>{tx_hashes[-1]}</code>")
+            log_trade(user_id, trade_record("FAILED", profit=None, dev_cut=None, gas_used=receipt.gasUsed, tx_hashes=tx_hashes, error="Swap reverted"))
+            return
+
+        if not is_eth_swap:
+            ALLOWANCES.spend(address, token0, dex_a, amount_wei)
+            ALLOWANCES.apply_logs(receipt.logs)
+
         balance_after = web3.eth.get_balance(address)
         profit = float(web3.from_wei(balance_after - balance_before, "ether"))
 
-        # --- Schritt 4: DEV CUT (35%) ---
-        if profit > 0.000001:
-            devcut_tx = send_dev_cut(address, private_key, profit, user_id, notify, nonce)
+        if bundled_cut is not None:
+            notify(user_id, f"💸 35% Profit-Cut ({bundled_cut:.6f} ETH) im Bundle an Dev gesendet!")
+        elif profit > 0.000001:
+            devcut_tx = send_dev_cut(account, profit, user_id, notify)
             if devcut_tx:
                 tx_hashes.append(devcut_tx)
         else:
             notify(user_id, "Kein Profit, daher kein Dev-Cut.")
 
-        # --- Logging ---
-        trade_data = {
-            "timestamp": datetime.utcnow().isoformat() + "Z",
-            "pair": f"{token0}/{token1}",
-            "dex_a": dex_a,
-            "dex_b": dex_b,
-            "leverage": leverage,
-            "amount_in": trade_amount,
-            "profit": profit,
-            "dev_cut": profit * 0.35 if profit and profit > 0 else 0,
-            "gas_used": gas_used,
-            "gas_price_gwei": 5,
-            "tx_hashes": tx_hashes,
-            "status": "SUCCESS"
-        }
+        trade_data = trade_record(
+            "SUCCESS",
+            expected_profit=to_units(expected_profit, token0) if expected_profit is not None else None,
+            profit=profit,
+            dev_cut=bundled_cut if bundled_cut is not None else profit * 0.35 if profit and profit > 0 else 0,
+            gas_used=receipt.gasUsed,
+            tx_hashes=tx_hashes,
+        )
         log_trade(user_id, trade_data)
         notify(user_id, (
             f"🚀 Trade erfolgreich!\n"
             f"Profit: <b>{profit:.6f}</b> ETH\n"
             f"Dev-Cut (35%): <b>{trade_data['dev_cut']:.6f}</b> ETH\n"
-            f"Gas Used: <b>{gas_used}</b>\n"
+            f"Gas Used: <b>{receipt.gasUsed}</b>\n"
             f"TX: <code>{tx_hashes[-1]}</code>"
         ))
 
-        return trade_data
-
-    except Exception as e:
-        error_msg = f"❌ Fehler beim Trade: {e}"
-        notify(user_id, error_msg)
-        trade_data = {
-            "timestamp": datetime.utcnow().isoformat() + "Z",
-            "pair": f"{token0}/{token1}",
-            "dex_a": dex_a,
-            "dex_b": dex_b,
-            "leverage": leverage,
-            "amount_in": trade_amount if 'trade_amount' in locals() else None,
-            "profit": None,
-            "dev_cut": None,
-            "gas_used": None,
-            "gas_price_gwei": 5,
-            "tx_hashes": tx_hashes if 'tx_hashes' in locals() else [],
-            "status": "FAILED",
-            "error": str(e)
-        }
-        log_trade(user_id, trade_data)
-        return None
-
+    def on_swap_timeout(_):
+        # Verworfene TX: lokale Nonces stimmen nicht mehr
+        NONCES.resync(address)
+        notify(user_id, f"❌ Swap nicht bestätigt: <code>{tx_hashes[-1]}</code>")
+        log_trade(user_id, trade_record("FAILED", profit=None, dev_cut=None, gas_used=None, tx_hashes=tx_hashes, error="Keine Bestätigung"))
 
+    if bundle is not None:
+        # Blockiert bis das Bundle landet oder aufgegeben wird (läuft in der Lane der Wallet)
+        try:
+            receipts = BUNDLES.submit(bundle)
+        except Exception as e:
+            receipts = None
+            notify(user_id, f"❌ Bundle abgelehnt: {e}")
+        if receipts is None:
+            reservation.release()
+            if not is_eth_swap:
+                ALLOWANCES.invalidate(address, token0, dex_a)
+            log_trade(user_id, trade_record("FAILED", profit=None, dev_cut=None, gas_used=None, tx_hashes=tx_hashes, error="Bundle nicht inkludiert"))
+            return None
+        reservation.close()
+        on_swap_receipt(receipts[tx_hashes.index(web3.to_hex(tx_hash))])
+        return {"tx_hashes": tx_hashes, "status": "SUCCESS"}
 
+    WATCHER.watch(tx_hash, on_swap_receipt, on_swap_timeout)
+    return {"tx_hashes": tx_hashes, "status": "PENDING"}
@@ -0,0 +1,343 @@
+"""
+TradeJournal: Append-only JSONL-Tradelog pro User mit einem Hintergrund-Writer
+
+- append() blockiert nicht: Einträge landen in einer Queue, ein einzelner Writer-Thread
+  schreibt sie gebündelt (ein os.write pro User-Datei und Batch, O_APPEND)
+- fsync-Policy: "always" (nach jedem Batch), "batch" (höchstens alle fsync_interval s; was
+  danach noch offen ist, synct der Writer nach fsync_interval Leerlauf bzw. close() beim Exit), "never"
+- Rotation nach Größe: tradelog_<user>.jsonl -> tradelog_<user>.<n>.jsonl
+- tail() liest die letzten N Einträge rückwärts vom Dateiende, ohne die Historie zu parsen
+- stats(): materialisierte Summen pro User (tradestats_<user>.json) plus Ringpuffer der
+  letzten Trades, vom Writer bei jedem Batch fortgeschrieben -> /profit und /tradelog in O(1)
+- Bot, Scanner und Executor schreiben als eigene Prozesse in dasselbe Verzeichnis: Anhängen und
+  Stats-Update laufen pro User unter einem flock (tradelog_<user>.lock), die Stats werden dabei
+  immer frisch von der Platte gelesen
+"""
+
+import atexit
+import glob
+import json
+import os
+import queue
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: kein flock, dann darf nur ein Prozess schreiben
+    fcntl = None
+
+TRADES_DIR = "trades"
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+DEFAULT_FSYNC = "batch"
+DEFAULT_FSYNC_INTERVAL = 1.0
+READ_BLOCK = 8192
+RECENT_TRADES = 50  # Größe des Ringpuffers in den Stats
+
+class TradeJournal:
+    def __init__(self, directory=TRADES_DIR, fsync=DEFAULT_FSYNC, fsync_interval=DEFAULT_FSYNC_INTERVAL, max_bytes=DEFAULT_MAX_BYTES):
+        if fsync not in ("always", "batch", "never"):
+            raise ValueError(f"Unbekannte fsync-Policy: {fsync}")
+        self.directory = directory
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.max_bytes = max_bytes
+        self._queue = queue.Queue()
+        self._writer = None
+        self._lock = threading.Lock()
+        self._last_fsync = 0.0
+        self._unsynced = set()  # Log-Dateien mit Batches ohne fsync
+        self._stats = {}  # user_id -> (mtime_ns, stats)
+
+    # --- Pfade ---
+    def path(self, user_id):
+        return os.path.join(self.directory, f"tradelog_{user_id}.jsonl")
+
+    def stats_path(self, user_id):
+        return os.path.join(self.directory, f"tradestats_{user_id}.json")
+
+    def legacy_path(self, user_id):
+        return os.path.join(self.directory, f"tradelog_{user_id}.json")
+
+    def lock_path(self, user_id):
+        return os.path.join(self.directory, f"tradelog_{user_id}.lock")
+
+    @contextmanager
+    def _user_lock(self, user_id):
+        # Prozessübergreifend exklusiv pro User (Bot, Scanner & Executor auf demselben Volume)
+        if fcntl is None:
+            yield
+            return
+        fd = os.open(self.lock_path(user_id), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)  # gibt den flock frei
+
+    def segments(self, user_id):
+        """
+        Alle Dateien eines Users, älteste zuerst: Legacy-JSON, rotierte Segmente, aktuelle Datei
+        """
+        rotated = glob.glob(os.path.join(self.directory, f"tradelog_{user_id}.*.jsonl"))
+        pattern = re.compile(rf"tradelog_{re.escape(str(user_id))}\.(\d+)\.jsonl$")
+        numbered = sorted(
+            (int(m.group(1)), p) for p in rotated if (m := pattern.search(os.path.basename(p)))
+        )
+        files = [p for _, p in numbered]
+        if os.path.exists(self.legacy_path(user_id)):
+            files.insert(0, self.legacy_path(user_id))
+        if os.path.exists(self.path(user_id)):
+            files.append(self.path(user_id))
+        return files
+
+    # --- Schreiben ---
+    def append(self, user_id, entry):
+        self._ensure_writer()
+        self._queue.put((user_id, entry))
+
+    def flush(self):
+        # Wartet, bis alle bisher eingereihten Einträge geschrieben sind
+        if self._writer is not None:
+            self._queue.join()
+
+    def pending(self):
+        # Eingereihte, noch nicht geschriebene Einträge
+        return self._queue.qsize()
+
+    def sync(self):
+        # Alle seit dem letzten fsync geschriebenen Log-Dateien auf die Platte bringen
+        with self._lock:
+            paths, self._unsynced = self._unsynced, set()
+        for path in paths:
+            self._fsync_path(path)
+        self._last_fsync = time.monotonic()
+
+    @staticmethod
+    def _fsync_path(path):
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except FileNotFoundError:
+            return
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def close(self):
+        # Beim Prozessende (atexit): Queue leeren und den letzten "batch"-Batch nicht ungesynct lassen
+        self.flush()
+        if self.fsync != "never":
+            self.sync()
+
+    def _ensure_writer(self):
+        with self._lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._run, name="trade-journal", daemon=True)
+                self._writer.start()
+
+    def _run(self):
+        while True:
+            try:
+                # Offene Batches nach fsync_interval Leerlauf syncen, nicht erst mit dem nächsten Trade
+                batch = [self._queue.get(timeout=self.fsync_interval if self._unsynced else None)]
+            except queue.Empty:
+                self.sync()
+                continue
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                print(f"❌ Tradelog-Schreibfehler: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write_batch(self, batch):
+        os.makedirs(self.directory, exist_ok=True)
+        by_user = {}
+        for user_id, entry in batch:
+            by_user.setdefault(user_id, []).append(json.dumps(entry, separators=(",", ":")) + "\n")
+
+        now = time.monotonic()
+        do_fsync = self.fsync == "always" or (self.fsync == "batch" and now - self._last_fsync >= self.fsync_interval)
+        for user_id, lines in by_user.items():
+            with self._user_lock(user_id):
+                # Stats vor dem Schreiben laden, damit ein Rebuild den neuen Batch nicht doppelt zählt;
+                # frisch, da ein anderer Prozess seit dem letzten Batch geschrieben haben kann
+                stats = self._load_stats(user_id, fresh=True)
+                path = self.path(user_id)
+                self._rotate_if_needed(user_id, path)
+                fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    os.write(fd, "".join(lines).encode("utf-8"))
+                    if do_fsync:
+                        os.fsync(fd)
+                finally:
+                    os.close(fd)
+                if not do_fsync and self.fsync == "batch":
+                    with self._lock:
+                        self._unsynced.add(path)
+                for user, entry in batch:
+                    if user == user_id:
+                        self._add_to_stats(stats, entry)
+                self._save_stats(user_id, stats)
+        if do_fsync:
+            self._last_fsync = now
+            self.sync()  # Dateien anderer User aus früheren Batches gleich mit
+
+    def _rotate_if_needed(self, user_id, path):
+        try:
+            if os.path.getsize(path) < self.max_bytes:
+                return
+        except FileNotFoundError:
+            return
+        numbers = [
+            int(m.group(1)) for p in self.segments(user_id)
+            if (m := re.search(r"\.(\d+)\.jsonl$", p))
+        ]
+        with self._lock:
+            if path in self._unsynced:
+                self._unsynced.discard(path)
+                self._fsync_path(path)  # nach dem Umbenennen kennt sync() die Datei nicht mehr
+        os.replace(path, os.path.join(self.directory, f"tradelog_{user_id}.{max(numbers, default=0) + 1}.jsonl"))
+
+    # --- Lesen ---
+    @staticmethod
+    def _tail_lines(path, n):
+        # Liest vom Dateiende rückwärts, bis n vollständige Zeilen vorliegen
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            pos = f.tell()
+            data = b""
+            while pos > 0 and data.count(b"\n") <= n:
+                step = min(READ_BLOCK, pos)
+                pos -= step
+                f.seek(pos)
+                data = f.read(step) + data
+        lines = [l for l in data.split(b"\n") if l.strip()]
+        if pos > 0:
+            lines = lines[1:]  # erste Zeile evtl. abgeschnitten
+        return lines[-n:] if n else []
+
+    def _read_segment(self, path, n=None):
+        if path.endswith(".json"):
+            with open(path, "r") as f:
+                try:
+                    entries = json.load(f)
+                except Exception:
+                    entries = []
+            return entries if n is None else entries[-n:] if n else []
+        if n is None:
+            with open(path, "rb") as f:
+                lines = [l for l in f if l.strip()]
+        else:
+            lines = self._tail_lines(path, n)
+        entries = []
+        for line in lines:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue  # halb geschriebene Zeile (Absturz) überspringen
+        return entries
+
+    def tail(self, user_id, n=10):
+        """
+        :returns: die letzten n Einträge, älteste zuerst
+        """
+        entries = []
+        for path in reversed(self.segments(user_id)):
+            if len(entries) >= n:
+                break
+            entries = self._read_segment(path, n - len(entries)) + entries
+        return entries
+
+    def iter_entries(self, user_id):
+        # Komplette Historie (streamend, Segment für Segment)
+        for path in self.segments(user_id):
+            yield from self._read_segment(path)
+
+    def exists(self, user_id):
+        return bool(self.segments(user_id))
+
+    # --- Materialisierte Stats ---
+    @staticmethod
+    def _empty_stats():
+        return {"trades": 0, "successes": 0, "profit_total": 0.0, "dev_cut_total": 0.0, "recent": deque(maxlen=RECENT_TRADES)}
+
+    @staticmethod
+    def _add_to_stats(stats, entry):
+        stats["trades"] += 1
+        if entry.get("status") == "SUCCESS":
+            stats["successes"] += 1
+            if entry.get("profit") is not None:
+                stats["profit_total"] += entry["profit"]
+            if entry.get("dev_cut") is not None:
+                stats["dev_cut_total"] += entry["dev_cut"]
+        stats["recent"].append(entry)
+
+    def _rebuild_stats(self, user_id):
+        # Einmalig für Logs ohne Stats-Datei (Legacy-JSON, ältere Versionen)
+        stats = self._empty_stats()
+        for entry in self.iter_entries(user_id):
+            self._add_to_stats(stats, entry)
+        return stats
+
+    def _load_stats(self, user_id, fresh=False):
+        """
+        :param fresh: Cache ignorieren (unter dem User-Lock: mtime allein erkennt Schreiber
+                      anderer Prozesse im selben Zeitstempel-Tick nicht)
+        """
+        path = self.stats_path(user_id)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return self._rebuild_stats(user_id)
+        cached = self._stats.get(user_id)
+        if cached and cached[0] == mtime and not fresh:
+            return cached[1]
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except ValueError:
+            return self._rebuild_stats(user_id)
+        data["recent"] = deque(data.get("recent", []), maxlen=RECENT_TRADES)
+        self._stats[user_id] = (mtime, data)
+        return data
+
+    def _save_stats(self, user_id, stats):
+        # Atomar ersetzen: Leser (auch in anderen Prozessen) sehen nie eine halbe Datei
+        path = self.stats_path(user_id)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({**stats, "recent": list(stats["recent"])}, f, separators=(",", ":"))
+        os.replace(tmp, path)
+        self._stats[user_id] = (os.stat(path).st_mtime_ns, stats)
+
+    def stats(self, user_id):
+        """
+        :returns: dict mit trades, successes, profit_total, dev_cut_total und recent
+                  (die letzten RECENT_TRADES Einträge, älteste zuerst) – None ohne Tradelog
+        """
+        if not os.path.exists(self.stats_path(user_id)):
+            if not self.exists(user_id):
+                return None
+            os.makedirs(self.directory, exist_ok=True)
+            with self._user_lock(user_id):
+                if not os.path.exists(self.stats_path(user_id)):
+                    self._save_stats(user_id, self._rebuild_stats(user_id))
+        return self._load_stats(user_id)
+
+# --- Prozessweites Journal (Konfiguration über ENV) ---
+JOURNAL = TradeJournal(
+    fsync=os.getenv("TRADE_JOURNAL_FSYNC", DEFAULT_FSYNC),
+    max_bytes=int(os.getenv("TRADE_JOURNAL_MAX_BYTES", DEFAULT_MAX_BYTES)),
+)
+atexit.register(JOURNAL.close)
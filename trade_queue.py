@@ -0,0 +1,120 @@
+"""
+TradeQueue: begrenzte Ausführungs-Queue für execute_trade mit einer Lane pro Wallet
+
+- Pro User läuft höchstens ein Trade gleichzeitig (Nonces & Balances bleiben konsistent),
+  verschiedene Wallets laufen parallel auf einem festen Thread-Pool
+- Identische wartende Opportunities (User, Paar, DEXe) werden nur einmal eingereiht
+- Backpressure: ist die Queue voll, wird die neue Opportunity verworfen statt gestapelt
+- Opportunities, deren Block zu alt ist, werden vor der Ausführung verworfen
+- Wartezeit pro Trade und Queue-Zustand als Metriken (trade_queue_*)
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from metrics import METRICS
+
+DEFAULT_MAX_PENDING = 64
+DEFAULT_WORKERS = 8
+DEFAULT_MAX_AGE_BLOCKS = 1
+DEFAULT_MAX_AGE_SECONDS = 30.0
+
+QUEUE_WAIT = METRICS.histogram("trade_queue_wait_seconds", "Opportunity eingereiht -> Ausführung startet")
+
+class TradeQueue:
+    def __init__(self, execute_fn, max_pending=DEFAULT_MAX_PENDING, workers=DEFAULT_WORKERS,
+                 max_age_blocks=DEFAULT_MAX_AGE_BLOCKS, max_age_seconds=DEFAULT_MAX_AGE_SECONDS):
+        """
+        :param execute_fn: blockierende Trade-Funktion, z.B. execute_trade
+        :param max_pending: max. wartende Trades über alle Lanes
+        :param max_age_blocks: Trades mit Block-Tag verfallen, wenn der aktuelle Block weiter ist
+        :param max_age_seconds: Trades verfallen nach dieser Wartezeit (auch ohne Block-Tag)
+        """
+        self.execute_fn = execute_fn
+        self.max_pending = max_pending
+        self.max_age_blocks = max_age_blocks
+        self.max_age_seconds = max_age_seconds
+        self.lanes = {}        # user_id -> deque[(key, block, eingereiht, args, kwargs)]
+        self.active = set()    # Lanes, die gerade ein Worker abarbeitet
+        self.pending = set()   # Keys aller wartenden Trades (Dedup)
+        self.block = None      # aktueller Block (set_block)
+        self.counters = {"submitted": 0, "executed": 0, "failed": 0, "deduped": 0, "rejected": 0, "stale": 0}
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="trade")
+        self._lock = threading.Lock()
+
+    def set_block(self, block):
+        self.block = block
+
+    def submit(self, user_id, key, *args, block=None, **kwargs):
+        """
+        :param key: Identität der Opportunity, z.B. (user_id, token0, token1, dex_a, dex_b)
+        :param block: Block, in dem die Opportunity gesehen wurde (für den Staleness-Check)
+        :returns: True wenn eingereiht, False bei Duplikat oder voller Queue
+        """
+        with self._lock:
+            if key in self.pending:
+                self.counters["deduped"] += 1
+                return False
+            if len(self.pending) >= self.max_pending:
+                self.counters["rejected"] += 1
+                logging.warning(f"Trade-Queue voll ({self.max_pending}), verwerfe {key}")
+                return False
+            self.pending.add(key)
+            self.lanes.setdefault(user_id, deque()).append((key, block, time.monotonic(), args, kwargs))
+            self.counters["submitted"] += 1
+            if user_id not in self.active:
+                self.active.add(user_id)
+                self._pool.submit(self._drain, user_id)
+        return True
+
+    def _is_stale(self, block, queued):
+        if block is not None and self.block is not None and self.block - block > self.max_age_blocks:
+            return True
+        return time.monotonic() - queued > self.max_age_seconds
+
+    def _drain(self, user_id):
+        # Arbeitet eine Lane nacheinander ab; nur ein Worker pro Lane
+        while True:
+            with self._lock:
+                lane = self.lanes.get(user_id)
+                if not lane:
+                    self.active.discard(user_id)
+                    self.lanes.pop(user_id, None)
+                    return
+                key, block, queued, args, kwargs = lane.popleft()
+                self.pending.discard(key)
+                stale = self._is_stale(block, queued)
+                if stale:
+                    self.counters["stale"] += 1
+            if stale:
+                logging.info(f"Trade {key} verfallen (Block {block}, aktuell {self.block})")
+                continue
+            QUEUE_WAIT.observe(time.monotonic() - queued)
+            try:
+                self.execute_fn(*args, **kwargs)
+                outcome = "executed"
+            except Exception as e:
+                outcome = "failed"
+                logging.warning(f"Trade {key} fehlgeschlagen: {e}")
+            with self._lock:
+                self.counters[outcome] += 1
+
+    def metrics(self):
+        with self._lock:
+            depths = [len(lane) for lane in self.lanes.values()]
+            return {
+                "depth": len(self.pending),
+                "max_lane_depth": max(depths, default=0),
+                "lanes": len(self.lanes),
+                "active_lanes": len(self.active),
+                **self.counters,
+            }
+
+    def export_metrics(self, registry=METRICS):
+        # Werte werden erst beim Scrape gelesen
+        registry.gauge("trade_queue_depth", "Wartende Trades über alle Lanes", fn=lambda: len(self.pending))
+        registry.gauge("trade_queue_active_lanes", "Lanes, die gerade ein Worker abarbeitet", fn=lambda: len(self.active))
+        registry.gauge("trade_queue_events", "Queue-Ereignisse seit Start", ("event",),
+                       fn=lambda: {(event,): n for event, n in self.counters.items()})